@@ -36,6 +36,7 @@ from ovos_utils.log import LOG
 from ovos_config.locale import setup_locale
 from ovos_utils.process_utils import reset_sigint_handler
 
+from neon_audio.config import get_config
 from neon_audio.service import NeonPlaybackService
 
 
@@ -43,6 +44,10 @@ def main(*args, **kwargs):
     if kwargs.get("config"):
         LOG.warning("Found `config` kwarg, but expect `audio_config`")
         kwargs["audio_config"] = kwargs.pop("config")
+    serve = kwargs.pop("serve", False)
+    server_config = {k: v for k, v in (("host", kwargs.pop("host", None)),
+                                       ("port", kwargs.pop("port", None)))
+                     if v is not None}
     if kwargs.get("audio_config"):
         LOG.warning("Passed configuration should be written to disk before"
                     "module launch")
@@ -57,10 +62,16 @@ def main(*args, **kwargs):
     reset_sigint_handler()
     check_for_signal("isSpeaking")
     setup_locale()
+    server = None
     try:
         service = NeonPlaybackService(*args, **kwargs)
         LOG.info("Service init completed")
         service.start()
+        if serve:
+            from neon_audio.server import TTSServer
+            config = get_config().get("tts", {}).get("server") or dict()
+            server = TTSServer(service, {**config, **server_config})
+            server.start()
         wait_for_exit_signal()
     except Exception as e:
         LOG.exception(e)
@@ -70,6 +81,8 @@ def main(*args, **kwargs):
             print_malloc(snapshot_malloc())
         except Exception as e:
             LOG.error(e)
+    if server:
+        server.shutdown()
     if service:
         service.shutdown()
 
@@ -58,7 +58,13 @@ def neon_audio_cli(version: bool = False):
               help="TTS package spec to install")
 @click.option("--force-install", "-f", default=False, is_flag=True,
               help="Force pip installation of configured module")
-def run(module, package, force_install):
+@click.option("--serve", default=False, is_flag=True,
+              help="Serve TTS over HTTP/WebSocket (requires aiohttp)")
+@click.option("--host", default=None,
+              help="Address to serve TTS on (default 127.0.0.1)")
+@click.option("--port", default=None, type=int,
+              help="Port to serve TTS on (default 8580)")
+def run(module, package, force_install, serve, host, port):
     from neon_audio.__main__ import main
     if force_install or module or package:
         try:
@@ -66,17 +72,97 @@ def run(module, package, force_install):
         except Exception as e:
             click.echo(f"Failed to install plugin: {e}")
     if module:
-        audio_config = Configuration()
+        from neon_audio.config import get_config
+        audio_config = get_config()
         if module != audio_config["tts"]["module"]:
             LOG.warning(f"Requested a module to install ({module}), but config "
                         f"specifies {audio_config['tts']['module']}."
                         f"{audio_config['tts']['module']} will be loaded. "
                         f"Configuration can be modified at "
-                        f"{audio_config.xdg_configs[0]}")
+                        f"{Configuration.xdg_configs[0]}")
     click.echo("Starting Audio Client")
-    main()
+    if serve:
+        main(serve=True, host=host, port=port)
+    else:
+        main()
     click.echo("Audio Client Shutdown")
 
+
+@neon_audio_cli.command(help="Synthesize audio for a JSONL file of texts")
+@click.option("--workers", "-w", default=1, type=int,
+              help="Number of worker processes, each loading an engine")
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output_dir", type=click.Path(file_okay=False))
+def synth(workers, input_file, output_dir):
+    from neon_audio.synth import run_bulk_synthesis
+
+    def _on_progress(completed, total, rate, eta):
+        click.echo(f"{completed}/{total} | {rate:.2f} items/s | "
+                   f"ETA {eta:.0f}s")
+
+    summary = run_bulk_synthesis(input_file, output_dir, workers,
+                                 _on_progress)
+    click.echo(f"Synthesized {summary['completed']} of {summary['total']} "
+               f"items ({summary['cached']} already complete, "
+               f"{summary['duplicates']} duplicates, "
+               f"{summary['failed']} failed)")
+    for item_id, error in summary["errors"].items():
+        click.echo(f"{item_id}: {error}")
+
+
+@neon_audio_cli.command(help="Record TTS requests from the messagebus")
+@click.option("--duration", "-t", default=None, type=float,
+              help="Seconds to record (default until interrupted)")
+@click.argument("output_file", type=click.Path(dir_okay=False))
+def record(duration, output_file):
+    from time import sleep
+    from neon_utils.messagebus_utils import get_messagebus
+    from neon_audio.replay import TrafficRecorder
+    recorder = TrafficRecorder(get_messagebus(), output_file)
+    recorder.start()
+    click.echo(f"Recording to {output_file}. Press Ctrl+C to stop")
+    try:
+        if duration:
+            sleep(duration)
+        else:
+            while True:
+                sleep(1)
+    except KeyboardInterrupt:
+        pass
+    recorder.stop()
+    click.echo(f"Recorded {recorder.count} messages")
+
+
+@neon_audio_cli.command(help="Replay recorded TTS requests against an "
+                             "in-process service with a stand-in engine")
+@click.option("--speed", "-s", default=1.0, type=float,
+              help="Replay speed multiplier")
+@click.option("--synth-delay", default=0.0, type=float,
+              help="Seconds for the stand-in engine to synthesize")
+@click.argument("log_file", type=click.Path(exists=True, dir_okay=False))
+def replay(speed, synth_delay, log_file):
+    from neon_audio.replay import create_replay_service, load_traffic, \
+        replay_traffic
+    records = load_traffic(log_file)
+    service = create_replay_service(synth_delay)
+    try:
+        summary = replay_traffic(records, service, speed)
+    finally:
+        service.shutdown()
+    click.echo(f"Replayed {summary['messages']} messages in "
+               f"{summary['seconds']:.2f}s")
+    for msg_type, latency in summary["latency"].items():
+        click.echo(f"{msg_type}: {latency['count']} | "
+                   f"p50 {latency['p50']:.3f}s | p90 {latency['p90']:.3f}s | "
+                   f"p99 {latency['p99']:.3f}s | max {latency['max']:.3f}s")
+    click.echo(f"Errors: {len(summary['errors'])}")
+    for error in summary["errors"]:
+        click.echo(f"  {error['index']} ({error['type']}): {error['error']}")
+    click.echo(f"CPU: {summary['cpu_seconds']:.2f}s | "
+               f"RSS: {summary['rss_mb']:.1f} MiB "
+               f"({summary['rss_growth_mb']:+.1f} MiB)")
+
+
 @neon_audio_cli.command(help="Install a TTS Plugin")
 @click.option("--module", "-m", default=None,
               help="TTS Plugin to configure")
@@ -116,6 +202,103 @@ def install_dependencies(package: List[str]):
 @click.option("--plugin", "-p", default=None,
               help="TTS module to init")
 def init_plugin(plugin):
+    from neon_audio.config import get_config
     from neon_audio.utils import init_tts_plugin
-    plugin = plugin or Configuration()["tts"]["module"]
-    init_tts_plugin(plugin)
\ No newline at end of file
+    plugin = plugin or get_config()["tts"]["module"]
+    init_tts_plugin(plugin)
+
+
+@neon_audio_cli.group(help="Manage the TTS audio cache")
+def cache():
+    pass
+
+
+@cache.command(help="Report audio cache size, entry count, and hit rate")
+@click.option("--directory", "-d", default=None,
+              help="Neon cache directory to inspect")
+def stats(directory):
+    from neon_audio.tts.cache import get_cache_stats, get_audio_cache_dir
+    cache_stats = get_cache_stats(directory)
+    hit_rate = cache_stats["hit_rate"]
+    click.echo(f"Directory: {get_audio_cache_dir(directory)}")
+    click.echo(f"Size: {cache_stats['size'] / 1048576:.2f} MiB")
+    click.echo(f"Entries: {cache_stats['entries']}")
+    click.echo(f"Requests: {cache_stats['requests']}")
+    click.echo(f"Hit rate: "
+               f"{f'{hit_rate:.1%}' if hit_rate is not None else 'N/A'}")
+    memory_stats = cache_stats["memory"]
+    memory_hit_rate = memory_stats["hit_rate"]
+    memory_hit_rate = f"{memory_hit_rate:.1%}" \
+        if memory_hit_rate is not None else "N/A"
+    click.echo(f"Memory requests: {memory_stats['requests']}")
+    click.echo(f"Memory hit rate: {memory_hit_rate}")
+
+
+@cache.command(help="Remove old or least-recently used audio from the cache")
+@click.option("--directory", "-d", default=None,
+              help="Neon cache directory to prune")
+@click.option("--max-mb", default=None, type=float,
+              help="Maximum cache size in MiB")
+@click.option("--max-age-days", default=None, type=float,
+              help="Maximum days since an entry was last used")
+def prune(directory, max_mb, max_age_days):
+    from neon_audio.config import get_config
+    from neon_audio.tts.cache import prune_cache, get_audio_cache_dir
+    tts_cache = get_config().get("tts", {}).get("cache") or dict()
+    max_bytes = int(max_mb * 1048576) if max_mb is not None else \
+        tts_cache.get("max_bytes")
+    max_age_days = max_age_days or tts_cache.get("max_age_days")
+    if max_bytes is None and not max_age_days:
+        click.echo("No quota or age limit specified")
+        sys.exit(1)
+    removed = prune_cache(get_audio_cache_dir(directory), max_bytes,
+                          max_age_days * 86400 if max_age_days else None)
+    click.echo(f"Removed {len(removed)} entries")
+
+
+@cache.command(help="Report the most frequently synthesized phrases")
+@click.option("--directory", "-d", default=None,
+              help="Neon cache directory to inspect")
+@click.option("--limit", "-n", default=20, type=int,
+              help="Number of phrases to report")
+@click.option("--warmup", "-w", default=None, type=click.Path(dir_okay=False),
+              help="Write phrases to a JSONL file for `neon-audio synth`")
+@click.option("--min-count", default=2, type=int,
+              help="Minimum requests for a phrase to be written to --warmup")
+def phrases(directory, limit, warmup, min_count):
+    import json
+    from neon_audio.tts.analytics import PhraseStats, get_warmup_phrases
+    from neon_audio.tts.cache import get_cache_dir
+    directory = directory or get_cache_dir()
+    phrase_stats = PhraseStats(directory)
+    for phrase in phrase_stats.top(limit):
+        hit_rate = phrase["hits"] / phrase["count"] if phrase["count"] else 0
+        click.echo(f"{phrase['count']:>6} | hits {hit_rate:>5.0%} | "
+                   f"{phrase['synth_seconds']:>7.2f}s | {phrase['lang']} "
+                   f"{phrase['gender']} | {phrase['text']}")
+    hits = phrase_stats.translations["hits"]
+    total = hits + phrase_stats.translations["misses"]
+    click.echo(f"Translation cache hit rate: "
+               f"{f'{hits / total:.1%}' if total else 'N/A'}")
+    click.echo(f"Translations skipped: "
+               f"{phrase_stats.translations['skipped']}")
+    if warmup:
+        items = get_warmup_phrases(directory, limit, min_count)
+        with open(warmup, 'w', encoding='utf-8') as f:
+            for item in items:
+                f.write(json.dumps(item) + "\n")
+        click.echo(f"Wrote {len(items)} phrases to {warmup}")
+
+
+@cache.command(help="Find corrupt audio files in the cache")
+@click.option("--directory", "-d", default=None,
+              help="Neon cache directory to verify")
+@click.option("--remove", "-r", default=False, is_flag=True,
+              help="Delete corrupt entries")
+def verify(directory, remove):
+    from neon_audio.tts.cache import verify_cache, get_audio_cache_dir
+    corrupt = verify_cache(get_audio_cache_dir(directory), remove)
+    for path in corrupt:
+        click.echo(path)
+    click.echo(f"{'Removed' if remove else 'Found'} {len(corrupt)} "
+               f"corrupt entries")
@@ -0,0 +1,187 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from copy import deepcopy
+from threading import Lock
+from typing import Callable, List, Optional
+
+from ovos_config.config import Configuration
+from ovos_utils.log import LOG
+
+_CONFIG_EVENTS = ("configuration.updated", "configuration.patch",
+                  "configuration.patch.clear")
+
+
+def _readonly(*_, **__):
+    raise TypeError("Configuration snapshots are read-only")
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict. Copies made with `dict()`, `copy()`, or `deepcopy()` may
+    be modified; `deepcopy()` returns plain dicts and lists.
+    """
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return {k: deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+class FrozenList(list):
+    """
+    Read-only list. Copies made with `list()`, `copy()`, or `deepcopy()` may
+    be modified.
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = clear = extend = insert = pop = remove = reverse = sort = \
+        _readonly
+
+    def __init__(self, items=()):
+        list.extend(self, items)
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(v, memo) for v in self]
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(_freeze(v) for v in value)
+    return value
+
+
+_snapshot: Optional[FrozenDict] = None
+_snapshot_lock = Lock()
+_subscribers: List[Callable[[FrozenDict, FrozenDict], None]] = list()
+_watched_bus = None
+
+
+def get_config() -> FrozenDict:
+    """
+    Get the current configuration snapshot. The snapshot is only replaced
+    when configuration changes, so it may be read repeatedly without merging
+    configuration files. Use `deepcopy` to get a modifiable copy.
+    :returns: read-only merged configuration
+    """
+    if _snapshot is None:
+        refresh_config()
+    return _snapshot
+
+
+def refresh_config() -> bool:
+    """
+    Rebuild the configuration snapshot from loaded configuration and notify
+    subscribers if it changed.
+    :returns: True if configuration changed
+    """
+    global _snapshot
+    with _snapshot_lock:
+        config = _freeze(Configuration.load_all_configs())
+        old_config = _snapshot
+        if config == old_config:
+            return False
+        _snapshot = config
+    if old_config is not None:
+        LOG.info("Configuration changed")
+        for callback in list(_subscribers):
+            try:
+                callback(old_config, config)
+            except Exception as e:
+                LOG.exception(f"Error in configuration subscriber "
+                              f"{callback}: {e}")
+    return True
+
+
+def subscribe(callback: Callable[[FrozenDict, FrozenDict], None]):
+    """
+    Register a method to call when configuration changes
+    :param callback: method accepting the previous and new snapshots
+    """
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[FrozenDict, FrozenDict], None]):
+    """
+    Remove a method registered with `subscribe`
+    :param callback: method to remove
+    """
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def _get_config_handlers() -> dict:
+    return {"configuration.updated": Configuration.updated,
+            "configuration.patch": Configuration.patch,
+            "configuration.patch.clear": Configuration.patch_clear}
+
+
+def _handle_config_event(message):
+    if Configuration.bus is not _watched_bus:
+        # ovos-config is not handling events from this bus
+        _get_config_handlers()[message.msg_type](message)
+    refresh_config()
+
+
+def watch_config(bus=None):
+    """
+    Refresh the configuration snapshot when configuration files change and,
+    if `bus` is specified, on messagebus configuration events. If ovos-config
+    handles events from `bus`, the snapshot is refreshed after its handlers
+    apply each update, so this should be called after
+    `Configuration.set_config_update_handlers`.
+    :param bus: MessageBusClient to handle configuration events from
+    """
+    global _watched_bus
+    Configuration.set_config_watcher(refresh_config)
+    if bus is None or bus is _watched_bus:
+        return
+    if _watched_bus:
+        for msg_type in _CONFIG_EVENTS:
+            _watched_bus.remove(msg_type, _handle_config_event)
+    for msg_type in _CONFIG_EVENTS:
+        bus.on(msg_type, _handle_config_event)
+    _watched_bus = bus
+
+
+def remove_config_watcher(callback: Callable):
+    """
+    Stop calling a method registered with `Configuration.set_config_watcher`
+    when configuration files change
+    :param callback: method to remove
+    """
+    if callback in Configuration._callbacks:
+        Configuration._callbacks.remove(callback)
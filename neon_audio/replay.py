@@ -0,0 +1,278 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import gzip
+import json
+import resource
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Event, Lock
+from time import monotonic, sleep
+from typing import Iterable, List
+
+import numpy as np
+
+from ovos_bus_client.message import Message
+from ovos_plugin_manager.templates.tts import TTS, TTSValidator
+from ovos_utils.log import LOG
+
+from neon_audio.tts.router import get_rss_bytes
+
+RECORDED_TYPES = ("speak", "neon.get_tts", "neon.get_tts.batch")
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TrafficRecorder:
+    def __init__(self, bus, path: str,
+                 msg_types: Iterable[str] = RECORDED_TYPES):
+        """
+        Record TTS requests from the messagebus with their relative timing.
+        Requests from Klat are recorded with their `klat_data` context. Logs
+        are JSONL, compressed if `path` ends in `.gz`.
+        :param bus: MessageBusClient to record from
+        :param path: file to write records to
+        :param msg_types: message types to record
+        """
+        self.bus = bus
+        self.path = path
+        self.msg_types = tuple(msg_types)
+        self.count = 0
+        self._file = None
+        self._start = None
+        self._lock = Lock()
+
+    def start(self):
+        self._file = _open(self.path, "wt")
+        self._start = monotonic()
+        for msg_type in self.msg_types:
+            self.bus.on(msg_type, self._record)
+
+    def _record(self, message: Message):
+        record = {"t": round(monotonic() - self._start, 3),
+                  "type": message.msg_type, "data": message.data,
+                  "context": message.context}
+        with self._lock:
+            if self._file:
+                self._file.write(json.dumps(record) + "\n")
+                self.count += 1
+
+    def stop(self):
+        for msg_type in self.msg_types:
+            self.bus.remove(msg_type, self._record)
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+def load_traffic(path: str) -> List[dict]:
+    """
+    Load records written by a TrafficRecorder
+    :param path: recorded log file
+    :returns: list of dict records sorted by time
+    """
+    with _open(path, "rt") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return sorted(records, key=lambda r: r["t"])
+
+
+class ReplayTTS(TTS):
+    def __init__(self, lang: str = "en-us", config: dict = None):
+        """
+        Stand-in engine that writes silent audio with a duration based on
+        the length of the text after an optional `synth_delay`.
+        """
+        config = config or dict()
+        TTS.__init__(self, lang, config, ReplayTTSValidator(self), "wav",
+                     False, ["speak"])
+        self.synth_delay = config.get("synth_delay", 0.0)
+        self.words_per_second = config.get("words_per_second", 3.0)
+
+    def get_tts(self, sentence, wav_file, **kwargs):
+        from neon_audio.tts.audio_processing import write_wav
+        sleep(self.synth_delay)
+        duration = max(len(sentence.split()) / self.words_per_second, 0.1)
+        write_wav(wav_file, np.zeros((int(duration * 16000), 1),
+                                     dtype=np.float32), 16000)
+        return wav_file, None
+
+
+class ReplayTTSValidator(TTSValidator):
+    def validate_lang(self):
+        return True
+
+    def validate_dependencies(self):
+        return True
+
+    def validate_connection(self):
+        return True
+
+    def get_tts_class(self):
+        return ReplayTTS
+
+
+class _SimulatedPlayer:
+    def __init__(self, duration: float):
+        self._duration = duration
+
+    def communicate(self):
+        sleep(self._duration)
+
+    def wait(self):
+        pass
+
+    def terminate(self):
+        self._duration = 0
+
+
+@contextmanager
+def simulated_playback(speed: float = 1.0):
+    """
+    Context manager replacing audio output with a wait for the duration of
+    the audio, scaled by `speed`.
+    """
+    import ovos_audio.playback
+    from neon_audio.tts.audio_processing import get_audio_duration
+    play_audio = ovos_audio.playback.play_audio
+
+    def _play(uri, *_, **__):
+        return _SimulatedPlayer((get_audio_duration(uri) or 0.0) / speed)
+
+    ovos_audio.playback.play_audio = _play
+    try:
+        yield
+    finally:
+        ovos_audio.playback.play_audio = play_audio
+
+
+def _percentiles(latencies: List[float]) -> dict:
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+    return {"count": len(latencies), "p50": float(p50), "p90": float(p90),
+            "p99": float(p99), "max": max(latencies)}
+
+
+def replay_traffic(records: List[dict], service, speed: float = 1.0,
+                   max_workers: int = 32,
+                   response_timeout: float = 30.0) -> dict:
+    """
+    Emit recorded requests to a service at their recorded times (scaled by
+    `speed`) and measure the time to handle each.
+    :param records: records from `load_traffic`
+    :param service: NeonPlaybackService on an in-process bus
+    :param speed: playback speed multiplier
+    :param max_workers: maximum concurrent requests
+    :param response_timeout: seconds to wait for a response to a request
+    :returns: dict summary of latency by message type, errors, and resources
+    """
+    bus = service.bus
+    latencies = dict()
+    errors = list()
+    lock = Lock()
+
+    def _send(idx: int, record: dict):
+        ident = f"replay.{idx}"
+        message = Message(record["type"], dict(record["data"]),
+                          dict(record["context"]))
+        response = dict()
+        received = Event()
+
+        def _handle_response(msg: Message):
+            response.update(msg.data)
+            received.set()
+
+        if message.msg_type == "speak":
+            message.data["speak_ident"] = ident
+            received.set()
+        else:
+            message.context["ident"] = ident
+            bus.once(ident, _handle_response)
+        start = monotonic()
+        try:
+            bus.emit(message)
+            if received.wait(response_timeout):
+                error = response.get("error")
+            else:
+                error = f"No response in {response_timeout}s"
+        except Exception as e:
+            error = repr(e)
+        finally:
+            bus.remove(ident, _handle_response)
+        latency = monotonic() - start
+        with lock:
+            latencies.setdefault(message.msg_type, list()).append(latency)
+            if error:
+                errors.append({"index": idx, "type": message.msg_type,
+                               "error": error})
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    rss = get_rss_bytes()
+    start = monotonic()
+    with simulated_playback(speed), ThreadPoolExecutor(max_workers) as pool:
+        for idx, record in enumerate(records):
+            delay = record["t"] / speed - (monotonic() - start)
+            if delay > 0:
+                sleep(delay)
+            pool.submit(_send, idx, record)
+    end_usage = resource.getrusage(resource.RUSAGE_SELF)
+    end_rss = get_rss_bytes()
+    summary = {"messages": len(records), "seconds": monotonic() - start,
+               "errors": errors,
+               "latency": {msg_type: _percentiles(values)
+                           for msg_type, values in latencies.items()},
+               "cpu_seconds": (end_usage.ru_utime + end_usage.ru_stime) -
+               (usage.ru_utime + usage.ru_stime),
+               # Current rather than peak RSS so earlier spikes are ignored
+               "rss_mb": end_rss / 2 ** 20,
+               "rss_growth_mb": (end_rss - rss) / 2 ** 20}
+    LOG.info(f"Replayed {len(records)} messages in "
+             f"{summary['seconds']:.2f}s")
+    return summary
+
+
+def create_replay_service(synth_delay: float = 0.0):
+    """
+    Create a NeonPlaybackService on an in-process bus using ReplayTTS.
+    :param synth_delay: seconds for the stand-in engine to synthesize
+    :returns: started NeonPlaybackService
+    """
+    from ovos_utils.fakebus import FakeBus
+    from neon_audio.service import NeonPlaybackService
+    from neon_audio.tts import WrappedTTS
+    bus = FakeBus()
+    tts = WrappedTTS(ReplayTTS, "en-us", {"synth_delay": synth_delay})
+    service = NeonPlaybackService(bus=bus, tts=tts, disable_ocp=True,
+                                  daemonic=True)
+    tts.init(bus, service.playback_thread)
+    service.start()
+    return service
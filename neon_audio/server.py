@@ -0,0 +1,220 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Event
+from typing import Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+try:
+    from aiohttp import web, WSMsgType
+except ImportError:
+    web = None
+    WSMsgType = None
+
+
+class TTSServer(Thread):
+    def __init__(self, service, config: dict = None):
+        """
+        Asyncio HTTP/WebSocket front-end for a NeonPlaybackService. Requests
+        are synthesized by the service's TTS engine on a bounded thread pool,
+        so idle connections do not consume threads.
+        :param service: NeonPlaybackService to synthesize with
+        :param config: `tts.server` configuration
+        """
+        if web is None:
+            raise ImportError("aiohttp is required to serve TTS over HTTP. "
+                              "Install with: pip install neon-audio[server]")
+        Thread.__init__(self, daemon=True, name="tts_server")
+        config = config or dict()
+        self.service = service
+        self.host = config.get("host", "127.0.0.1")
+        self.port = config.get("port", 8580)
+        self._executor = ThreadPoolExecutor(config.get("max_workers", 4),
+                                            thread_name_prefix="tts_server")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner = None
+        self.ready = Event()
+
+    @property
+    def app(self):
+        app = web.Application()
+        app.add_routes([web.get("/health", self.handle_health),
+                        web.post("/synthesize", self.handle_synthesize),
+                        web.post("/synthesize/stream",
+                                 self.handle_synthesize_stream),
+                        web.get("/ws", self.handle_websocket)])
+        return app
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.app)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port)
+        self._loop.run_until_complete(site.start())
+        LOG.info(f"Serving TTS at http://{self.host}:{self.port}")
+        self.ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def shutdown(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self.join(10)
+        self._executor.shutdown(wait=False)
+
+    def _synthesize(self, request: dict) -> dict:
+        """
+        Synthesize a request with the service TTS engine, as for a
+        `neon.get_tts` message
+        :param request: dict `text` with optional `speaker` and `lang`
+        :returns: dict responses by language
+        """
+        data = {"text": request["text"]}
+        for key in ("speaker", "lang"):
+            if request.get(key):
+                data[key] = request[key]
+        with self.service.use_tts("tts_server") as tts:
+            return tts.get_multiple_tts(
+                Message("neon.get_tts", data,
+                        {"source": "tts_server", "destination": ["audio"]}))
+
+    async def _run_synthesis(self, request: dict) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._synthesize, request)
+
+    def _split(self, text: str) -> list:
+        with self.service.use_tts("tts_server") as tts:
+            return tts.preprocess_sentence(text) or [text]
+
+    async def _run_split(self, text: str) -> list:
+        # Loading an idle engine may take a while
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._split, text)
+
+    @staticmethod
+    def _validate(request) -> Optional[str]:
+        if not isinstance(request, dict):
+            return "Request must be a JSON object"
+        if not isinstance(request.get("text"), str) or \
+                not request["text"].strip():
+            return "No text provided."
+        return None
+
+    async def handle_health(self, _):
+        tts = self.service.tts
+        if tts:
+            status = "ok"
+        else:
+            # An engine unloaded while idle is loaded on the next request
+            status = "idle" if self.service.tts_idle else "error"
+        breaker = getattr(tts, "engine_breaker", None)
+        response = {"status": status,
+                    "tts": tts.tts_name if tts else None,
+                    "circuit": breaker.state if breaker else None}
+        return web.json_response(response,
+                                 status=503 if status == "error" else 200)
+
+    async def handle_synthesize(self, request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Invalid JSON"}, status=400)
+        error = self._validate(body)
+        if error:
+            return web.json_response({"error": error}, status=400)
+        try:
+            return web.json_response(await self._run_synthesis(body))
+        except Exception as e:
+            LOG.exception(e)
+            return web.json_response({"error": repr(e)}, status=500)
+
+    async def handle_synthesize_stream(self, request):
+        """
+        Synthesize each sentence of the request separately, writing each
+        result as a line of JSON as soon as it is available
+        """
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Invalid JSON"}, status=400)
+        error = self._validate(body)
+        if error:
+            return web.json_response({"error": error}, status=400)
+        response = web.StreamResponse(
+            headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        async for result in self._stream(body):
+            await response.write(json.dumps(result).encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    async def handle_websocket(self, request):
+        """
+        Accept JSON synthesis requests over a WebSocket. Each sentence result
+        is sent as it is available, followed by a `done` message.
+        """
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                body = json.loads(msg.data)
+            except ValueError:
+                await ws.send_json({"error": "Invalid JSON"})
+                continue
+            error = self._validate(body)
+            if error:
+                await ws.send_json({"error": error, "id": body.get("id")
+                                    if isinstance(body, dict) else None})
+                continue
+            async for result in self._stream(body):
+                await ws.send_json({**result, "id": body.get("id")})
+            await ws.send_json({"done": True, "id": body.get("id")})
+        return ws
+
+    async def _stream(self, body: dict):
+        sentences = await self._run_split(body["text"])
+        for idx, sentence in enumerate(sentences):
+            try:
+                responses = await self._run_synthesis({**body,
+                                                       "text": sentence})
+                yield {"index": idx, "total": len(sentences),
+                       "responses": responses}
+            except Exception as e:
+                LOG.exception(e)
+                yield {"index": idx, "total": len(sentences),
+                       "error": repr(e)}
@@ -25,18 +25,30 @@
 # LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-from time import time
+import json
+
+from contextlib import contextmanager
+from time import monotonic, time
+from typing import Optional
 
 import ovos_audio.tts
 import ovos_plugin_manager.templates.tts
 
-from threading import Event
+from threading import Condition, Event, Lock, Thread
 
+from ovos_bus_client.message import Message
 from ovos_utils.log import LOG, log_deprecation
+from neon_audio.config import get_config, refresh_config, \
+    remove_config_watcher, subscribe, unsubscribe, watch_config
+from neon_audio.tracing import get_tracer
 from neon_audio.tts import TTSFactory
+from neon_audio.tts.playback_process import PlaybackProcessThread
+from neon_audio.tts.playback_queue import InstrumentedQueue
+from neon_audio.tts.router import EngineRouter
 from neon_utils.messagebus_utils import get_messagebus
 from neon_utils.metrics_utils import Stopwatch
 from ovos_audio.service import PlaybackService
+from ovos_plugin_manager.templates.tts import TTS
 
 ovos_audio.tts.TTSFactory = TTSFactory
 ovos_audio.service.TTSFactory = TTSFactory
@@ -67,7 +79,7 @@ class NeonPlaybackService(PlaybackService):
                  stopping_hook=on_stopping, alive_hook=on_alive,
                  started_hook=on_started, watchdog=lambda: None,
                  audio_config=None, daemonic=False, bus=None,
-                 disable_ocp=False):
+                 disable_ocp=False, tts=None):
         """
         Creates a Speech service thread
         :param ready_hook: function callback when service is ready
@@ -79,25 +91,481 @@ class NeonPlaybackService(PlaybackService):
         :param daemonic: if True, run this thread as a daemon
         :param bus: Connected MessageBusClient
         :param disable_ocp: if True, disable OVOS Common Play service
+        :param tts: TTS engine to use instead of the configured engine
         """
         from neon_utils.signal_utils import create_signal
-        # Patch import so PlaybackService creates a `NeonPlaybackThread` object
         from neon_audio.tts.neon import NeonPlaybackThread
-        ovos_audio.service.PlaybackThread = NeonPlaybackThread
 
         if audio_config:
             LOG.info("Updating global config with passed config")
             from neon_audio.utils import patch_config
             patch_config(audio_config)
+            refresh_config()
+        # Patch import so PlaybackService creates a `NeonPlaybackThread` object
+        # Refresh the configuration snapshot before other file watchers
+        watch_config()
+        if get_config().get("tts", {}).get("playback_process",
+                                           {}).get("enabled"):
+            LOG.info("Playing audio in a separate process")
+            ovos_audio.service.PlaybackThread = PlaybackProcessThread
+        else:
+            ovos_audio.service.PlaybackThread = NeonPlaybackThread
         bus = bus or get_messagebus()
+        # Replace the playback queue before `PlaybackThread` is created
+        if not isinstance(TTS.queue, InstrumentedQueue):
+            queue = InstrumentedQueue()
+            while TTS.queue and not TTS.queue.empty():
+                queue.put(TTS.queue.get())
+            TTS.queue = queue
+        self._watchdog = watchdog
+        self._last_queue_depth = 0
+        self._tts_module = None
+        self._reload_lock = Lock()
+        self._router = None
+        self._tts_unloaded = False
+        self._encoded_cache = None
+        self._tts_active = 0
+        self._tts_users = dict()
+        self._tts_last_used = monotonic()
+        self._idle_lock = Lock()
+        self._tts_released = Condition(self._idle_lock)
+        self._stop_event = Event()
         PlaybackService.__init__(self, ready_hook, error_hook, stopping_hook,
                                  alive_hook, started_hook, watchdog, bus,
-                                 disable_ocp, validate_source=False)
+                                 disable_ocp, validate_source=False, tts=tts)
         LOG.debug(f'Initialized tts={self._tts_hash} | '
                   f'fallback={self._fallback_tts_hash}')
         create_signal("neon_speak_api")   # Create signal so skills use API
         self._playback_timeout = 120
         self.daemon = daemonic
+        self.idle_config = self.config.get("tts", {}).get("idle") or dict()
+        if self.idle_config.get("unload_seconds") and not self.disable_reload:
+            Thread(target=self._idle_monitor, daemon=True,
+                   name="tts_idle_monitor").start()
+        self.queue_config = \
+            self.config.get("tts", {}).get("queue_monitor") or dict()
+        Thread(target=self._queue_monitor, daemon=True,
+               name="playback_queue_monitor").start()
+        # Configuration changes are applied once, by `_on_config_changed`
+        remove_config_watcher(self._maybe_reload_tts)
+        subscribe(self._on_config_changed)
+
+    def _on_config_changed(self, old_config: dict, new_config: dict):
+        """
+        Apply changed `tts` configuration to the running service.
+        :param old_config: previous configuration snapshot
+        :param new_config: new configuration snapshot
+        """
+        tts_config = new_config.get("tts") or dict()
+        if tts_config == (old_config.get("tts") or dict()):
+            return
+        self.idle_config = tts_config.get("idle") or dict()
+        self.queue_config = tts_config.get("queue_monitor") or dict()
+        if tts_config.get("routing") != \
+                (old_config.get("tts") or dict()).get("routing"):
+            self._rebuild_router()
+        self._maybe_reload_tts()
+
+    def _rebuild_router(self):
+        """
+        Replace the language/voice router after `tts.routing` changes.
+        Engines of the previous router are released once no longer in use.
+        """
+        old_router, self._router = self._router, None
+        self._attach_engines()
+        if old_router:
+            old_router.shutdown()
+
+    def _maybe_reload_tts(self):
+        if self._tts_unloaded:
+            # Configuration is read when the engine is re-warmed
+            return
+        self._load_tts()
+
+    def _load_tts(self):
+        """
+        Load the configured TTS engine if it is not loaded or its
+        configuration has changed.
+        """
+        config = get_config().get("tts", {})
+        if self.tts and not self.disable_reload and \
+                self._tts_config_changed(config):
+            # Keep speaking with the current engine while the new one loads
+            Thread(target=self._hot_reload_tts, args=(config,),
+                   daemon=True, name="tts_reload").start()
+            return
+        PlaybackService._maybe_reload_tts(self)
+        self._tts_module = config.get("module")
+        self._attach_engines()
+
+    @property
+    def tts_idle(self) -> bool:
+        """
+        True if the TTS engine has been unloaded while idle
+        """
+        return self._tts_unloaded
+
+    @contextmanager
+    def use_tts(self, trigger: str = "request"):
+        """
+        Context manager yielding the TTS engine, loading it first if it was
+        unloaded while idle. The engine is not unloaded while in use.
+        :param trigger: reason for loading an unloaded engine
+        """
+        with self._idle_lock:
+            self._tts_active += 1
+        tts = None
+        try:
+            self._ensure_tts(trigger)
+            # A replaced engine is retired once it is no longer in use
+            with self._idle_lock:
+                tts = self.tts
+                self._tts_users[id(tts)] = self._tts_users.get(id(tts), 0) + 1
+            yield tts
+        finally:
+            with self._idle_lock:
+                self._tts_active -= 1
+                self._tts_last_used = monotonic()
+                if tts is not None:
+                    self._tts_users[id(tts)] -= 1
+                    if not self._tts_users[id(tts)]:
+                        self._tts_users.pop(id(tts))
+                    self._tts_released.notify_all()
+
+    def _ensure_tts(self, trigger: str):
+        """
+        Load the TTS engine if it was unloaded while idle and report the
+        cold-start time.
+        :param trigger: reason for loading the engine
+        :returns: loaded TTS engine
+        """
+        if not self._tts_unloaded and self.tts is not None:
+            return self.tts
+        with self._reload_lock:
+            if self._tts_unloaded:
+                LOG.info(f"Loading idle TTS engine ({trigger})")
+                start = monotonic()
+                self._load_tts()
+                if self.tts is None:
+                    # Loading is retried on next use
+                    raise RuntimeError(f"Failed to load TTS engine "
+                                       f"({trigger})")
+                if self._encoded_cache is not None:
+                    self.tts.encoded_cache = self._encoded_cache
+                # Other requests use the engine once it is loaded
+                self._tts_unloaded = False
+                cold_start = monotonic() - start
+                LOG.info(f"TTS engine loaded in {cold_start:.2f}s")
+                self.bus.emit(Message("neon.metric",
+                                      {"name": "tts_cold_start",
+                                       "trigger": trigger,
+                                       "duration": cold_start}))
+        return self.tts
+
+    def _unload_tts(self):
+        """
+        Release the TTS engine until it is next used.
+        """
+        with self._reload_lock, self.lock:
+            with self._idle_lock:
+                if self._tts_active or not self.tts:
+                    return
+                tts, self.tts = self.tts, None
+                self._tts_unloaded = True
+                # Force a load of the current configuration on next use
+                self._tts_hash = None
+        LOG.info(f"Unloading idle TTS engine: {tts.tts_name}")
+        self._encoded_cache = getattr(tts, "encoded_cache", None)
+        if hasattr(tts, "save_stats"):
+            tts.save_stats()
+        self._retire_tts(tts)
+
+    def _idle_monitor(self):
+        """
+        Unload the TTS engine after it has not been used for
+        `tts.idle.unload_seconds`.
+        """
+        unload_seconds = self.idle_config["unload_seconds"]
+        while not self._stop_event.wait(min(unload_seconds / 2, 60)):
+            with self._idle_lock:
+                idle = not self._tts_active and \
+                    monotonic() - self._tts_last_used > unload_seconds
+            if idle and self.tts and not self.is_speaking:
+                try:
+                    self._unload_tts()
+                except Exception as e:
+                    LOG.exception(f"Failed to unload TTS engine: {e}")
+
+    def handle_rewarm(self, message):
+        """
+        Load an idle TTS engine in the background when speech is expected.
+        :param message: Message associated with a user interaction
+        """
+        if self._tts_unloaded:
+            Thread(target=self._ensure_tts, args=(message.msg_type,),
+                   daemon=True, name="tts_rewarm").start()
+
+    def execute_tts(self, utterance, ident, listen=False, message=None):
+        with self.use_tts(message.msg_type if message else "speak"):
+            PlaybackService.execute_tts(self, utterance, ident, listen,
+                                        message)
+
+    @property
+    def is_speaking(self) -> bool:
+        # Playback is shared by engines and continues while `tts` is unloaded
+        return TTS.playback is not None and \
+            TTS.playback._now_playing is not None
+
+    def handle_stop(self, message):
+        """
+        Handle a request to stop any speech.
+        :param message: Message associated with request
+        """
+        if self.is_speaking:
+            self._last_stop_signal = time()
+            TTS.playback.clear()
+            self.bus.emit(message.forward("mycroft.stop.handled",
+                                          {"by": "TTS"}))
+
+    def handle_b64_audio(self, message):
+        with self.use_tts(message.msg_type):
+            PlaybackService.handle_b64_audio(self, message)
+
+    def handle_get_languages_tts(self, message):
+        with self.use_tts(message.msg_type):
+            PlaybackService.handle_get_languages_tts(self, message)
+
+    def get_playback_status(self) -> dict:
+        """
+        Get the state of the playback queue and thread.
+        :returns: dict queue stats with `playing` seconds of the current
+            item, `paused`, `alive`, and `stalled`
+        """
+        status = TTS.queue.get_stats()
+        thread = self.playback_thread
+        play_started = getattr(thread, "play_started", None)
+        status["playing"] = monotonic() - play_started if play_started \
+            else 0.0
+        status["paused"] = getattr(thread, "paused", False)
+        status["alive"] = bool(thread and thread.is_alive())
+        stall_seconds = self.queue_config.get("stall_seconds", 120)
+        play_duration = getattr(thread, "play_duration", None)
+        # Audio with a known duration is stalled once it has played longer
+        # than expected
+        play_limit = stall_seconds if play_duration is None else \
+            play_duration + self.queue_config.get("deadline_margin_seconds",
+                                                  10)
+        # A queued item waiting with nothing playing means the thread is
+        # not consuming the queue
+        waiting = status["oldest_age"] if not play_started else 0.0
+        status["stalled"] = not status["alive"] or \
+            (not status["paused"] and
+             (status["playing"] > play_limit or waiting > stall_seconds))
+        return status
+
+    def get_playback_eta(self) -> Optional[float]:
+        """
+        Get the time until all queued audio has been played.
+        :returns: seconds until the queue is empty, or None if the duration
+            of any queued audio is unknown
+        """
+        queued = TTS.queue.get_stats()["queued_duration"]
+        thread = self.playback_thread
+        play_started = getattr(thread, "play_started", None)
+        if queued is None or getattr(thread, "paused", False):
+            return None
+        if not play_started:
+            return queued
+        if thread.play_duration is None:
+            return None
+        remaining = thread.play_duration - (monotonic() - play_started)
+        return queued + max(remaining, 0.0)
+
+    def _get_playback_deadline(self, message, speak_id: str) -> float:
+        """
+        Get the time to wait for a speak request to finish playback. The
+        deadline is the time to play all queued audio plus a margin, or
+        `_playback_timeout` if queued audio durations are unknown.
+        :param message: speak Message that has been queued
+        :param speak_id: identifier of the speak request
+        :returns: seconds to wait for playback to complete
+        """
+        eta = self.get_playback_eta()
+        if eta is None:
+            return self._playback_timeout
+        deadline = eta + self.queue_config.get("deadline_margin_seconds", 10)
+        if speak_id:
+            self.bus.emit(message.forward("neon.audio.playback_eta",
+                                          {"speak_ident": speak_id,
+                                           "eta": eta,
+                                           "expected_end": time() + eta}))
+        return deadline
+
+    def _queue_monitor(self):
+        """
+        Periodically report playback queue metrics, feed the watchdog while
+        playback is healthy, and recover a stalled playback thread.
+        """
+        interval = self.queue_config.get("interval_seconds", 5)
+        while not self._stop_event.wait(interval):
+            try:
+                status = self.get_playback_status()
+                if status["depth"] or self._last_queue_depth:
+                    self.bus.emit(Message("neon.metric",
+                                          {"name": "playback_queue",
+                                           **status}))
+                self._last_queue_depth = status["depth"]
+                if status["stalled"]:
+                    LOG.error(f"Playback stalled: {status}")
+                    self.bus.emit(Message("neon.metric",
+                                          {"name": "playback_stall",
+                                           **status}))
+                    self._recover_playback(status)
+                else:
+                    self._watchdog()
+            except Exception as e:
+                LOG.exception(f"Playback queue monitor error: {e}")
+
+    def _recover_playback(self, status: dict):
+        """
+        Recover from a playback stall by stopping a stuck player process, or
+        replacing a playback thread that has exited. Queued audio is kept.
+        :param status: playback status reporting a stall
+        """
+        thread = self.playback_thread
+        if status["alive"]:
+            if isinstance(thread, PlaybackProcessThread):
+                thread.restart_process()
+            elif getattr(thread, "p", None):
+                LOG.warning("Terminating stalled audio player")
+                try:
+                    thread.p.terminate()
+                except Exception as e:
+                    LOG.error(e)
+            return
+        from neon_audio.tts.neon import NeonPlaybackThread
+        LOG.warning("Restarting playback thread")
+        if isinstance(thread, PlaybackProcessThread):
+            thread.stop_process()
+            new_thread = PlaybackProcessThread(TTS.queue, self.bus)
+        else:
+            new_thread = NeonPlaybackThread(TTS.queue, self.bus)
+        new_thread.enclosure = getattr(thread, "enclosure", None)
+        new_thread.start()
+        self.playback_thread = new_thread
+        TTS.playback = new_thread
+
+    def handle_playback_status(self, message):
+        """
+        Handle a request for playback queue status
+        :param message: Message associated with request
+        """
+        self.bus.emit(message.response(self.get_playback_status()))
+
+    def _tts_config_changed(self, config: dict) -> bool:
+        """
+        Check if the configured TTS module or its configuration differs from
+        the loaded engine.
+        :param config: `tts` configuration
+        :returns: True if the engine should be reloaded
+        """
+        module = config.get("module", "")
+        tts_hash = hash(json.dumps(config.get(module, {}), sort_keys=True))
+        return module != self._tts_module or tts_hash != self._tts_hash
+
+    def _hot_reload_tts(self, config: dict):
+        """
+        Build a new TTS engine in the background and swap it in once loaded.
+        In-flight requests complete on the previous engine; the playback
+        thread, queue, and in-memory caches are kept.
+        :param config: `tts` configuration to load
+        """
+        old_tts = None
+        with self._reload_lock:
+            if not self._tts_config_changed(config):
+                return
+            module = config.get("module", "")
+            LOG.info(f"Loading TTS engine in the background: {module}")
+            start = time()
+            try:
+                if hasattr(self.tts, "save_stats"):
+                    self.tts.save_stats()
+                tts = TTSFactory.create(config)
+                tts.init(self.bus, self.playback_thread)
+            except Exception as e:
+                LOG.exception(f"Failed to load {module}; keeping "
+                              f"{self.tts.tts_name}: {e}")
+                return
+            if getattr(self.tts, "encoded_cache", None):
+                tts.encoded_cache = self.tts.encoded_cache
+            with self.lock, self._idle_lock:
+                old_tts, self.tts = self.tts, tts
+                self._tts_hash = hash(json.dumps(config.get(module, {}),
+                                                 sort_keys=True))
+                self._tts_module = module
+            if hasattr(self.playback_thread, "attach_tts"):
+                self.playback_thread.attach_tts(tts)
+            LOG.info(f"Swapped TTS engine to {tts.tts_name} in "
+                     f"{time() - start:.2f}s")
+            self._attach_engines()
+            self.bus.emit(Message("neon.audio.tts_reloaded",
+                                  {"module": module,
+                                   "seconds": time() - start}))
+        # Requests in progress finish on the engine they started with
+        with self._tts_released:
+            self._tts_released.wait_for(
+                lambda: id(old_tts) not in self._tts_users)
+        self._retire_tts(old_tts)
+
+    def _load_routed_tts(self, module: str):
+        """
+        Load an engine for a module in the `tts.routing` configuration.
+        :param module: TTS module to load
+        :returns: initialized TTS engine
+        """
+        config = get_config().get("tts", {})
+        tts = TTSFactory.create({"tts": {"module": module,
+                                         module: config.get(module, {})}})
+        if not tts:
+            raise RuntimeError(f"Could not load TTS module: {module}")
+        tts.init(self.bus, self.playback_thread)
+        return tts
+
+    @staticmethod
+    def _retire_tts(tts):
+        """
+        Release a replaced TTS engine without stopping shared playback.
+        :param tts: engine that has been replaced
+        """
+        try:
+            tts.retire()
+        except Exception as e:
+            LOG.error(f"Error shutting down {tts}: {e}")
+
+    def _attach_engines(self):
+        """
+        Attach the fallback engine and language/voice router to the current
+        TTS engine.
+        """
+        if not self.tts:
+            return
+        routing_config = get_config().get("tts", {}).get("routing") or dict()
+        if self._router is None and routing_config.get("routes"):
+            self._router = EngineRouter(routing_config,
+                                        self._load_routed_tts,
+                                        self._retire_tts)
+        self.tts.router = self._router
+        if getattr(self, "disable_fallback", False):
+            return
+        # Fallback is used to hedge slow requests and while the primary
+        # engine's circuit breaker is open
+        if getattr(self.tts, "hedge_config", {}).get("enabled"):
+            fallback = self._get_tts_fallback()
+        else:
+            fallback = self.fallback_tts
+        if fallback and fallback is not self.tts:
+            LOG.info(f"Using fallback engine: {fallback}")
+            self.tts.fallback_engine = fallback
 
     def handle_speak(self, message):
         LOG.debug(f"Handling speak message: {message.data}")
@@ -134,10 +602,12 @@ class NeonPlaybackService(PlaybackService):
         else:
             audio_finished.set()
 
-        PlaybackService.handle_speak(self, message)
-        if not audio_finished.wait(self._playback_timeout):
+        with get_tracer().span("handle_speak", message):
+            PlaybackService.handle_speak(self, message)
+        timeout = self._get_playback_deadline(message, speak_id)
+        if not audio_finished.wait(timeout):
             LOG.warning(f"Playback not completed for {speak_id} within "
-                        f"{self._playback_timeout} seconds")
+                        f"{timeout:.1f} seconds")
             self.bus.remove(speak_id, handle_finished)
         elif speak_id:
             LOG.debug(f"Playback completed for: {speak_id}")
@@ -163,8 +633,9 @@ class NeonPlaybackService(PlaybackService):
                     ident, data={"error": f"text is not a str: {text}"}))
                 return
             try:
-                with stopwatch:
-                    responses = self.tts.get_multiple_tts(message)
+                with stopwatch, get_tracer().span("handle_get_tts", message), \
+                        self.use_tts(message.msg_type) as tts:
+                    responses = tts.get_multiple_tts(message)
                 message.context['timing']['get_tts'] = stopwatch.time
                 LOG.debug(f"Emitting response: {responses}")
                 message.context['timing']['response_sent'] = time()
@@ -178,7 +649,87 @@ class NeonPlaybackService(PlaybackService):
             self.bus.emit(message.reply(ident,
                                         data={"error": "No text provided."}))
 
+    def handle_get_tts_batch(self, message):
+        """
+        Handle a request to get TTS for a list of strings. Each unique
+        request is synthesized once; results are emitted per-item as they
+        complete, followed by a summary response.
+        :param message: Message associated with request
+        """
+        items = message.data.get("items")
+        ident = message.context.get("ident") or \
+            "neon.get_tts.batch.response"
+        LOG.info(f"Handling batch TTS request: {ident}")
+        message.context.setdefault('timing', dict())
+        if not items or not isinstance(items, list):
+            message.context['timing']['response_sent'] = time()
+            self.bus.emit(message.reply(ident,
+                                        data={"error": "No items provided."}))
+            return
+
+        # Group item indices by unique request so duplicates are synthesized
+        # once and resolved together
+        requests = dict()
+        errors = dict()
+        for idx, item in enumerate(items):
+            if isinstance(item, str):
+                item = {"text": item}
+            if not isinstance(item, dict) or \
+                    not isinstance(item.get("text"), str) or \
+                    not item["text"].strip():
+                errors[idx] = f"Invalid item: {item}"
+                continue
+            data = {"text": item["text"],
+                    "speaker": item.get("speaker") or
+                    message.data.get("speaker"),
+                    "lang": item.get("lang") or message.data.get("lang")}
+            key = json.dumps(data, sort_keys=True)
+            requests.setdefault(key, (data, list()))[1].append(idx)
+
+        def _emit_item(idx, data):
+            item = items[idx]
+            data = {"index": idx,
+                    "id": item.get("id") if isinstance(item, dict) else None,
+                    **data}
+            self.bus.emit(message.reply("neon.get_tts.batch.item", data=data))
+
+        for idx, error in errors.items():
+            _emit_item(idx, {"error": error})
+
+        stopwatch = Stopwatch("api_get_tts_batch", allow_reporting=True,
+                              bus=self.bus)
+        with stopwatch, get_tracer().span("handle_get_tts_batch", message), \
+                self.use_tts(message.msg_type) as tts:
+            for data, indices in requests.values():
+                try:
+                    responses = tts.get_multiple_tts(
+                        message.forward("neon.get_tts", data))
+                    result = {"responses": responses}
+                except Exception as e:
+                    LOG.exception(e)
+                    result = {"error": repr(e)}
+                    errors.update({idx: repr(e) for idx in indices})
+                for idx in indices:
+                    _emit_item(idx, result)
+        message.context['timing']['get_tts'] = stopwatch.time
+        message.context['timing']['response_sent'] = time()
+        self.bus.emit(message.reply(ident, data={
+            "total": len(items), "unique": len(requests),
+            "succeeded": len(items) - len(errors), "failed": len(errors)}))
+
+    def shutdown(self):
+        self._stop_event.set()
+        unsubscribe(self._on_config_changed)
+        PlaybackService.shutdown(self)
+        if self._router:
+            self._router.shutdown()
+        get_tracer().flush()
+
     def init_messagebus(self):
         self.bus.on('neon.get_tts', self.handle_get_tts)
+        self.bus.on('neon.get_tts.batch', self.handle_get_tts_batch)
+        self.bus.on('recognizer_loop:wakeword', self.handle_rewarm)
+        self.bus.on('neon.audio.playback_status', self.handle_playback_status)
         PlaybackService.init_messagebus(self)
+        watch_config(self.bus)
         LOG.info("Initialized messagebus")
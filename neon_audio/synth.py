@@ -0,0 +1,211 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import json
+import os
+import shutil
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os.path import join, isfile, splitext
+from time import monotonic
+from typing import Callable, List, Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+MANIFEST_FILENAME = "manifest.jsonl"
+
+_engine = None
+
+
+def get_item_id(item: dict) -> str:
+    """
+    Get a stable ID for a bulk synthesis item so repeated runs resolve
+    the same output file.
+    :param item: dict item with `text` and optional voice parameters
+    :returns: `id` of the item if specified, else a hash of its parameters
+    """
+    if item.get("id"):
+        return str(item["id"])
+    key = json.dumps({k: item.get(k) for k in
+                      ("text", "lang", "gender", "voice", "speaker")},
+                     sort_keys=True)
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def load_items(input_file: str) -> List[dict]:
+    """
+    Load bulk synthesis items from a JSONL file. Each line is either a JSON
+    string or an object with `text` and optional `id`, `lang`, `gender`,
+    `voice`, and `speaker`.
+    :param input_file: path to JSONL file
+    :returns: list of item dicts with `id` populated
+    """
+    items = list()
+    with open(input_file, encoding="utf-8") as f:
+        for line_num, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"text": item}
+            if not isinstance(item, dict) or not item.get("text"):
+                raise ValueError(f"Invalid item on line {line_num}: {line}")
+            item["id"] = get_item_id(item)
+            items.append(item)
+    return items
+
+
+def read_manifest(output_dir: str) -> dict:
+    """
+    Read completed items from an output directory manifest, ignoring any
+    entries whose audio is missing.
+    :param output_dir: directory containing `manifest.jsonl`
+    :returns: dict of item ID to manifest entry
+    """
+    manifest_file = join(output_dir, MANIFEST_FILENAME)
+    completed = dict()
+    if not isfile(manifest_file):
+        return completed
+    with open(manifest_file, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial line from an interrupted run
+                continue
+            if isfile(join(output_dir, entry.get("file") or "")):
+                completed[entry["id"]] = entry
+    return completed
+
+
+def _init_worker(engine=None):
+    """
+    Create the TTS engine used by this worker process.
+    """
+    global _engine
+    if engine is None:
+        from neon_audio.tts import TTSFactory
+        engine = TTSFactory.create()
+        if not engine:
+            raise RuntimeError("Failed to load configured TTS engine")
+    _engine = engine
+
+
+def _synthesize_item(item: dict, output_dir: str) -> dict:
+    """
+    Synthesize one item with this worker's engine and copy the audio to
+    `output_dir`.
+    :returns: manifest entry for the item
+    """
+    lang = item.get("lang") or _engine.lang
+    speaker = {"language": lang,
+               "gender": item.get("gender") or "female",
+               "voice": item.get("voice"),
+               **(item.get("speaker") or dict())}
+    message = Message("neon.synth", {"text": item["text"], "lang": lang,
+                                     "speaker": speaker},
+                      {"source": "neon_audio.synth"})
+    responses = _engine.get_multiple_tts(message)
+    response = responses.get(speaker["language"]) or \
+        list(responses.values())[0]
+    gender = response["genders"][0]
+    wav_file = response[gender]
+    filename = f"{item['id']}{splitext(wav_file)[1]}"
+    shutil.copyfile(wav_file, join(output_dir, filename))
+    return {"id": item["id"], "text": item["text"],
+            "sentence": response["sentence"], "lang": speaker["language"],
+            "gender": gender, "file": filename}
+
+
+def run_bulk_synthesis(input_file: str, output_dir: str, workers: int = 1,
+                       on_progress: Optional[Callable] = None,
+                       engine=None) -> dict:
+    """
+    Synthesize every item in `input_file` into `output_dir`, appending each
+    completed item to the output manifest. Items already in the manifest are
+    skipped, so an interrupted run may be resumed, and repeated items are
+    only synthesized once.
+    :param input_file: JSONL file of items to synthesize
+    :param output_dir: directory to write audio and manifest to
+    :param workers: number of worker processes, each with its own engine
+    :param on_progress: callback(completed, total, rate, eta) after each item
+    :param engine: optional initialized engine to use (single worker only)
+    :returns: dict summary of the run
+    """
+    items = load_items(input_file)
+    os.makedirs(output_dir, exist_ok=True)
+    completed = read_manifest(output_dir)
+    unique = {i["id"]: i for i in items}
+    pending = [i for item_id, i in unique.items() if item_id not in completed]
+    summary = {"total": len(items), "cached": len(unique) - len(pending),
+               "duplicates": len(items) - len(unique),
+               "completed": 0, "failed": 0, "errors": dict()}
+    if not pending:
+        return summary
+
+    start = monotonic()
+
+    def _report(entry: Optional[dict], item: dict, error=None):
+        if error:
+            LOG.error(f"Failed to synthesize {item['id']}: {error}")
+            summary["failed"] += 1
+            summary["errors"][item["id"]] = repr(error)
+        else:
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            summary["completed"] += 1
+        done = summary["completed"] + summary["failed"]
+        rate = done / max(monotonic() - start, 1e-6)
+        eta = (len(pending) - done) / rate
+        if on_progress:
+            on_progress(done, len(pending), rate, eta)
+
+    with open(join(output_dir, MANIFEST_FILENAME), "a",
+              encoding="utf-8") as manifest:
+        if workers <= 1:
+            _init_worker(engine)
+            for item in pending:
+                try:
+                    _report(_synthesize_item(item, output_dir), item)
+                except Exception as e:
+                    _report(None, item, e)
+        else:
+            with ProcessPoolExecutor(workers,
+                                     initializer=_init_worker) as executor:
+                futures = {executor.submit(_synthesize_item, item,
+                                           output_dir): item
+                           for item in pending}
+                for future in as_completed(futures):
+                    try:
+                        _report(future.result(), futures[future])
+                    except Exception as e:
+                        _report(None, futures[future], e)
+    summary["seconds"] = round(monotonic() - start, 3)
+    return summary
@@ -0,0 +1,222 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os.path import join
+from threading import Lock, current_thread
+from time import monotonic_ns, time
+from typing import List, Optional
+from uuid import uuid4
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("neon_audio_span",
+                                                         default=None)
+
+
+class Span:
+    """
+    A timed operation within a trace, measured with a monotonic clock.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns",
+                 "end_ns", "thread_id", "attributes")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str = None,
+                 start_ns: int = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = start_ns or monotonic_ns()
+        self.end_ns = None
+        self.thread_id = current_thread().native_id
+        self.attributes = attributes or dict()
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Span duration in seconds, or None if the span has not ended
+        """
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def to_event(self, pid: int) -> dict:
+        """
+        Get a Trace Event Format "complete" event for this span
+        :param pid: process ID to associate with the event
+        :returns: dict event loadable by Chrome/Perfetto trace viewers
+        """
+        end_ns = self.end_ns or monotonic_ns()
+        return {"name": self.name, "cat": "neon_audio", "ph": "X",
+                "ts": self.start_ns / 1000,
+                "dur": (end_ns - self.start_ns) / 1000,
+                "pid": pid, "tid": self.thread_id,
+                "args": {"trace_id": self.trace_id, "span_id": self.span_id,
+                         "parent_id": self.parent_id, **self.attributes}}
+
+
+class Tracer:
+    def __init__(self, config: dict = None):
+        """
+        Create a Tracer that exports spans to rotating local JSON files
+        :param config: `tts.tracing` configuration
+        """
+        from ovos_config.locations import get_xdg_cache_save_path
+        config = config or dict()
+        self.enabled = config.get("enabled", False)
+        self.path = os.path.expanduser(
+            config.get("path") or join(get_xdg_cache_save_path(), "traces"))
+        self.max_events = config.get("max_events_per_file", 1000)
+        self.max_files = config.get("max_files", 10)
+        self._events: List[dict] = list()
+        self._lock = Lock()
+
+    @staticmethod
+    def _get_trace_context(message: Optional[Message]) -> dict:
+        """
+        Get (and initialize) the trace context of a Message
+        """
+        if message is None:
+            return {"trace_id": uuid4().hex}
+        trace = message.context.setdefault("trace", dict())
+        if not trace.get("trace_id"):
+            trace["trace_id"] = str(
+                message.context.get("speak_ident") or
+                message.context.get("ident") or
+                message.context.get("session", {}).get("session_id") or
+                uuid4().hex)
+        return trace
+
+    @contextmanager
+    def span(self, name: str, message: Message = None, **attributes):
+        """
+        Context manager to trace an operation. Spans opened in the same
+        context are children of this span; otherwise the parent is read from
+        the `trace` context of `message`.
+        :param name: name of the operation being traced
+        :param message: Message associated with the operation
+        :param attributes: additional data to include with the span
+        """
+        if not self.enabled:
+            yield None
+            return
+        parent = _current_span.get()
+        trace = self._get_trace_context(message)
+        span = Span(name, parent.trace_id if parent else trace["trace_id"],
+                    parent.span_id if parent else trace.get("parent_id"),
+                    attributes=attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+            span.end_ns = monotonic_ns()
+            self._export(span)
+
+    def inject(self, message: Message):
+        """
+        Record the current span and time in the `trace` context of `message`
+        so work continued in another thread (i.e. playback) is linked to it
+        :param message: Message being handed off
+        """
+        if not self.enabled:
+            return
+        trace = self._get_trace_context(message)
+        span = _current_span.get()
+        if span:
+            trace["parent_id"] = span.span_id
+        # Each queued item of the message gets its own queue wait
+        trace.setdefault("queued_ns", list()).append(monotonic_ns())
+
+    def record_queue_wait(self, message: Message):
+        """
+        Record time since the earliest unrecorded `inject` call for `message`
+        as a span, so each dequeued item of a message is recorded once
+        :param message: Message associated with a dequeued item
+        """
+        if not self.enabled:
+            return
+        trace = self._get_trace_context(message)
+        if not trace.get("queued_ns"):
+            return
+        span = Span("queue_wait", trace["trace_id"], trace.get("parent_id"),
+                    start_ns=trace["queued_ns"].pop(0))
+        span.end_ns = monotonic_ns()
+        self._export(span)
+
+    def _export(self, span: Span):
+        with self._lock:
+            self._events.append(span.to_event(os.getpid()))
+            if len(self._events) >= self.max_events:
+                self._write()
+
+    def flush(self):
+        """
+        Write any buffered spans to a trace file
+        """
+        with self._lock:
+            self._write()
+
+    def _write(self):
+        if not self._events:
+            return
+        events, self._events = self._events, list()
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            trace_file = join(self.path, f"trace_{time():.6f}.json")
+            with open(trace_file, 'w') as f:
+                json.dump({"traceEvents": events,
+                           "displayTimeUnit": "ms"}, f)
+            LOG.debug(f"Wrote {len(events)} spans to {trace_file}")
+            trace_files = sorted(f for f in os.listdir(self.path)
+                                 if f.startswith("trace_") and
+                                 f.endswith(".json"))
+            for old_file in trace_files[:-self.max_files]:
+                os.remove(join(self.path, old_file))
+        except OSError as e:
+            LOG.error(f"Failed to write trace file: {e}")
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the shared Tracer, initialized from `tts.tracing` configuration
+    """
+    global _tracer
+    if _tracer is None:
+        from neon_audio.config import get_config
+        _tracer = Tracer(get_config().get("tts", {}).get("tracing"))
+    return _tracer
@@ -27,11 +27,14 @@
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
+from copy import deepcopy
+
 from ovos_plugin_manager.tts import OVOSTTSFactory, get_tts_config
 from ovos_plugin_manager.templates.tts import TTSValidator
 from ovos_utils.log import LOG
-from ovos_config import Configuration
+from neon_audio.config import get_config
 from neon_audio.tts.neon import TTS, WrappedTTS
+from neon_audio.tts.plugins import load_tts_class
 
 
 class TTSFactory(OVOSTTSFactory):
@@ -47,13 +50,14 @@ class TTSFactory(OVOSTTSFactory):
             "module": <engine_name>
         }
         """
-        config = config or Configuration()
+        config = deepcopy(config or get_config())
         config["lang"] = config.get("language",
                                     {}).get("user") or config.get("lang",
                                                                   "en-us")
 
         tts_config = get_tts_config(config)
-        clazz = OVOSTTSFactory.get_class(tts_config)
+        clazz = load_tts_class(tts_config.get("module") or
+                               "ovos-tts-plugin-dummy")
         if not clazz:
             LOG.error(f"Could not find plugin: {tts_config.get('module')}")
             return
@@ -0,0 +1,234 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import itertools
+import json
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from heapq import heapify, heappop, heappush
+from os.path import join
+from threading import Lock
+from time import time
+from typing import Dict, List, Optional
+
+from ovos_utils.log import LOG
+
+_PHRASE_STATS_FILE = "tts_phrase_stats.json"
+
+_synth_record: ContextVar[Optional[dict]] = ContextVar("synth_record",
+                                                       default=None)
+
+
+@contextmanager
+def track_synthesis():
+    """
+    Context manager yielding a dict whose `miss` value is set if the engine
+    synthesized audio (rather than reading it from cache) within the context.
+    """
+    record = {"miss": False}
+    token = _synth_record.set(record)
+    try:
+        yield record
+    finally:
+        _synth_record.reset(token)
+
+
+def mark_cache_miss():
+    """
+    Mark the synthesis tracked by `track_synthesis` as a cache miss
+    """
+    record = _synth_record.get()
+    if record is not None:
+        record["miss"] = True
+
+
+class PhraseStats:
+    def __init__(self, cache_dir: str, capacity: int = 500,
+                 save_interval: float = 60):
+        """
+        Bounded top-K (Space-Saving) counts of synthesized sentences per
+        language and voice, with synthesis time and cache hits for each, and
+        translation cache hit and skipped translation counts. Counts are
+        periodically persisted to `cache_dir` so they are available to the
+        CLI.
+        :param cache_dir: neon cache directory to save counts in
+        :param capacity: maximum number of phrases tracked
+        :param save_interval: minimum seconds between automatic saves
+        """
+        self.path = path = join(cache_dir, _PHRASE_STATS_FILE)
+        self.capacity = capacity
+        self.save_interval = save_interval
+        self.phrases = dict()
+        # Min-heap of (count, seq, key); entries whose count is out of date
+        # are skipped when evicting
+        self._heap = list()
+        self._seq = itertools.count()
+        self.translations = {"hits": 0, "misses": 0, "skipped": 0}
+        self._last_save = time()
+        self._lock = Lock()
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            for phrase in saved.get("phrases", []):
+                key = (phrase["lang"], phrase["gender"], phrase["voice"],
+                       phrase["text"])
+                self.phrases[key] = {k: phrase[k] for k in
+                                     ("count", "error", "synth_seconds",
+                                      "hits", "misses")}
+            self.translations.update(saved.get("translations") or dict())
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            LOG.warning(f"Failed to load phrase stats from {path}: {e}")
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(entry["count"], next(self._seq), key)
+                      for key, entry in self.phrases.items()]
+        heapify(self._heap)
+
+    def _pop_least_frequent(self) -> tuple:
+        """
+        Remove the least frequent phrase in O(log K)
+        :returns: key and entry of the removed phrase
+        """
+        while True:
+            phrase_count, _, key = heappop(self._heap)
+            entry = self.phrases.get(key)
+            if entry is not None and entry["count"] == phrase_count:
+                return key, self.phrases.pop(key)
+
+    def record(self, text: str, lang: str, gender: str, voice: Optional[str],
+               synth_seconds: float, cache_hit: bool):
+        """
+        Record a synthesis request
+        :param text: canonical sentence synthesized
+        :param lang: language synthesized
+        :param gender: requested gender
+        :param voice: requested voice
+        :param synth_seconds: time spent getting audio
+        :param cache_hit: True if audio was read from the cache
+        """
+        key = (lang, gender, voice, text)
+        with self._lock:
+            entry = self.phrases.get(key)
+            if entry is None:
+                count = error = 0
+                if len(self.phrases) >= self.capacity:
+                    # Replace the least frequent phrase; its count is an
+                    # upper bound on the new phrase's earlier occurrences
+                    _, evicted = self._pop_least_frequent()
+                    count = error = evicted["count"]
+                entry = self.phrases[key] = {"count": count, "error": error,
+                                             "synth_seconds": 0.0,
+                                             "hits": 0, "misses": 0}
+            entry["count"] += 1
+            entry["synth_seconds"] += synth_seconds
+            entry["hits" if cache_hit else "misses"] += 1
+            heappush(self._heap, (entry["count"], next(self._seq), key))
+            if len(self._heap) > 2 * max(self.capacity, len(self.phrases)):
+                # Drop out of date entries
+                self._rebuild_heap()
+        self._maybe_save()
+
+    def record_translation(self, cache_hit: bool):
+        with self._lock:
+            self.translations["hits" if cache_hit else "misses"] += 1
+        self._maybe_save()
+
+    def record_skipped_translation(self):
+        with self._lock:
+            self.translations["skipped"] += 1
+        self._maybe_save()
+
+    def top(self, limit: int = None) -> List[dict]:
+        """
+        Get tracked phrases, most frequent first
+        :param limit: maximum number of phrases to return
+        :returns: list of dict text, lang, gender, voice, count, error,
+            synth_seconds, hits, and misses
+        """
+        with self._lock:
+            phrases = [{"text": text, "lang": lang, "gender": gender,
+                        "voice": voice, **entry}
+                       for (lang, gender, voice, text), entry
+                       in self.phrases.items()]
+        phrases.sort(key=lambda p: p["count"], reverse=True)
+        return phrases[:limit] if limit else phrases
+
+    def _maybe_save(self):
+        if time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        phrases = self.top()
+        with self._lock:
+            self._last_save = time()
+            try:
+                with open(self.path, 'w') as f:
+                    json.dump({"phrases": phrases,
+                               "translations": self.translations}, f)
+            except OSError as e:
+                LOG.warning(f"Failed to save phrase stats: {e}")
+
+
+_phrase_stats: Dict[str, PhraseStats] = dict()
+_phrase_stats_lock = Lock()
+
+
+def get_shared_phrase_stats(cache_dir: str,
+                            capacity: int = 500) -> PhraseStats:
+    """
+    Get the PhraseStats object shared by all engines in this process using
+    `cache_dir`, so phrases of routed engines are not overwritten when each
+    engine saves its own.
+    :param cache_dir: neon cache directory to save counts in
+    :param capacity: maximum number of phrases tracked, if not yet created
+    :returns: PhraseStats for `cache_dir`
+    """
+    with _phrase_stats_lock:
+        if cache_dir not in _phrase_stats:
+            _phrase_stats[cache_dir] = PhraseStats(cache_dir, capacity)
+        return _phrase_stats[cache_dir]
+
+
+def get_warmup_phrases(cache_dir: str, limit: int = 100,
+                       min_count: int = 2) -> List[dict]:
+    """
+    Get the most frequent phrases as bulk synthesis items for warming a
+    cache (i.e. with `neon-audio synth`).
+    :param cache_dir: neon cache directory containing phrase stats
+    :param limit: maximum number of phrases
+    :param min_count: minimum number of requests for a phrase
+    :returns: list of dict text, lang, gender, and voice
+    """
+    phrases = PhraseStats(cache_dir).top(limit)
+    return [{"text": p["text"], "lang": p["lang"], "gender": p["gender"],
+             "voice": p["voice"]}
+            for p in phrases if p["count"] >= min_count]
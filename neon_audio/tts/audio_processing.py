@@ -0,0 +1,280 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import wave
+
+from functools import lru_cache, wraps
+from threading import get_ident
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ovos_utils.log import LOG
+
+_SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+_RESAMPLE_BLOCK = 4096
+
+
+def read_wav(path: str) -> Tuple[np.ndarray, int]:
+    """
+    Read a PCM WAV file into a float32 array
+    :param path: path to a PCM WAV file
+    :returns: array of shape (frames, channels) in the range [-1, 1], rate
+    """
+    with wave.open(path, 'rb') as f:
+        rate = f.getframerate()
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        raw = f.readframes(f.getnframes())
+    if width not in _SAMPLE_DTYPES:
+        raise ValueError(f"Unsupported sample width: {width}")
+    samples = np.frombuffer(raw, dtype=_SAMPLE_DTYPES[width])
+    samples = samples.reshape(-1, channels).astype(np.float32)
+    if width == 1:
+        samples = (samples - 128.0) / 128.0
+    else:
+        samples /= float(2 ** (8 * width - 1))
+    return samples, rate
+
+
+def get_audio_duration(path: str) -> Optional[float]:
+    """
+    Get the duration of an audio file from its header. Results are cached
+    until the file is modified.
+    :param path: path to an audio file
+    :returns: duration in seconds, or None if it cannot be determined
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return _get_audio_duration(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _get_audio_duration(path: str, mtime_ns: int,
+                        size: int) -> Optional[float]:
+    try:
+        with wave.open(path, 'rb') as f:
+            return f.getnframes() / f.getframerate()
+    except (wave.Error, EOFError, OSError):
+        # Only WAV headers are parsed
+        return None
+
+
+def write_wav(path: str, samples: np.ndarray, rate: int):
+    """
+    Write a float array to a 16-bit PCM WAV file
+    :param path: path to write
+    :param samples: array of shape (frames, channels) in the range [-1, 1]
+    :param rate: sample rate of `samples`
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype(np.int16)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(pcm.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def _replace_wav(path: str, samples: np.ndarray, rate: int):
+    """
+    Write audio to a temporary file in the same directory as `path`, then
+    move it into place so a partially written file is never read.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{get_ident()}.tmp"
+    try:
+        write_wav(tmp_path, samples, rate)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def trim_silence(samples: np.ndarray, rate: int, threshold_db: float = -50.0,
+                 frame_ms: float = 10.0, pad_ms: float = 50.0) -> np.ndarray:
+    """
+    Remove leading and trailing audio with energy below `threshold_db`
+    :param samples: array of shape (frames, channels)
+    :param rate: sample rate of `samples`
+    :param threshold_db: RMS level in dBFS below which a frame is silent
+    :param frame_ms: analysis window length in milliseconds
+    :param pad_ms: audio to keep on either side of detected speech
+    :returns: trimmed view of `samples`
+    """
+    frame_len = max(int(rate * frame_ms / 1000), 1)
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return samples
+    mono = samples[:n_frames * frame_len].mean(axis=1)
+    rms = np.sqrt(np.mean(mono.reshape(n_frames, frame_len) ** 2, axis=1))
+    voiced = np.flatnonzero(rms > 10 ** (threshold_db / 20))
+    if voiced.size == 0:
+        LOG.debug("No audio above silence threshold; not trimming")
+        return samples
+    pad = int(rate * pad_ms / 1000)
+    start = max(voiced[0] * frame_len - pad, 0)
+    end = min((voiced[-1] + 1) * frame_len + pad, len(samples))
+    return samples[start:end]
+
+
+def normalize_loudness(samples: np.ndarray, target_db: float = -20.0,
+                       peak_db: float = -1.0) -> np.ndarray:
+    """
+    Scale audio to a target RMS level without exceeding a peak level
+    :param samples: array of shape (frames, channels)
+    :param target_db: target RMS level in dBFS
+    :param peak_db: maximum allowed sample peak in dBFS
+    :returns: scaled copy of `samples`
+    """
+    rms = np.sqrt(np.mean(samples ** 2))
+    peak = np.max(np.abs(samples)) if samples.size else 0.0
+    if rms == 0 or peak == 0:
+        return samples
+    gain = min(10 ** (target_db / 20) / rms, 10 ** (peak_db / 20) / peak)
+    return samples * gain
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int,
+             zero_crossings: int = 16) -> np.ndarray:
+    """
+    Resample audio to `target_rate` with a polyphase Hann-windowed sinc
+    filter. When downsampling, the filter cutoff is the new Nyquist
+    frequency, so higher frequencies are attenuated instead of aliased.
+    :param samples: array of shape (frames, channels)
+    :param rate: sample rate of `samples`
+    :param target_rate: desired output sample rate
+    :param zero_crossings: filter half-width in zero crossings of the sinc
+    :returns: resampled array of shape (frames, channels)
+    """
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    n_out = int(round(len(samples) * target_rate / rate))
+    gcd = np.gcd(rate, target_rate)
+    up, down = target_rate // gcd, rate // gcd
+    cutoff = min(1.0, target_rate / rate)
+    half_width = int(np.ceil(zero_crossings / cutoff))
+    taps = np.arange(1 - half_width, half_width + 1)
+    # Output samples fall `phase / up` of a frame after an input frame
+    offset = np.arange(up)[:, np.newaxis] / up - taps
+    kernels = cutoff * np.sinc(cutoff * offset) * \
+        (0.5 + 0.5 * np.cos(np.pi * offset / half_width))
+    padded = np.pad(samples.astype(np.float64),
+                    ((half_width, half_width), (0, 0)))
+    resampled = np.empty((n_out, samples.shape[1]), dtype=np.float32)
+    for start in range(0, n_out, _RESAMPLE_BLOCK):
+        end = min(start + _RESAMPLE_BLOCK, n_out)
+        frame, phase = np.divmod(np.arange(start, end) * down, up)
+        frames = frame[:, np.newaxis] + taps + half_width
+        resampled[start:end] = np.einsum("ft,ftc->fc", kernels[phase],
+                                         padded[frames])
+    return resampled
+
+
+def concatenate_wav_files(paths: List[str], out_path: str,
+                          crossfade_ms: float = 20.0):
+    """
+    Join WAV files into one file, crossfading each file into the next.
+    Audio is resampled to the rate of the first file, and mixed to mono if
+    files have different numbers of channels.
+    :param paths: paths of WAV files to join, in order
+    :param out_path: path to write joined audio to
+    :param crossfade_ms: duration of overlap between files
+    """
+    clips = [read_wav(path) for path in paths]
+    rate = clips[0][1]
+    clips = [resample(samples, clip_rate, rate)
+             for samples, clip_rate in clips]
+    if len({clip.shape[1] for clip in clips}) > 1:
+        clips = [clip.mean(axis=1, keepdims=True) for clip in clips]
+    fade = int(rate * crossfade_ms / 1000)
+    joined = clips[0]
+    for clip in clips[1:]:
+        overlap = min(fade, len(joined), len(clip))
+        if overlap:
+            ramp = np.linspace(0.0, 1.0, overlap,
+                               dtype=np.float32)[:, np.newaxis]
+            mixed = joined[-overlap:] * (1.0 - ramp) + clip[:overlap] * ramp
+            joined = np.concatenate([joined[:-overlap], mixed,
+                                     clip[overlap:]])
+        else:
+            joined = np.concatenate([joined, clip])
+    _replace_wav(out_path, joined, rate)
+
+
+def postprocess_audio_file(path: str, config: dict) -> bool:
+    """
+    Apply configured silence trimming, loudness normalization, and resampling
+    to a WAV file, replacing it once processing is complete.
+    :param path: path to audio file to process
+    :param config: `tts.postprocess` configuration
+    :returns: True if the file was modified
+    """
+    if not path.lower().endswith(".wav"):
+        LOG.debug(f"Skipping post-processing of non-WAV file: {path}")
+        return False
+    try:
+        samples, rate = read_wav(path)
+    except (wave.Error, ValueError, EOFError) as e:
+        LOG.warning(f"Unable to read {path} for post-processing: {e}")
+        return False
+    if config.get("trim_silence", True):
+        samples = trim_silence(samples, rate,
+                               config.get("silence_threshold_db", -50.0),
+                               pad_ms=config.get("silence_pad_ms", 50.0))
+    if config.get("normalize", True):
+        samples = normalize_loudness(samples,
+                                     config.get("target_db", -20.0),
+                                     config.get("peak_db", -1.0))
+    target_rate = config.get("sample_rate")
+    if target_rate:
+        samples = resample(samples, rate, target_rate)
+        rate = target_rate
+    _replace_wav(path, samples, rate)
+    return True
+
+
+def wrap_get_tts(get_tts: Callable, config: dict) -> Callable:
+    """
+    Wrap a plugin `get_tts` method so generated audio is post-processed once,
+    before it is added to the cache.
+    :param get_tts: bound `get_tts` method of a TTS plugin
+    :param config: `tts.postprocess` configuration
+    :returns: wrapped method with the same signature as `get_tts`
+    """
+    @wraps(get_tts)
+    def wrapper(sentence, *args, **kwargs):
+        audio_file, phonemes = get_tts(sentence, *args, **kwargs)
+        try:
+            postprocess_audio_file(str(audio_file), config)
+        except Exception as e:
+            LOG.exception(f"Post-processing failed for {audio_file}: {e}")
+        return audio_file, phonemes
+    return wrapper
@@ -0,0 +1,156 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from threading import Lock
+from typing import List, Optional
+
+
+class BufferPoolExhausted(MemoryError):
+    """
+    Raised when a buffer cannot grow without exceeding the pool limit
+    """
+
+
+class AudioBuffer:
+    def __init__(self, pool: 'AudioBufferPool', data: bytearray):
+        """
+        Growable in-memory file for synthesized audio, backed by a bytearray
+        drawn from `pool`. Supports the file methods used by `wave`.
+        :param pool: AudioBufferPool this buffer was acquired from
+        :param data: backing bytearray
+        """
+        self._pool = pool
+        self._data = data
+        self._pos = 0
+        self.size = 0
+
+    def write(self, chunk) -> int:
+        end = self._pos + len(chunk)
+        if end > len(self._data):
+            self._data = self._pool._grow(self._data, end)
+        self._data[self._pos:end] = chunk
+        self._pos = end
+        self.size = max(self.size, end)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, pos: int, whence: int = 0) -> int:
+        self._pos = [pos, self._pos + pos, self.size + pos][whence]
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a view of the written contents, without copying. The view must
+        be released before this buffer is released.
+        """
+        return memoryview(self._data)[:self.size]
+
+    def release(self):
+        """
+        Return this buffer to its pool. The buffer must not be used after it
+        is released.
+        """
+        if self._data is not None:
+            self._pool._release(self._data)
+            self._data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class AudioBufferPool:
+    def __init__(self, max_bytes: int = 64 * 1048576,
+                 min_size: int = 65536):
+        """
+        Pool of reusable buffers for audio held in memory. The total size of
+        buffers in use and buffers held for reuse is limited to `max_bytes`;
+        idle buffers are discarded to make room for new allocations.
+        :param max_bytes: maximum total size of allocated buffers
+        :param min_size: initial size of a new buffer
+        """
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.allocated = 0
+        self._free: List[bytearray] = list()
+        self._lock = Lock()
+
+    @property
+    def in_use(self) -> int:
+        """
+        Total size of buffers currently acquired
+        """
+        with self._lock:
+            return self.allocated - sum(len(b) for b in self._free)
+
+    def acquire(self) -> AudioBuffer:
+        """
+        Get an empty buffer, reusing a released buffer if one is available
+        :returns: AudioBuffer to write audio to
+        """
+        with self._lock:
+            data = self._free.pop() if self._free else None
+        if data is None:
+            data = self._allocate(self.min_size)
+        return AudioBuffer(self, data)
+
+    def _allocate(self, size: int, replacing: Optional[bytearray] = None) \
+            -> bytearray:
+        with self._lock:
+            available = self.max_bytes - self.allocated + \
+                (len(replacing) if replacing else 0)
+            while size > available and self._free:
+                discarded = len(self._free.pop(0))
+                self.allocated -= discarded
+                available += discarded
+            if size > available:
+                raise BufferPoolExhausted(f"Cannot allocate {size} bytes; "
+                                          f"{self.allocated} of "
+                                          f"{self.max_bytes} in use")
+            self.allocated += size - (len(replacing) if replacing else 0)
+        return bytearray(size)
+
+    def _grow(self, data: bytearray, size: int) -> bytearray:
+        try:
+            grown = self._allocate(max(size, 2 * len(data)), data)
+        except BufferPoolExhausted:
+            grown = self._allocate(size, data)
+        grown[:len(data)] = data
+        return grown
+
+    def _release(self, data: bytearray):
+        with self._lock:
+            self._free.append(data)
+            self._free.sort(key=len)
@@ -0,0 +1,531 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import mmap
+import os
+import wave
+
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from functools import wraps
+from os.path import join
+from threading import Event, Lock, Thread
+from time import time, time_ns
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ovos_utils.log import LOG
+
+from neon_audio.tts.analytics import mark_cache_miss
+
+_STATS_FILE = "tts_cache_stats.json"
+
+
+class CacheEntry(NamedTuple):
+    path: str
+    size: int
+    last_access: float
+
+
+def get_cache_dir() -> str:
+    """
+    Get the neon cache directory used by `WrappedTTS`
+    """
+    from json_database.xdg_utils import xdg_cache_home
+    return join(xdg_cache_home(), "neon")
+
+
+def get_audio_cache_dir(cache_dir: str = None) -> str:
+    """
+    Get the directory containing cached audio files
+    :param cache_dir: neon cache directory, default `get_cache_dir()`
+    """
+    return join(cache_dir or get_cache_dir(), "tts")
+
+
+def scan_cache(directory: str) -> List[CacheEntry]:
+    """
+    Recursively list cached files in a directory
+    :param directory: audio cache directory to scan
+    :returns: list of CacheEntry objects
+    """
+    entries = list()
+    if not os.path.isdir(directory):
+        return entries
+    to_scan = [directory]
+    while to_scan:
+        with os.scandir(to_scan.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    to_scan.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat()
+                    entries.append(CacheEntry(entry.path, stat.st_size,
+                                              stat.st_atime))
+    return entries
+
+
+def touch_cache_entry(path: str):
+    """
+    Mark a cache entry as accessed now, independent of filesystem atime
+    settings, so it is retained by LRU eviction. The modification time is
+    kept, since in-memory caches of file contents are keyed by it.
+    :param path: path to a cached file
+    """
+    try:
+        os.utime(path, ns=(time_ns(), os.stat(path).st_mtime_ns))
+    except OSError as e:
+        LOG.warning(f"Failed to update access time of {path}: {e}")
+
+
+def prune_cache(directory: str, max_bytes: Optional[int] = None,
+                max_age: Optional[float] = None) -> List[str]:
+    """
+    Remove cached files not accessed within `max_age` seconds, then remove
+    least-recently accessed files until the cache is within `max_bytes`
+    :param directory: audio cache directory to prune
+    :param max_bytes: maximum total size of cached files
+    :param max_age: maximum seconds since a file was last accessed
+    :returns: list of removed file paths
+    """
+    entries = sorted(scan_cache(directory), key=lambda e: e.last_access)
+    to_remove = list()
+    if max_age:
+        cutoff = time() - max_age
+        while entries and entries[0].last_access < cutoff:
+            to_remove.append(entries.pop(0))
+    if max_bytes is not None:
+        total = sum(e.size for e in entries)
+        while entries and total > max_bytes:
+            entry = entries.pop(0)
+            total -= entry.size
+            to_remove.append(entry)
+    removed = list()
+    for entry in to_remove:
+        try:
+            os.remove(entry.path)
+            removed.append(entry.path)
+        except OSError as e:
+            LOG.warning(f"Failed to remove {entry.path}: {e}")
+    if removed:
+        LOG.info(f"Removed {len(removed)} files from {directory}")
+    return removed
+
+
+def _is_valid_audio(path: str) -> bool:
+    """
+    Check that a cached audio file has a readable header
+    """
+    if os.path.getsize(path) == 0:
+        return False
+    if path.endswith(".wav"):
+        try:
+            with wave.open(path, 'rb') as f:
+                return f.getnframes() > 0
+        except (wave.Error, EOFError):
+            return False
+    if path.endswith(".mp3"):
+        with open(path, 'rb') as f:
+            header = f.read(3)
+        return header == b"ID3" or (len(header) > 1 and header[0] == 0xFF
+                                    and header[1] & 0xE0 == 0xE0)
+    return True
+
+
+def verify_cache(directory: str, remove: bool = False) -> List[str]:
+    """
+    Find cached audio files that are empty or have invalid headers
+    :param directory: audio cache directory to verify
+    :param remove: if True, delete corrupt files
+    :returns: list of corrupt file paths
+    """
+    corrupt = [entry.path for entry in scan_cache(directory)
+               if not _is_valid_audio(entry.path)]
+    if remove:
+        for path in corrupt:
+            os.remove(path)
+    return corrupt
+
+
+def encode_audio_file(path: str, chunk_size: int = 3 * 65536) -> str:
+    """
+    Base64-encode a file from a memory map, one chunk at a time, so the file
+    contents are never copied into memory in full.
+    :param path: path to file to encode
+    :param chunk_size: bytes to encode per chunk; must be a multiple of 3
+    :returns: base64-encoded file contents
+    """
+    if chunk_size % 3:
+        raise ValueError(f"chunk_size must be a multiple of 3: {chunk_size}")
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        encoded = bytearray(4 * ((size + 2) // 3))
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            out_pos = 0
+            for in_pos in range(0, size, chunk_size):
+                chunk = b64encode(mapped[in_pos:in_pos + chunk_size])
+                encoded[out_pos:out_pos + len(chunk)] = chunk
+                out_pos += len(chunk)
+    return encoded.decode('ascii')
+
+
+class EncodedAudioCache:
+    def __init__(self, max_bytes: int = 32 * 1048576):
+        """
+        LRU cache of base64-encoded audio, keyed by file path, modification
+        time, and size so a rewritten file is re-encoded.
+        :param max_bytes: maximum total length of cached encoded strings
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._keys = dict()
+        self._lock = Lock()
+
+    def get(self, path: str) -> str:
+        """
+        Get the base64-encoded contents of `path`, encoding it if needed
+        :param path: path to an audio file
+        :returns: base64-encoded file contents
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        encoded = encode_audio_file(path)
+        if len(encoded) > self.max_bytes:
+            return encoded
+        with self._lock:
+            if key not in self._entries:
+                # Encoding of a previous version of the file is stale
+                stale = self._keys.get(path)
+                if stale in self._entries:
+                    self.size -= len(self._entries.pop(stale))
+                self._entries[key] = encoded
+                self._keys[path] = key
+                self.size += len(encoded)
+            while self.size > self.max_bytes:
+                (evicted_path, *_), evicted = \
+                    self._entries.popitem(last=False)
+                self._keys.pop(evicted_path, None)
+                self.size -= len(evicted)
+        return encoded
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MemoryCacheEntry(NamedTuple):
+    path: Optional[str]
+    audio: bytes
+    encoded: str
+    phonemes: Optional[str]
+
+
+def write_cache_entry(entry: MemoryCacheEntry):
+    """
+    Write audio evicted from an `AudioMemoryCache` to its disk cache path, if
+    the file is no longer (or not yet) on disk
+    :param entry: evicted MemoryCacheEntry
+    """
+    if not entry.path or os.path.isfile(entry.path):
+        return
+    try:
+        os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+        tmp_file = f"{entry.path}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(entry.audio)
+        os.replace(tmp_file, entry.path)
+    except OSError as e:
+        LOG.warning(f"Failed to write {entry.path}: {e}")
+
+
+class AudioMemoryCache:
+    def __init__(self, max_bytes: int = 32 * 1048576,
+                 on_evict: Optional[Callable] = write_cache_entry):
+        """
+        LRU cache of synthesized audio and its base64 encoding, in front of
+        the disk cache, so frequent responses are returned without file
+        access. Evicted entries are passed to `on_evict`.
+        :param max_bytes: maximum total size of cached audio and encodings
+        :param on_evict: callback for entries evicted from memory
+        """
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _entry_size(entry: MemoryCacheEntry) -> int:
+        return len(entry.audio) + len(entry.encoded)
+
+    def get(self, key) -> Optional[MemoryCacheEntry]:
+        """
+        Get a cached entry, marking it as recently used
+        :param key: hashable request key
+        :returns: MemoryCacheEntry, or None if not cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, entry: MemoryCacheEntry):
+        """
+        Add an entry, evicting least-recently used entries as needed
+        :param key: hashable request key
+        :param entry: MemoryCacheEntry to add
+        """
+        size = self._entry_size(entry)
+        if size > self.max_bytes:
+            return
+        evicted = list()
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entry_size(self._entries.pop(key))
+            self._entries[key] = entry
+            self.size += size
+            while self.size > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.size -= self._entry_size(old)
+                evicted.append(old)
+        if self.on_evict:
+            for old in evicted:
+                self.on_evict(old)
+
+    def put_encoded(self, key, path: Optional[str], encoded: str,
+                    phonemes: Optional[str]) -> bool:
+        """
+        Add base64-encoded audio. The audio is only decoded if `key` is not
+        already cached.
+        :param key: hashable request key
+        :param path: disk cache path of the audio
+        :param encoded: base64-encoded audio
+        :param phonemes: phonemes of the audio
+        :returns: True if a new entry was added
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return False
+        self.put(key, MemoryCacheEntry(path, b64decode(encoded), encoded,
+                                       phonemes))
+        return True
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheStats:
+    def __init__(self, cache_dir: str, save_interval: float = 60):
+        """
+        Track cache requests and misses, periodically persisting counts to
+        `cache_dir` so they are available to other processes (i.e. the CLI).
+        :param cache_dir: neon cache directory to save counts in
+        :param save_interval: minimum seconds between automatic saves
+        """
+        self.path = path = join(cache_dir, _STATS_FILE)
+        self.save_interval = save_interval
+        self.requests = 0
+        self.misses = 0
+        self.memory_requests = 0
+        self.memory_hits = 0
+        self._last_save = time()
+        self._lock = Lock()
+        try:
+            with open(path) as f:
+                counts = json.load(f)
+            self.requests = counts.get("requests", 0)
+            self.misses = counts.get("misses", 0)
+            self.memory_requests = counts.get("memory_requests", 0)
+            self.memory_hits = counts.get("memory_hits", 0)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            LOG.warning(f"Failed to load cache stats from {path}: {e}")
+
+    @property
+    def hits(self) -> int:
+        return max(self.requests - self.misses, 0)
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        return self.hits / self.requests if self.requests else None
+
+    @property
+    def memory_hit_rate(self) -> Optional[float]:
+        return self.memory_hits / self.memory_requests \
+            if self.memory_requests else None
+
+    def record_memory_request(self, hit: bool):
+        with self._lock:
+            self.memory_requests += 1
+            if hit:
+                self.memory_hits += 1
+        self._maybe_save()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+        self._maybe_save()
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+        self._maybe_save()
+
+    def _maybe_save(self):
+        if time() - self._last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            self._last_save = time()
+            try:
+                with open(self.path, 'w') as f:
+                    json.dump({"requests": self.requests,
+                               "misses": self.misses,
+                               "memory_requests": self.memory_requests,
+                               "memory_hits": self.memory_hits}, f)
+            except OSError as e:
+                LOG.warning(f"Failed to save cache stats: {e}")
+
+
+_cache_stats: Dict[str, CacheStats] = dict()
+_cache_stats_lock = Lock()
+
+
+def get_shared_cache_stats(cache_dir: str) -> CacheStats:
+    """
+    Get the CacheStats object shared by all engines in this process using
+    `cache_dir`, so counts of routed engines are not overwritten when each
+    engine saves its own.
+    :param cache_dir: neon cache directory to save counts in
+    :returns: CacheStats for `cache_dir`
+    """
+    with _cache_stats_lock:
+        if cache_dir not in _cache_stats:
+            _cache_stats[cache_dir] = CacheStats(cache_dir)
+        return _cache_stats[cache_dir]
+
+
+def track_cache_misses(get_tts: Callable, stats: CacheStats) -> Callable:
+    """
+    Wrap a plugin `get_tts` method to count calls as cache misses
+    :param get_tts: bound `get_tts` method of a TTS plugin
+    :param stats: CacheStats object to update
+    :returns: wrapped method with the same signature as `get_tts`
+    """
+    @wraps(get_tts)
+    def wrapper(*args, **kwargs):
+        stats.record_miss()
+        mark_cache_miss()
+        return get_tts(*args, **kwargs)
+    return wrapper
+
+
+def get_cache_stats(cache_dir: str = None) -> dict:
+    """
+    Get a summary of the audio cache
+    :param cache_dir: neon cache directory, default `get_cache_dir()`
+    :returns: dict disk cache size, entries, requests, hits, misses, and
+        hit_rate, with `memory` requests, hits, and hit_rate
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    entries = scan_cache(get_audio_cache_dir(cache_dir))
+    stats = CacheStats(cache_dir)
+    return {"size": sum(e.size for e in entries),
+            "entries": len(entries),
+            "requests": stats.requests,
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "hit_rate": stats.hit_rate,
+            "memory": {"requests": stats.memory_requests,
+                       "hits": stats.memory_hits,
+                       "hit_rate": stats.memory_hit_rate}}
+
+
+class CacheJanitor(Thread):
+    def __init__(self, directory: str, config: dict,
+                 stats: CacheStats = None):
+        """
+        Background thread to periodically enforce cache quota and age limits
+        :param directory: audio cache directory to manage
+        :param config: `tts.cache` configuration
+        :param stats: CacheStats object to persist on each run
+        """
+        Thread.__init__(self, daemon=True, name="tts_cache_janitor")
+        self.directory = directory
+        self.max_bytes = config.get("max_bytes")
+        max_age_days = config.get("max_age_days")
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.interval = config.get("interval_seconds", 3600)
+        self.stats = stats
+        self._stopping = Event()
+
+    def run(self):
+        while not self._stopping.is_set():
+            try:
+                prune_cache(self.directory, self.max_bytes, self.max_age)
+                if self.stats:
+                    self.stats.save()
+            except Exception as e:
+                LOG.exception(f"Cache janitor run failed: {e}")
+            self._stopping.wait(self.interval)
+
+    def stop(self):
+        self._stopping.set()
+
+
+_janitors: Dict[str, CacheJanitor] = dict()
+
+
+def start_cache_janitor(directory: str, config: dict,
+                        stats: CacheStats = None) -> Optional[CacheJanitor]:
+    """
+    Start a CacheJanitor for `directory` if a quota or age limit is
+    configured. Only one janitor runs per directory.
+    :param directory: audio cache directory to manage
+    :param config: `tts.cache` configuration
+    :param stats: CacheStats object to persist on each run
+    :returns: running CacheJanitor, or None if not configured
+    """
+    if not config.get("max_bytes") and not config.get("max_age_days"):
+        return None
+    janitor = _janitors.get(directory)
+    if not janitor or not janitor.is_alive():
+        janitor = CacheJanitor(directory, config, stats)
+        janitor.start()
+        _janitors[directory] = janitor
+    return janitor
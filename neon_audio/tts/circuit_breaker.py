@@ -0,0 +1,198 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from collections import deque
+from threading import Lock
+from time import monotonic
+from typing import Callable, Optional
+
+from ovos_utils.log import LOG
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when a call is rejected because a circuit breaker is open
+    """
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, config: dict = None,
+                 on_state_change: Optional[Callable] = None):
+        """
+        Track call failures of a remote dependency and reject calls while it
+        is failing, periodically allowing a trial call through.
+        :param name: name of the protected dependency
+        :param config: `tts.circuit_breaker` configuration
+        :param on_state_change: callback accepting (name, state) on transitions
+        """
+        config = config or dict()
+        self.name = name
+        self.enabled = config.get("enabled", False)
+        self.window_seconds = config.get("window_seconds", 60)
+        self.failure_rate = config.get("failure_rate", 0.5)
+        self.min_calls = config.get("min_calls", 5)
+        self.reset_seconds = config.get("reset_seconds", 30)
+        self._on_state_change = on_state_change
+        self._calls = deque()
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        Current breaker state; an open breaker becomes half-open once
+        `reset_seconds` have elapsed
+        """
+        with self._lock:
+            changed = self._state == self.OPEN and \
+                monotonic() - self._opened_at >= self.reset_seconds and \
+                self._set_state(self.HALF_OPEN)
+            state = self._state
+        if changed:
+            self._notify(self.HALF_OPEN)
+        return state
+
+    @property
+    def current_failure_rate(self) -> float:
+        """
+        Failure rate of calls within the current window
+        """
+        with self._lock:
+            self._prune()
+            if not self._calls:
+                return 0.0
+            return sum(1 for _, ok in self._calls if not ok) / len(self._calls)
+
+    def allow(self) -> bool:
+        """
+        Check if a call should be attempted. In the half-open state, only one
+        trial call is allowed at a time.
+        """
+        if not self.enabled:
+            return True
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """
+        End a call allowed by `allow` without recording an outcome, so a
+        half-open breaker can allow another trial call
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        if not self.enabled:
+            return
+        changed = False
+        with self._lock:
+            self._trial_running = False
+            if self._state == self.HALF_OPEN:
+                self._calls.clear()
+                changed = self._set_state(self.CLOSED)
+            self._calls.append((monotonic(), True))
+            self._prune()
+        if changed:
+            self._notify(self.CLOSED)
+
+    def record_failure(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._trial_running = False
+            if self._state == self.HALF_OPEN:
+                changed = self._open()
+            else:
+                self._calls.append((monotonic(), False))
+                self._prune()
+                failures = sum(1 for _, ok in self._calls if not ok)
+                changed = self._state == self.CLOSED and \
+                    len(self._calls) >= self.min_calls and \
+                    failures / len(self._calls) >= self.failure_rate and \
+                    self._open()
+        if changed:
+            self._notify(self.OPEN)
+
+    def call(self, func: Callable, *args, **kwargs):
+        """
+        Call `func` through this breaker, recording the outcome
+        :param func: callable to protect
+        :returns: result of `func`
+        :raises CircuitOpenError: if the breaker is open
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def _prune(self):
+        cutoff = monotonic() - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _open(self) -> bool:
+        self._opened_at = monotonic()
+        return self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> bool:
+        """
+        Record a state transition. Must be called with `_lock` held; callers
+        `_notify` the transition after releasing it.
+        :returns: True if the state changed
+        """
+        if state == self._state:
+            return False
+        LOG.warning(f"Circuit breaker {self.name}: {self._state} -> {state}")
+        self._state = state
+        return True
+
+    def _notify(self, state: str):
+        if self._on_state_change:
+            try:
+                self._on_state_change(self.name, state)
+            except Exception as e:
+                LOG.error(f"State change callback failed: {e}")
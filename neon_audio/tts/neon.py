@@ -26,107 +26,178 @@
 # NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
 import hashlib
 import inspect
 import os
 
-from os.path import dirname
-from time import time
-from typing import List
+from base64 import b64encode
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait, \
+    TimeoutError as FuturesTimeout
+from contextlib import nullcontext
+from contextvars import copy_context
+from copy import deepcopy
+from os.path import dirname, join
+from functools import lru_cache
+from threading import Lock
+from time import monotonic, time
+from typing import List, NamedTuple, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
 
 from json_database import JsonStorageXDG
 from ovos_bus_client.apis.enclosure import EnclosureAPI
 from ovos_bus_client.message import Message
 from ovos_plugin_manager.language import OVOSLangDetectionFactory,\
     OVOSLangTranslationFactory
-from ovos_plugin_manager.templates.tts import TTS
+from ovos_plugin_manager.templates.tts import StreamingTTS, TTS
+from ovos_plugin_manager.utils.tts_cache import hash_sentence
 
-from neon_utils.file_utils import encode_file_to_base64_string
 from neon_utils.message_utils import resolve_message
 from neon_utils.metrics_utils import Stopwatch
 from neon_utils.signal_utils import create_signal, check_for_signal,\
     init_signal_bus
 from ovos_utils.log import LOG, log_deprecation
 from ovos_audio.playback import PlaybackThread
-from ovos_config.config import Configuration
+
+from neon_audio.config import get_config
+from neon_audio.tracing import get_tracer
+from neon_audio.tts.analytics import get_shared_phrase_stats, \
+    mark_cache_miss, track_synthesis
+from neon_audio.tts.audio_processing import concatenate_wav_files, \
+    get_audio_duration, wrap_get_tts, write_wav
+from neon_audio.tts.buffers import AudioBuffer, AudioBufferPool, \
+    BufferPoolExhausted
+from neon_audio.tts.cache import AudioMemoryCache, EncodedAudioCache, \
+    MemoryCacheEntry, get_audio_cache_dir, get_shared_cache_stats, \
+    start_cache_janitor, touch_cache_entry, track_cache_misses, \
+    write_cache_entry
+from neon_audio.tts.circuit_breaker import CircuitBreaker, CircuitOpenError
+from neon_audio.tts.text import canonicalize_text, split_segments, \
+    strip_ssml
 
 
-def get_requested_tts_languages(msg) -> List[dict]:
+class TTSRequest(NamedTuple):
+    """
+    Immutable voice request resolved for a spoken response. Supports
+    dict-style access (`request["language"]`, `request.get("voice")`).
+    """
+    speaker: str
+    language: str
+    gender: str
+    voice: Optional[str]
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            if item not in self._fields:
+                raise KeyError(item)
+            return getattr(self, item)
+        return tuple.__getitem__(self, item)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+
+_DEFAULT_TTS_NAME = "Neon"
+_DEFAULT_GENDER = "female"
+
+
+@lru_cache(maxsize=256)
+def _resolve_profile_requests(speech_prefs: tuple) -> Tuple[TTSRequest, ...]:
+    """
+    Build de-duplicated TTS requests for a set of user profile preferences
+    :param speech_prefs: tuple of (language, secondary language, gender,
+        secondary gender) for each profile
+    :return: tuple of unique TTSRequest objects in request order
+    """
+    requests = dict()
+    for language, second_lang, gender, second_gender in speech_prefs:
+        language = language or 'en-us'
+        second_lang = second_lang or language
+        gender = gender or _DEFAULT_GENDER
+        requests.setdefault(TTSRequest(_DEFAULT_TTS_NAME, language, gender,
+                                       None))
+        if second_lang != language:
+            requests.setdefault(TTSRequest(_DEFAULT_TTS_NAME, second_lang,
+                                           second_gender or gender, None))
+    return tuple(requests)
+
+
+_user_config_requests = {"path": None, "mtime": None, "requests": tuple()}
+_user_config_lock = Lock()
+
+
+def _get_user_config_requests() -> Tuple[TTSRequest, ...]:
+    """
+    Get TTS requests from the user YAML configuration. The configuration is
+    only re-read from disk when the file has been modified.
+    :return: tuple of TTSRequest objects
+    """
+    with _user_config_lock:
+        path = _user_config_requests["path"]
+        if path and os.path.isfile(path) and \
+                os.path.getmtime(path) == _user_config_requests["mtime"]:
+            return _user_config_requests["requests"]
+
+        from neon_utils.configuration_utils import get_neon_user_config
+        user_config = get_neon_user_config()
+        speech = user_config["speech"]
+        requests = [TTSRequest(_DEFAULT_TTS_NAME, speech["tts_language"],
+                               speech["tts_gender"], speech["neon_voice"])]
+        if speech["secondary_tts_language"] and \
+                speech["secondary_tts_language"] != speech["tts_language"]:
+            requests.append(
+                TTSRequest(_DEFAULT_TTS_NAME, speech["secondary_tts_language"],
+                           speech["secondary_tts_gender"] or _DEFAULT_GENDER,
+                           speech["secondary_neon_voice"]))
+        path = user_config.file_path
+        _user_config_requests["path"] = path
+        _user_config_requests["mtime"] = os.path.getmtime(path) \
+            if os.path.isfile(path) else None
+        _user_config_requests["requests"] = tuple(requests)
+        return _user_config_requests["requests"]
+
+
+def get_requested_tts_languages(msg) -> List[TTSRequest]:
     """
     Builds a list of the requested TTS for a given spoken response
     :param msg: Message associated with request
-    :return: List of TTS dict data
+    :return: List of TTSRequest data
     """
     profiles = msg.context.get("user_profiles") or \
         msg.context.get("nick_profiles")
-    tts_name = "Neon"
-    default_gender = "female"
     tts_reqs = []
     # Get all of our language parameters
     try:
         # If speaker data is present, use it
         if msg.data.get("speaker"):
             speaker = msg.data.get("speaker")
-            tts_reqs.append({"speaker": speaker.get("name", "Neon"),
-                             "language": speaker.get("language",
-                                                     msg.data.get("lang")),
-                             "gender": speaker.get("gender", default_gender),
-                             "voice": speaker.get("voice")
-                             })
+            tts_reqs.append(TTSRequest(speaker.get("name", _DEFAULT_TTS_NAME),
+                                       speaker.get("language",
+                                                   msg.data.get("lang")),
+                                       speaker.get("gender", _DEFAULT_GENDER),
+                                       speaker.get("voice")))
             LOG.info(f">>> speaker={speaker}")
 
         # If multiple profiles attached to message, get TTS for all
         elif profiles:
-            LOG.debug(f"Got profiles: {profiles}")
-            for profile in profiles:
-                username = profile.get("user", {}).get("username")
-                lang_prefs = profile.get("speech") or dict()
-                language = lang_prefs.get('tts_language') or 'en-us'
-                second_lang = lang_prefs.get('secondary_tts_language') or \
-                    language
-                gender = lang_prefs.get('tts_gender') or default_gender
-                LOG.debug(f"{username} requesting {gender} {language}")
-                primary = {"speaker": tts_name,
-                           "language": language,
-                           "gender": gender,
-                           "voice": None
-                           }
-                if second_lang != language:
-                    second_gender = \
-                        lang_prefs.get("secondary_tts_gender") or \
-                        gender
-                    secondary = {"speaker": tts_name,
-                                 "language": second_lang,
-                                 "gender": second_gender,
-                                 "voice": None
-                                 }
-                else:
-                    secondary = None
-                if primary not in tts_reqs:
-                    tts_reqs.append(primary)
-                if secondary and secondary not in tts_reqs:
-                    tts_reqs.append(secondary)
+            speech_prefs = tuple(
+                (prefs.get('tts_language'),
+                 prefs.get('secondary_tts_language'),
+                 prefs.get('tts_gender'),
+                 prefs.get('secondary_tts_gender'))
+                for prefs in (profile.get("speech") or dict()
+                              for profile in profiles))
+            tts_reqs.extend(_resolve_profile_requests(speech_prefs))
 
         # General non-server response, use yml configuration
         else:
             log_deprecation("speaker data or profile context required", "2.0.0")
-            from neon_utils.configuration_utils import get_neon_user_config
-            user_config = get_neon_user_config()["speech"]
-            tts_reqs.append({"speaker": tts_name,
-                             "language": user_config["tts_language"],
-                             "gender": user_config["tts_gender"],
-                             "voice": user_config["neon_voice"]
-                             })
-            if user_config["secondary_tts_language"] and \
-                    user_config["secondary_tts_language"] != \
-                    user_config["tts_language"]:
-                tts_reqs.append(
-                    {"speaker": tts_name,
-                     "language": user_config["secondary_tts_language"],
-                     "gender": user_config["secondary_tts_gender"] or
-                        default_gender,
-                     "voice": user_config["secondary_neon_voice"]
-                     })
+            tts_reqs.extend(_get_user_config_requests())
     except Exception as x:
         LOG.error(x)
 
@@ -155,6 +226,12 @@ class NeonPlaybackThread(PlaybackThread):
     def __init__(self, queue, bus=None):
         LOG.info(f"Initializing NeonPlaybackThread with queue={queue}")
         PlaybackThread.__init__(self, queue, bus=bus)
+        self.play_started: Optional[float] = None
+        self.play_duration: Optional[float] = None
+
+    @property
+    def paused(self) -> bool:
+        return not self._do_playback.is_set()
 
     def begin_audio(self, message: Message = None):
         # TODO: Mark signals for deprecation
@@ -172,6 +249,9 @@ class NeonPlaybackThread(PlaybackThread):
         # TODO: Mark signals for deprecation
         check_for_signal("isSpeaking")
 
+    def _record_queue_wait(self, message: Message):
+        get_tracer().record_queue_wait(message)
+
     def _play(self):
         LOG.debug(f"Start playing {self._now_playing} from queue={self.queue}")
         # wav_file, vis, listen, ident, message
@@ -182,7 +262,15 @@ class NeonPlaybackThread(PlaybackThread):
             ident = message.context.get('ident') or \
                 message.context.get('session', {}).get('session_id')
 
-        PlaybackThread._play(self)
+        tracer = get_tracer()
+        self._record_queue_wait(message)
+        self.play_duration = get_audio_duration(str(self._now_playing[0]))
+        self.play_started = monotonic()
+        try:
+            with tracer.span("playback", message):
+                PlaybackThread._play(self)
+        finally:
+            self.play_started = None
         # Notify playback is finished
         LOG.info(f"Played {ident}")
         self.bus.emit(message.forward(ident))
@@ -208,6 +296,22 @@ class WrappedTTS(TTS):
         LOG.info(f"Creating wrapped TTS object for {base_engine}")
         base_engine.execute = cls.execute
         base_engine.get_multiple_tts = cls.get_multiple_tts
+        base_engine._hedged_synth = cls._hedged_synth
+        base_engine._report_hedge = cls._report_hedge
+        base_engine._translate = cls._translate
+        base_engine._detect_lang = cls._detect_lang
+        base_engine._synth_segments = cls._synth_segments
+        base_engine._synth_in_memory = cls._synth_in_memory
+        base_engine._write_audio = cls._write_audio
+        base_engine._persist_audio = cls._persist_audio
+        base_engine._write_evicted = cls._write_evicted
+        base_engine.canonical_sentence = cls.canonical_sentence
+        base_engine.save_stats = cls.save_stats
+        base_engine.retire = cls.retire
+        if base_engine.stop is not cls.stop:
+            base_engine._plugin_stop = base_engine.stop
+            base_engine.stop = cls.stop
+        base_engine._publish_breaker_state = cls._publish_breaker_state
         # TODO: Below method is only to bridge compatibility
         base_engine._get_tts = cls._get_tts
         base_engine._init_playback = cls._init_playback
@@ -220,19 +324,23 @@ class WrappedTTS(TTS):
         into the selected TTS engine """
         base_engine = base_engine(*args, **kwargs)
 
-        language_config = Configuration().get("language") or dict()
+        config = get_config()
+        language_config = config.get("language") or dict()
+        tts_config = config.get("tts") or dict()
 
         base_engine.keys = {}
+        base_engine.retired = False
 
         base_engine.language_config = language_config
         try:
             if language_config.get('detection_module'):
                 # Prevent loading a detector if not configured
                 base_engine.lang_detector = \
-                    OVOSLangDetectionFactory.create(language_config)
+                    OVOSLangDetectionFactory.create(deepcopy(language_config))
             if language_config.get('translation_module'):
                 base_engine.translator = \
-                    OVOSLangTranslationFactory.create(language_config)
+                    OVOSLangTranslationFactory.create(
+                        deepcopy(language_config))
         except ValueError as e:
             LOG.error(e)
             base_engine.lang_detector = None
@@ -244,6 +352,79 @@ class WrappedTTS(TTS):
         os.makedirs(cache_dir, exist_ok=True)
         base_engine.cache_dir = cache_dir
         base_engine.cached_translations = cached_translations
+        base_engine._tracer = get_tracer()
+        # Memoize per-instance since SSML validation depends on the engine
+        base_engine.canonical_sentence = lru_cache(
+            maxsize=tts_config.get("text_cache_size", 1024))(
+            base_engine.canonical_sentence)
+        base_engine.segment_config = tts_config.get("segments") or dict()
+        base_engine._segment_rtf = None
+        base_engine.skip_translation_config = \
+            tts_config.get("skip_translation") or dict()
+        base_engine._detect_lang = lru_cache(
+            maxsize=tts_config.get("text_cache_size", 1024))(
+            base_engine._detect_lang)
+
+        cache_config = tts_config.get("cache") or dict()
+        # Statistics are shared with routed engines
+        base_engine.cache_stats = get_shared_cache_stats(cache_dir)
+        base_engine.phrase_stats = get_shared_phrase_stats(
+            cache_dir, (tts_config.get("analytics") or dict()).get(
+                "max_phrases", 500))
+        base_engine.encoded_cache = EncodedAudioCache(
+            cache_config.get("encoded_cache_bytes", 32 * 1048576))
+        base_engine.get_tts = track_cache_misses(base_engine.get_tts,
+                                                 base_engine.cache_stats)
+        start_cache_janitor(get_audio_cache_dir(cache_dir), cache_config,
+                            base_engine.cache_stats)
+
+        postprocess_config = tts_config.get("postprocess") or dict()
+        if postprocess_config.get("enabled"):
+            LOG.info(f"Enabling audio post-processing: {postprocess_config}")
+            base_engine.get_tts = wrap_get_tts(base_engine.get_tts,
+                                               postprocess_config)
+
+        memory_config = tts_config.get("memory_audio") or dict()
+        base_engine.buffer_pool = None
+        if memory_config.get("enabled"):
+            if postprocess_config.get("enabled"):
+                # Post-processing operates on files
+                LOG.warning("In-memory audio is not supported with "
+                            "post-processing enabled")
+            else:
+                base_engine.buffer_pool = AudioBufferPool(
+                    memory_config.get("max_bytes", 64 * 1048576))
+        memory_cache_bytes = cache_config.get("memory_cache_bytes",
+                                              32 * 1048576)
+        # Audio synthesized in memory and audio evicted from the memory cache
+        # are written to disk by a single thread
+        base_engine._persist_executor = ThreadPoolExecutor(
+            1, thread_name_prefix="tts_persist") \
+            if base_engine.buffer_pool is not None or memory_cache_bytes \
+            else None
+        base_engine.memory_cache = AudioMemoryCache(
+            memory_cache_bytes, base_engine._write_evicted) \
+            if memory_cache_bytes else None
+        # Identifies this engine instance in memory cache keys
+        base_engine.engine_id = uuid4().hex
+
+        base_engine.fallback_engine = None
+        base_engine.router = None
+        base_engine.hedge_config = tts_config.get("hedge") or dict()
+        base_engine.hedge_stats = {"requests": 0, "hedged": 0,
+                                   "primary_wins": 0, "fallback_wins": 0}
+        base_engine._hedge_lock = Lock()
+        base_engine._hedge_executor = ThreadPoolExecutor(
+            base_engine.hedge_config.get("max_workers", 4),
+            thread_name_prefix="tts_hedge") \
+            if base_engine.hedge_config.get("enabled") else None
+
+        breaker_config = tts_config.get("circuit_breaker") or dict()
+        base_engine.engine_breaker = CircuitBreaker(
+            f"tts.{base_engine.tts_name}", breaker_config,
+            base_engine._publish_breaker_state)
+        base_engine.translator_breaker = CircuitBreaker(
+            "translator", breaker_config, base_engine._publish_breaker_state)
 
         return base_engine
 
@@ -289,12 +470,15 @@ class WrappedTTS(TTS):
             key = str(hashlib.md5(
                 sentence.encode('utf-8', 'ignore')).hexdigest())
             file = kwargs.get("wav_file") or \
-                os.path.join(self.cache_dir, "tts", self.tts_name,
+                os.path.join(get_audio_cache_dir(self.cache_dir),
+                             self.tts_name,
                              request["language"], request["gender"],
                              key + '.' + self.audio_ext)
             os.makedirs(dirname(file), exist_ok=True)
+            self.cache_stats.record_request()
             if os.path.isfile(file):
                 LOG.info(f"Using cached TTS audio")
+                touch_cache_entry(file)
                 return file, None
             plugin_kwargs = dict()
             if "speaker" in inspect.signature(self.get_tts).parameters:
@@ -309,6 +493,389 @@ class WrappedTTS(TTS):
             # TODO: Handle language, gender, voice kwargs here
             return self.get_tts(sentence, **kwargs)
 
+    def save_stats(self):
+        """
+        Persist cache and phrase statistics
+        """
+        self.cache_stats.save()
+        self.phrase_stats.save()
+
+    def stop(self):
+        # A replaced engine shares the playback thread of the current engine
+        if getattr(self, "retired", False):
+            return
+        self._plugin_stop()
+
+    def retire(self):
+        """
+        Shut down an engine that has been replaced, without stopping the
+        playback thread shared with the current engine
+        """
+        self.retired = True
+        for executor in (self._hedge_executor, self._persist_executor):
+            if executor:
+                executor.shutdown(wait=True)
+        self.shutdown()
+
+    def canonical_sentence(self, sentence: str) -> str:
+        """
+        Get the canonical form of `sentence` with SSML validated for this
+        engine. This form is synthesized and used for all cache keys, so
+        trivially different inputs resolve the same cached audio.
+        :param sentence: raw text to synthesize
+        :returns: canonical sentence
+        """
+        ssml_tags = tuple(self.ssml_tags or ())
+        return canonicalize_text(self.validate_ssml(
+            canonicalize_text(sentence, ssml_tags)), ssml_tags)
+
+    def _hedged_synth(self, sentence: str, message: Message, **kwargs):
+        """
+        Synthesize `sentence`, starting `fallback_engine` in parallel if the
+        primary engine has not returned audio within the configured budget.
+        The first successful result is returned and the other is discarded.
+        While the engine circuit breaker is open, `fallback_engine` is used
+        directly.
+        :param sentence: text to synthesize
+        :param message: Message associated with request
+        :returns: audio, phonemes
+        """
+        fallback = self.fallback_engine
+        if not self.engine_breaker.allow():
+            if fallback is None:
+                raise CircuitOpenError(f"Circuit open for {self.tts_name}")
+            LOG.warning(f"{self.tts_name} unavailable. "
+                        f"Using {fallback.tts_name}")
+            return fallback.synth(sentence, **kwargs)
+
+        def _synth_primary():
+            self.cache_stats.record_request()
+            try:
+                result = self.synth(sentence, **kwargs)
+            except Exception:
+                self.engine_breaker.record_failure()
+                raise
+            self.engine_breaker.record_success()
+            return result
+
+        if not self._hedge_executor or fallback is None:
+            return _synth_primary()
+        budget = self.hedge_config.get("budget_seconds", 2.0)
+        primary = self._hedge_executor.submit(copy_context().run,
+                                              _synth_primary)
+        try:
+            result = primary.result(timeout=budget)
+            self._report_hedge("primary", False, message)
+            return result
+        except FuturesTimeout:
+            LOG.warning(f"No audio from {self.tts_name} within {budget}s. "
+                        f"Starting {fallback.tts_name}")
+        secondary = self._hedge_executor.submit(copy_context().run,
+                                                fallback.synth, sentence,
+                                                **kwargs)
+        pending = {primary, secondary}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception():
+                    error = future.exception()
+                    LOG.error(f"Hedged synthesis failed: {error}")
+                    continue
+                for other in pending:
+                    # Best-effort; a running synthesis completes in the
+                    # background and its result is discarded
+                    other.cancel()
+                self._report_hedge("primary" if future is primary
+                                   else "fallback", True, message)
+                return future.result()
+        raise error
+
+    def _publish_breaker_state(self, name: str, state: str):
+        """
+        Notify the messagebus of a circuit breaker state change
+        :param name: name of the circuit breaker
+        :param state: new state of the circuit breaker
+        """
+        if self.bus:
+            self.bus.emit(Message("neon.audio.circuit_breaker",
+                                  {"name": name, "state": state}))
+
+    def _report_hedge(self, winner: str, hedged: bool, message: Message):
+        """
+        Update hedged synthesis counters and report them as a metric
+        :param winner: "primary" or "fallback"
+        :param hedged: True if the fallback engine was started
+        :param message: Message associated with request
+        """
+        with self._hedge_lock:
+            self.hedge_stats["requests"] += 1
+            self.hedge_stats["hedged"] += int(hedged)
+            self.hedge_stats[f"{winner}_wins"] += 1
+            stats = dict(self.hedge_stats)
+        if hedged:
+            self.bus.emit(message.forward(
+                "neon.metric",
+                {"name": "tts_hedge", "winner": winner,
+                 "hedge_rate": stats["hedged"] / stats["requests"],
+                 **stats}))
+
+    def _translate(self, sentence: str, tts_lang: str, skill_lang: str,
+                   message: Message) -> str:
+        """
+        Get a (cached) translation of `sentence`. If the translator circuit
+        breaker is enabled and translation fails or is unavailable, the
+        untranslated sentence is returned.
+        :param sentence: text to translate
+        :param tts_lang: language to translate to
+        :param skill_lang: language of `sentence`
+        :param message: Message associated with request
+        :returns: translated sentence
+        """
+        self.cached_translations.setdefault(tts_lang, {})
+        tx_sentence = self.cached_translations[tts_lang].get(sentence)
+        if tx_sentence:
+            self.phrase_stats.record_translation(True)
+            return tx_sentence
+        detected_lang = self._detect_lang(sentence)
+        if detected_lang and \
+                detected_lang.split("-")[0] == tts_lang.split("-")[0]:
+            LOG.debug(f"Skipping translation of {tts_lang} text from "
+                      f"{skill_lang}")
+            self.phrase_stats.record_skipped_translation()
+            return sentence
+        self.phrase_stats.record_translation(False)
+        try:
+            with self._tracer.span("translate", message, lang=tts_lang):
+                tx_sentence = self.translator_breaker.call(
+                    self.translator.translate, sentence, tts_lang, skill_lang)
+        except Exception as e:
+            if not self.translator_breaker.enabled:
+                raise e
+            LOG.warning(f"Translation to {tts_lang} failed ({e}). "
+                        f"Using untranslated text")
+            return sentence
+        self.cached_translations[tts_lang][sentence] = tx_sentence
+        self.cached_translations.store()
+        return tx_sentence
+
+    def _detect_lang(self, sentence: str) -> Optional[str]:
+        """
+        Detect the language of `sentence` with the configured language
+        detector, if the sentence is long enough to be reliably detected.
+        :param sentence: text to check, optionally including SSML
+        :returns: detected language code, or None if no language is detected
+            with at least `min_confidence`
+        """
+        detector = getattr(self, "lang_detector", None)
+        config = self.skip_translation_config
+        if not detector or not config.get("enabled", True):
+            return None
+        text = strip_ssml(sentence)
+        if len(text) < config.get("min_chars", 10):
+            return None
+        try:
+            probs = detector.detect_probs(text)
+        except Exception as e:
+            LOG.warning(f"Language detection failed: {e}")
+            return None
+        if not probs:
+            return None
+        lang, prob = max(probs.items(), key=lambda p: p[1])
+        return lang if prob >= config.get("min_confidence", 0.9) else None
+
+    def _synth_in_memory(self, sentence: str, message: Message,
+                         **kwargs) -> Optional[Tuple[str, Optional[str],
+                                                     Optional[str]]]:
+        """
+        Synthesize `sentence` to an in-memory buffer and encode it, without
+        writing audio to disk first. Engines support this by subclassing
+        `StreamingTTS` or defining `get_tts_audio`. If caching is enabled,
+        audio is written to the cache in the background.
+        :param sentence: text to synthesize
+        :param message: Message associated with request
+        :returns: base64-encoded audio, phonemes, and cache path (or None), or
+            None if the sentence is cached or cannot be synthesized to memory
+        """
+        if not self.buffer_pool:
+            return None
+        if isinstance(self, StreamingTTS):
+            method = self.stream_tts
+        elif callable(getattr(self, "get_tts_audio", None)):
+            method = self.get_tts_audio
+        else:
+            return None
+        ctxt = self._get_ctxt(kwargs)
+        cache = ctxt.get_cache(self.audio_ext, self.config)
+        sentence_hash = hash_sentence(sentence)
+        if self.enable_cache and sentence_hash in cache:
+            return None
+
+        params = inspect.signature(method).parameters
+        synth_kwargs = {k: v for k, v in {"voice": ctxt.voice,
+                                          **kwargs}.items()
+                        if k in params and k != "sentence"}
+        try:
+            buffer = self.buffer_pool.acquire()
+        except BufferPoolExhausted as e:
+            LOG.warning(f"{e}. Synthesizing to disk")
+            return None
+        # Checked last, since a half-open breaker allows a single trial call
+        if not self.engine_breaker.allow():
+            buffer.release()
+            return None
+        try:
+            phonemes = self._write_audio(buffer, sentence, synth_kwargs)
+        except BufferPoolExhausted as e:
+            buffer.release()
+            self.engine_breaker.release()
+            LOG.warning(f"{e}. Synthesizing to disk")
+            return None
+        except Exception:
+            buffer.release()
+            self.engine_breaker.record_failure()
+            raise
+        self.engine_breaker.record_success()
+        self.cache_stats.record_request()
+        self.cache_stats.record_miss()
+        mark_cache_miss()
+        with buffer.getbuffer() as view:
+            encoded = b64encode(view).decode('ascii')
+        if not self.enable_cache:
+            buffer.release()
+            return encoded, phonemes, None
+        audio_file = cache.define_audio_file(sentence_hash)
+        self._persist_executor.submit(self._persist_audio, buffer, audio_file,
+                                      sentence, ctxt.lang, cache, phonemes)
+        return encoded, phonemes, str(audio_file)
+
+    def _write_audio(self, buffer: AudioBuffer, sentence: str,
+                     kwargs: dict) -> Optional[str]:
+        """
+        Synthesize `sentence` into `buffer`. `get_tts_audio` returns audio
+        bytes in the engine's `audio_ext` format, or a float array of shape
+        (frames,) or (frames, channels) at the engine's `sample_rate`, and
+        phonemes.
+        :param buffer: AudioBuffer to write audio to
+        :param sentence: text to synthesize
+        :param kwargs: keyword arguments for the plugin synthesis method
+        :returns: phonemes, if available
+        """
+        if isinstance(self, StreamingTTS):
+            async def _stream():
+                async for chunk in self.stream_tts(sentence, **kwargs):
+                    buffer.write(chunk)
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(_stream())
+            finally:
+                loop.close()
+            return None
+        audio, phonemes = self.get_tts_audio(sentence, **kwargs)
+        if isinstance(audio, np.ndarray):
+            write_wav(buffer, audio.reshape(len(audio), -1),
+                      getattr(self, "sample_rate", 22050))
+        else:
+            buffer.write(audio)
+        return phonemes
+
+    def _persist_audio(self, buffer: AudioBuffer, audio_file, sentence: str,
+                       lang: str, cache, phonemes: Optional[str]):
+        """
+        Write audio synthesized in memory to the cache, then release its
+        buffer.
+        :param buffer: AudioBuffer containing audio
+        :param audio_file: cache AudioFile to write
+        :param sentence: synthesized text
+        :param lang: language of `sentence`
+        :param cache: TextToSpeechCache to add the sentence to
+        :param phonemes: phonemes for `sentence`, if available
+        """
+        path = str(audio_file)
+        try:
+            os.makedirs(dirname(path), exist_ok=True)
+            tmp_file = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f, buffer.getbuffer() as view:
+                f.write(view)
+            os.replace(tmp_file, path)
+            self._cache_sentence(sentence, lang, audio_file, cache, phonemes)
+        except Exception as e:
+            LOG.exception(f"Failed to cache {path}: {e}")
+        finally:
+            buffer.release()
+
+    def _write_evicted(self, entry: MemoryCacheEntry):
+        """
+        Write audio evicted from the memory cache to disk on the persist
+        thread, after any pending write of the same file.
+        :param entry: evicted MemoryCacheEntry
+        """
+        try:
+            self._persist_executor.submit(write_cache_entry, entry)
+        except RuntimeError:
+            # Retired engines no longer persist audio
+            LOG.debug(f"Not writing evicted audio: {entry.path}")
+
+    def _synth_segments(self, engine, segments: List[str], message: Message,
+                        **kwargs) -> Tuple[str, None]:
+        """
+        Synthesize each segment of a long text separately, so segments shared
+        with other texts are read from the audio cache, and join the audio
+        with a crossfade. Engine time saved by cached segments is estimated
+        from the real-time factor of synthesized segments and reported as a
+        `tts_segments` metric.
+        :param engine: TTS engine to synthesize with
+        :param segments: text segments to synthesize, in order
+        :param message: Message associated with request
+        :returns: path to joined audio, None (phonemes are not joined)
+        """
+        files = list()
+        cached = 0
+        synth_seconds = synth_audio = cached_audio = 0.0
+        for segment in segments:
+            with track_synthesis() as record:
+                start = monotonic()
+                audio_obj, _ = engine._hedged_synth(segment, message, **kwargs)
+                elapsed = monotonic() - start
+            wav_file = str(audio_obj)
+            duration = get_audio_duration(wav_file) or 0.0
+            if record["miss"]:
+                mark_cache_miss()
+                synth_seconds += elapsed
+                synth_audio += duration
+            else:
+                cached += 1
+                cached_audio += duration
+            files.append(wav_file)
+        if synth_audio:
+            rtf = synth_seconds / synth_audio
+            self._segment_rtf = rtf if self._segment_rtf is None else \
+                0.8 * self._segment_rtf + 0.2 * rtf
+
+        # Joined audio is keyed by segment files so changed audio is rejoined
+        stamps = "\n".join(f"{f}:{os.stat(f).st_mtime_ns}" for f in files)
+        key = hashlib.md5(stamps.encode()).hexdigest()
+        out_dir = join(get_audio_cache_dir(self.cache_dir), "segments")
+        os.makedirs(out_dir, exist_ok=True)
+        wav_file = join(out_dir, f"{key}.wav")
+        if os.path.isfile(wav_file):
+            touch_cache_entry(wav_file)
+        else:
+            concatenate_wav_files(files, wav_file,
+                                  self.segment_config.get("crossfade_ms", 20))
+        saved_seconds = cached_audio * self._segment_rtf \
+            if self._segment_rtf is not None else None
+        LOG.debug(f"Synthesized {len(segments) - cached} of {len(segments)} "
+                  f"segments. Saved {saved_seconds}s")
+        if self.bus:
+            self.bus.emit(message.forward(
+                "neon.metric", {"name": "tts_segments",
+                                "segments": len(segments),
+                                "cached": cached,
+                                "synth_seconds": synth_seconds,
+                                "saved_seconds": saved_seconds}))
+        return wav_file, None
+
     def get_multiple_tts(self, message, **kwargs) -> dict:
         """
         Get tts responses based on message context
@@ -318,48 +885,90 @@ class WrappedTTS(TTS):
         """
         tts_requested = get_requested_tts_languages(message)
         LOG.debug(f"tts_requested={tts_requested}")
-        sentence = message.data["text"]
-        sentence = self.validate_ssml(sentence)
+        # SSML is validated by the engine each request is routed to
+        sentence = canonicalize_text(message.data["text"])
         skill_lang = message.data.get('lang') or self.lang
         LOG.debug(f"utterance_lang={skill_lang}")
+        # Long text is cached and synthesized per sentence or clause
+        segments = [sentence]
+        min_chars = self.segment_config.get("min_text_chars", 200)
+        if self.segment_config.get("enabled") and len(sentence) >= min_chars:
+            segments = split_segments(sentence, self.segment_config.get(
+                "min_segment_chars", 10))
+        # Remote requests return encoded audio rather than playing it
+        remote = bool(message.context.get("klat_data") or
+                      message.msg_type == "neon.get_tts")
         responses = {}
         for request in tts_requested:
             tts_lang = kwargs["lang"] = request["language"]
             # Check if requested tts lang matches internal (text) lang
             if tts_lang.split("-")[0] != skill_lang.split("-")[0]:
-                self.cached_translations.setdefault(tts_lang, {})
-
-                tx_sentence = self.cached_translations[tts_lang].get(sentence)
-                if not tx_sentence:
-                    tx_sentence = self.translator.translate(sentence, tts_lang,
-                                                            skill_lang)
-                    self.cached_translations[tts_lang][sentence] = tx_sentence
-                    self.cached_translations.store()
+                tx_segments = [self._translate(segment, tts_lang, skill_lang,
+                                               message)
+                               for segment in segments]
+                tx_sentence = " ".join(tx_segments)
                 LOG.info(f"Got translated sentence: {tx_sentence}")
             else:
+                tx_segments = segments
                 tx_sentence = sentence
-            kwargs['speaker'] = request
-            audio_obj, phonemes = self.synth(tx_sentence, **kwargs)
-            wav_file = str(audio_obj)
+            translated = tx_sentence != sentence
+            kwargs['speaker'] = request._asdict()
+            with self.router.engine(tts_lang, request["voice"]) \
+                    if self.router else nullcontext() as engine:
+                engine = engine or self
+                tx_segments = [engine.canonical_sentence(segment)
+                               for segment in tx_segments]
+                tx_sentence = " ".join(tx_segments)
+                memory_key = (engine.engine_id, tts_lang, request["gender"],
+                              request["voice"], tx_sentence)
+                with self._tracer.span("synth", message, lang=tts_lang,
+                                       gender=request["gender"],
+                                       engine=engine.tts_name), \
+                        track_synthesis() as synth_record:
+                    start = monotonic()
+                    entry = self.memory_cache.get(memory_key) \
+                        if remote and self.memory_cache is not None else None
+                    in_memory = (entry.encoded, entry.phonemes, entry.path) \
+                        if entry else None
+                    if not in_memory and remote and len(tx_segments) == 1:
+                        in_memory = engine._synth_in_memory(
+                            tx_sentence, message, **kwargs)
+                    if in_memory:
+                        encoded, phonemes, wav_file = in_memory
+                    elif len(tx_segments) > 1 and engine.audio_ext == "wav":
+                        audio_obj, phonemes = self._synth_segments(
+                            engine, tx_segments, message, **kwargs)
+                    else:
+                        audio_obj, phonemes = engine._hedged_synth(
+                            tx_sentence, message, **kwargs)
+            self.phrase_stats.record(tx_sentence, tts_lang, request["gender"],
+                                     request["voice"], monotonic() - start,
+                                     not synth_record["miss"])
+            if not in_memory:
+                wav_file = str(audio_obj)
+                if not os.path.isfile(wav_file):
+                    raise RuntimeError(
+                        f"No audio generated for request: {request}")
+                encoded = self.encoded_cache.get(wav_file) if remote else None
+            if remote and self.memory_cache is not None:
+                self.cache_stats.record_memory_request(entry is not None)
+                if not entry:
+                    self.memory_cache.put_encoded(memory_key, wav_file,
+                                                  encoded, phonemes)
             # If this is the first response, populate translation and phonemes
             responses.setdefault(tts_lang, {"sentence": tx_sentence,
-                                            "translated": tx_sentence != sentence,
+                                            "translated": translated,
                                             "phonemes": phonemes,
                                             "genders": list()})
 
             # Append the generated audio from this request
-            if os.path.isfile(wav_file):
-                responses[tts_lang][request["gender"]] = wav_file
-                responses[tts_lang]["genders"].append(request["gender"])
-                # If this is a remote request, encode audio in the response
-                if message.context.get("klat_data") or \
-                        message.msg_type == "neon.get_tts":
-                    responses[tts_lang].setdefault("audio", {})
-                    responses[tts_lang]["audio"][request["gender"]] = \
-                        encode_file_to_base64_string(wav_file)
-                    LOG.debug(f"Got {tts_lang} {request['gender']} response")
-            else:
-                raise RuntimeError(f"No audio generated for request: {request}")
+            responses[tts_lang][request["gender"]] = wav_file
+            responses[tts_lang]["genders"].append(request["gender"])
+            # If this is a remote request, encode audio in the response
+            if remote:
+                responses[tts_lang].setdefault("audio", {})
+                responses[tts_lang]["audio"][request["gender"]] = encoded
+                LOG.debug(f"Got {tts_lang} {request['gender']} response")
         return responses
 
     @resolve_message
@@ -382,48 +991,53 @@ class WrappedTTS(TTS):
         LOG.debug(f"execute: {sentence}")
         stopwatch = Stopwatch("get_tts", True, self.bus)
         if message:
-            # Make sure to set the speaking signal now
-            if not message.context.get("klat_data"):
-                create_signal("isSpeaking")
-            # TODO: Should sentence and ident be added to message context? DM
-            message.data["text"] = sentence
-            with stopwatch:
-                responses = self.get_multiple_tts(message, **kwargs)
-            message.context.setdefault('timing', dict())
-            message.context['timing']['get_tts'] = stopwatch.time
-            LOG.debug(f"responses={responses}")
-
-            ident = message.context.get('speak_ident') or ident
-
-            # TODO dedicated klat handler/plugin
-            if "klat_data" in message.context:
-                LOG.info("Sending klat.response")
-                message.context['timing']['response_sent'] = time()
-                self.bus.emit(
-                    message.forward("klat.response",
-                                    {"responses": responses,
-                                     "speaker": message.data.get("speaker")}))
-                # Emit `ident` message to indicate this transaction is complete
-                LOG.debug(f"Notify playback completed for {ident}")
-                self.bus.emit(message.forward(ident))
-                message.context["timestamp"] = time()
-                self.bus.emit(message.forward("neon.metric",
-                                              {"name": "klat_interaction",
-                                               **_sort_timing_metrics(
-                                                   message.context['timing'])}))
-            else:
-                # Local user has multiple configured languages (or genders)
-                for r in responses.values():
-                    # get audio for selected voice gender
-                    for gender in r["genders"]:
-                        wav_file = r[gender]
-                        # get mouth movement data
-                        vis = self.viseme(r["phonemes"]) if r["phonemes"] \
-                            else None
-                        # queue for playback
-                        LOG.debug(f"Queue playback of: {wav_file}")
-                        self.queue.put((wav_file, vis, listen, ident, message))
-                        self.handle_metric({"metric_type": "tts.queued"})
+            with self._tracer.span("execute", message):
+                # Make sure to set the speaking signal now
+                if not message.context.get("klat_data"):
+                    create_signal("isSpeaking")
+                # TODO: Should sentence and ident be added to message
+                #  context? DM
+                message.data["text"] = sentence
+                with stopwatch:
+                    responses = self.get_multiple_tts(message, **kwargs)
+                message.context.setdefault('timing', dict())
+                message.context['timing']['get_tts'] = stopwatch.time
+                LOG.debug(f"responses={responses}")
+
+                ident = message.context.get('speak_ident') or ident
+
+                # TODO dedicated klat handler/plugin
+                if "klat_data" in message.context:
+                    LOG.info("Sending klat.response")
+                    message.context['timing']['response_sent'] = time()
+                    self.bus.emit(message.forward(
+                        "klat.response",
+                        {"responses": responses,
+                         "speaker": message.data.get("speaker")}))
+                    # Emit `ident` message to indicate this transaction is
+                    # complete
+                    LOG.debug(f"Notify playback completed for {ident}")
+                    self.bus.emit(message.forward(ident))
+                    message.context["timestamp"] = time()
+                    self.bus.emit(message.forward(
+                        "neon.metric",
+                        {"name": "klat_interaction",
+                         **_sort_timing_metrics(message.context['timing'])}))
+                else:
+                    # Local user has multiple configured languages (or genders)
+                    for r in responses.values():
+                        # get audio for selected voice gender
+                        for gender in r["genders"]:
+                            wav_file = r[gender]
+                            # get mouth movement data
+                            vis = self.viseme(r["phonemes"]) if r["phonemes"] \
+                                else None
+                            # queue for playback
+                            LOG.debug(f"Queue playback of: {wav_file}")
+                            self._tracer.inject(message)
+                            self.queue.put((wav_file, vis, listen, ident,
+                                            message))
+                            self.handle_metric({"metric_type": "tts.queued"})
         else:
             LOG.warning(f'no Message associated with TTS request: {ident}')
             assert isinstance(self, TTS)
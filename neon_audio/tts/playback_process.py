@@ -0,0 +1,486 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import multiprocessing
+
+from queue import Empty
+from threading import Event, Lock, Thread
+from typing import Optional
+
+from ovos_bus_client.message import Message
+from ovos_utils.log import LOG
+
+from neon_audio.tts.neon import NeonPlaybackThread
+
+
+def _serialize_item(item: tuple) -> tuple:
+    data, visemes, listen, ident, message = item
+    return str(data), visemes, listen, ident, message.serialize()
+
+
+def _deserialize_item(item: tuple) -> tuple:
+    data, visemes, listen, ident, message = item
+    return data, visemes, listen, ident, Message.deserialize(message)
+
+
+class _SharedStatus:
+    """
+    Playback timing shared between the service and playback processes
+    """
+    def __init__(self, ctx):
+        self._play_started = ctx.Value("d", 0.0)
+        self._play_duration = ctx.Value("d", -1.0)
+
+    @property
+    def play_started(self) -> Optional[float]:
+        return self._play_started.value or None
+
+    @play_started.setter
+    def play_started(self, val: Optional[float]):
+        self._play_started.value = val or 0.0
+
+    @property
+    def play_duration(self) -> Optional[float]:
+        val = self._play_duration.value
+        return None if val < 0 else val
+
+    @play_duration.setter
+    def play_duration(self, val: Optional[float]):
+        self._play_duration.value = -1.0 if val is None else val
+
+
+class _RelayBus:
+    """
+    Bus stand-in for the playback process that sends emitted Messages back to
+    the service process, used when the service bus is not a websocket client.
+    """
+    started_running = True
+
+    def __init__(self, events):
+        self._events = events
+        self.connected_event = Event()
+        self.connected_event.set()
+
+    def emit(self, message: Message):
+        self._events.put(message.serialize())
+
+    def on(self, *_, **__):
+        pass
+
+    def remove(self, *_, **__):
+        pass
+
+    def wait_for_response(self, *_, **__):
+        # Responses are not relayed to the playback process
+        return None
+
+
+class _HandoffQueue:
+    """
+    Queue stand-in for the playback process. Checking if the queue is empty
+    asks the service process for the next item, so speech ends only once the
+    service queue has been played.
+    """
+    def __init__(self, conn):
+        self._conn = conn
+        self.next_item = None
+        self.asked = False
+        self.stopped = False
+
+    def empty(self) -> bool:
+        self.asked = True
+        self._conn.send(("played",))
+        reply = self._conn.recv()
+        if reply[0] == "play":
+            self.next_item = reply[1]
+        elif reply[0] == "stop":
+            self.stopped = True
+        # A paused service replies `hold` so speech does not end
+        return reply[0] in ("idle", "stop")
+
+    def get(self, *_, **__):
+        raise Empty()
+
+
+class _PlaybackWorker(NeonPlaybackThread):
+    """
+    Playback thread run in the playback process. Items are received from the
+    service process and played on the calling thread.
+    """
+    def __init__(self, conn, status: _SharedStatus, bus):
+        self._status = status
+        NeonPlaybackThread.__init__(self, _HandoffQueue(conn), bus)
+        self._conn = conn
+
+    @property
+    def play_started(self) -> Optional[float]:
+        return self._status.play_started
+
+    @play_started.setter
+    def play_started(self, val: Optional[float]):
+        self._status.play_started = val
+
+    @property
+    def play_duration(self) -> Optional[float]:
+        return self._status.play_duration
+
+    @play_duration.setter
+    def play_duration(self, val: Optional[float]):
+        self._status.play_duration = val
+
+    def _record_queue_wait(self, message: Message):
+        # Recorded by the service process when the item is dequeued
+        pass
+
+    def clear_queue(self):
+        # Queued items are held by the service process
+        try:
+            self.p.terminate()
+        except Exception:
+            pass
+
+    def serve(self):
+        """
+        Play items sent by the service process until told to stop.
+        """
+        self._started.set()
+        self._do_playback.set()
+        while not self.queue.stopped:
+            try:
+                command = self._conn.recv()
+            except EOFError:
+                break
+            if command[0] == "stop":
+                break
+            item = command[1] if command[0] == "play" else None
+            while item:
+                self._now_playing = _deserialize_item(item)
+                self.queue.asked = False
+                try:
+                    NeonPlaybackThread._play(self)
+                except Exception as e:
+                    LOG.exception(e)
+                if not self.queue.asked:
+                    # Playback failed before checking for more audio
+                    if self.queue.empty():
+                        self.on_end()
+                item, self.queue.next_item = self.queue.next_item, None
+        self._terminated = True
+
+
+def _handle_control(control, worker: _PlaybackWorker):
+    """
+    Stop the current player when the service process pauses, clears, or
+    stops playback.
+    """
+    while True:
+        try:
+            command = control.recv()
+        except EOFError:
+            return
+        if command in ("terminate", "stop"):
+            worker.clear_queue()
+        if command == "stop":
+            return
+
+
+def _playback_main(conn, control, status: _SharedStatus,
+                   bus_config: Optional[dict], events):
+    """
+    Entrypoint of the playback process.
+    :param conn: Connection to receive items and report playback on
+    :param control: Connection to receive control commands on
+    :param status: shared playback timing
+    :param bus_config: MessageBusClient kwargs, or None to relay Messages
+        through `events`
+    :param events: Queue of serialized Messages to emit in the service process
+    """
+    if bus_config:
+        from ovos_bus_client import MessageBusClient
+        bus = MessageBusClient(**bus_config)
+        bus.run_in_thread()
+        if not bus.connected_event.wait(30):
+            LOG.error("Playback process failed to connect to the messagebus")
+    else:
+        bus = _RelayBus(events)
+    from neon_utils.signal_utils import init_signal_bus
+    init_signal_bus(bus)
+    from ovos_bus_client.apis.enclosure import EnclosureAPI
+    worker = _PlaybackWorker(conn, status, bus)
+    worker.enclosure = EnclosureAPI(bus)
+    Thread(target=_handle_control, args=(control, worker),
+           daemon=True).start()
+    LOG.info("Playback process started")
+    worker.serve()
+    if bus_config:
+        bus.close()
+
+
+class PlaybackProcessThread(NeonPlaybackThread):
+    """
+    Playback thread that plays audio in a separate process so playback and
+    `begin_audio`/`end_audio` timing are not delayed by synthesis holding the
+    GIL. This thread hands items from the playback queue to the process one
+    at a time, so queue stats and the playback API are unchanged.
+    """
+    def __init__(self, queue, bus=None):
+        LOG.info(f"Initializing PlaybackProcessThread with queue={queue}")
+        # Plugins used for playback are loaded in the playback process
+        Thread.__init__(self, daemon=True)
+        self.queue = queue
+        self.bus = bus
+        self.enclosure = None
+        self.p = None
+        self.g2p = None
+        self._terminated = False
+        self._processing_queue = False
+        self._now_playing = None
+        self._interrupted = None
+        self._do_playback = Event()
+        self._started = Event()
+        self._ctx = multiprocessing.get_context("spawn")
+        self._status = _SharedStatus(self._ctx)
+        self._events = self._ctx.Queue()
+        self._conn_lock = Lock()
+        self._exit_lock = Lock()
+        self._conn = None
+        self._control = None
+        self.process: Optional[multiprocessing.Process] = None
+
+    @property
+    def play_started(self) -> Optional[float]:
+        return self._status.play_started
+
+    @property
+    def play_duration(self) -> Optional[float]:
+        return self._status.play_duration
+
+    def set_bus(self, bus):
+        self.bus = bus
+
+    def _get_bus_config(self) -> Optional[dict]:
+        config = getattr(self.bus, "config", None)
+        if not getattr(config, "host", None):
+            return None
+        return {"host": config.host, "port": config.port,
+                "route": config.route, "ssl": config.ssl}
+
+    def start_process(self):
+        """
+        Start a playback process, replacing any existing process.
+        """
+        if self.process and self.process.is_alive():
+            self.stop_process()
+        self._conn, child_conn = self._ctx.Pipe()
+        child_control, self._control = self._ctx.Pipe(duplex=False)
+        self.process = self._ctx.Process(
+            target=_playback_main, name="neon_audio_playback", daemon=True,
+            args=(child_conn, child_control, self._status,
+                  self._get_bus_config(), self._events))
+        self.process.start()
+        LOG.info(f"Started playback process: {self.process.pid}")
+
+    def stop_process(self, timeout: float = 5):
+        """
+        Stop the playback process, killing it if it does not exit in time.
+        :param timeout: seconds to wait for the process to exit
+        """
+        if not self.process:
+            return
+        try:
+            self._control.send("stop")
+            with self._conn_lock:
+                self._conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            LOG.warning("Killing playback process")
+            self.process.kill()
+            self.process.join()
+        self._status.play_started = None
+
+    def restart_process(self):
+        """
+        Replace a stalled playback process with a new one. The item being
+        played is reported complete and queued audio is kept.
+        """
+        LOG.warning("Restarting playback process")
+        process = self.process
+        if process:
+            process.kill()
+            process.join()
+            self._handle_process_exit(process)
+
+    def _send(self, command: tuple):
+        with self._conn_lock:
+            self._conn.send(command)
+
+    @staticmethod
+    def _recv(process, conn) -> Optional[tuple]:
+        """
+        Wait for the playback process to report playback.
+        :param process: playback process
+        :param conn: Connection to `process`
+        :returns: reply from the playback process, or None if it exited
+        """
+        try:
+            while not conn.poll(1):
+                if not process.is_alive():
+                    return None
+            return conn.recv()
+        except (EOFError, OSError):
+            return None
+
+    def _relay_events(self):
+        while not self._terminated:
+            try:
+                message = self._events.get(timeout=1)
+            except Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            try:
+                self.bus.emit(Message.deserialize(message))
+            except Exception as e:
+                LOG.exception(e)
+
+    def _handle_process_exit(self, process):
+        """
+        Finish the item that was playing when the playback process exited and
+        start a new process. Only the first call for a process has an effect.
+        :param process: playback process that exited
+        """
+        with self._exit_lock:
+            if process is not self.process:
+                # Already replaced
+                return
+            LOG.error(f"Playback process exited: {process.exitcode}")
+            self._status.play_started = None
+            if self._now_playing:
+                message = self._now_playing[4]
+                self.bus.emit(message.forward(
+                    "recognizer_loop:audio_output_end"))
+                self.bus.emit(message.forward(self._now_playing[3]))
+            if not self._terminated:
+                self.start_process()
+
+    def _hand_off(self, item: tuple):
+        """
+        Send an item to the playback process and keep sending queued items
+        until the queue is empty or playback is paused.
+        :param item: playback queue item
+        """
+        if not self.process.is_alive():
+            self._handle_process_exit(self.process)
+        self._now_playing = item
+        process, conn = self.process, self._conn
+        try:
+            self._send(("play", _serialize_item(item)))
+            while True:
+                if not self._recv(process, conn):
+                    self._handle_process_exit(process)
+                    break
+                if self._terminated:
+                    self._send(("idle",))
+                    break
+                if not self._do_playback.is_set():
+                    # Pausing stopped the current item; play it on resume
+                    self._interrupted = self._now_playing
+                    self._send(("hold",))
+                    break
+                try:
+                    self._now_playing = self.queue.get_nowait()
+                except Empty:
+                    self._send(("idle",))
+                    break
+                self._record_queue_wait(self._now_playing[4])
+                self._send(("play", _serialize_item(self._now_playing)))
+        except OSError as e:
+            LOG.error(f"Lost connection to playback process: {e}")
+            process.kill()
+            process.join()
+            self._handle_process_exit(process)
+        self._now_playing = None
+
+    def run(self):
+        LOG.info("PlaybackProcessThread started")
+        self.start_process()
+        if not self._get_bus_config():
+            Thread(target=self._relay_events, daemon=True,
+                   name="playback_event_relay").start()
+        self._do_playback.set()
+        self._started.set()
+        while not self._terminated:
+            self._do_playback.wait()
+            try:
+                item = self._next_item()
+            except Empty:
+                continue
+            try:
+                self._hand_off(item)
+            except Exception as e:
+                LOG.exception(e)
+
+    def _next_item(self) -> tuple:
+        """
+        Get the item interrupted by pausing playback, or the next queued item
+        :raises Empty: if no item is queued within 2 seconds
+        """
+        item, self._interrupted = self._interrupted, None
+        if not item:
+            item = self.queue.get(timeout=2)
+            self._record_queue_wait(item[4])
+        return item
+
+    def _terminate_player(self):
+        try:
+            self._control.send("terminate")
+        except (AttributeError, OSError, ValueError):
+            pass
+
+    def clear_queue(self):
+        self._interrupted = None
+        while not self.queue.empty():
+            self.queue.get()
+        self._terminate_player()
+
+    def pause(self):
+        LOG.debug("Playback process paused")
+        self._do_playback.clear()
+        self._terminate_player()
+
+    def resume(self):
+        LOG.debug("Playback process resumed")
+        self._do_playback.set()
+
+    def stop(self):
+        self._now_playing = None
+        self._terminated = True
+        self.clear_queue()
+        self.stop_process()
@@ -0,0 +1,81 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from collections import deque
+from queue import Queue
+from threading import local
+from time import monotonic
+from typing import Optional
+
+from neon_audio.tts.audio_processing import get_audio_duration
+
+
+class InstrumentedQueue(Queue):
+    """
+    Playback queue that records when each item was enqueued and its audio
+    duration so depth, wait times, and time until the queue is played can be
+    reported. Items are `(audio_file, visemes, listen, ident, message)`.
+    """
+    def _init(self, maxsize):
+        Queue._init(self, maxsize)
+        self._enqueued = deque()
+        self.total_enqueued = 0
+        self.last_wait: Optional[float] = None
+        self._putting = local()
+
+    def put(self, item, block=True, timeout=None):
+        # Audio duration is read before locking the queue
+        self._putting.duration = get_audio_duration(str(item[0]))
+        Queue.put(self, item, block, timeout)
+
+    def _put(self, item):
+        Queue._put(self, item)
+        self._enqueued.append((monotonic(), self._putting.duration))
+        self.total_enqueued += 1
+
+    def _get(self):
+        item = Queue._get(self)
+        self.last_wait = monotonic() - self._enqueued.popleft()[0]
+        return item
+
+    def get_stats(self) -> dict:
+        """
+        Get a snapshot of queue depth and wait times
+        :returns: dict `depth`, `oldest_age` of the oldest queued item,
+            `last_wait` of the last item played, `total_enqueued`, and
+            `queued_duration` of audio, or None if any duration is unknown
+        """
+        with self.mutex:
+            depth = len(self._enqueued)
+            oldest = monotonic() - self._enqueued[0][0] if depth else 0.0
+            durations = [d for _, d in self._enqueued]
+            queued_duration = None if None in durations else sum(durations)
+            return {"depth": depth, "oldest_age": oldest,
+                    "last_wait": self.last_wait,
+                    "total_enqueued": self.total_enqueued,
+                    "queued_duration": queued_duration}
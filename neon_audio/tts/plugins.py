@@ -0,0 +1,128 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import hashlib
+import json
+import os
+import sys
+
+from importlib.metadata import EntryPoint, entry_points
+from os.path import isdir, join
+from typing import Dict, Optional
+
+from ovos_plugin_manager.utils import PluginTypes
+from ovos_utils.log import LOG
+
+_PLUGIN_CACHE_FILE = "tts_plugins.json"
+_METADATA_SUFFIXES = (".dist-info", ".egg-info", ".egg-link", ".pth")
+
+
+def get_environment_fingerprint() -> str:
+    """
+    Get a hash of the interpreter and installed distributions. Distribution
+    metadata is named by package and version, so the fingerprint changes
+    when packages are installed, removed, or upgraded.
+    :returns: hex digest identifying the Python environment
+    """
+    fingerprint = hashlib.sha256(sys.version.encode())
+    for path in sys.path:
+        if not path or not isdir(path):
+            continue
+        try:
+            entries = sorted(e for e in os.listdir(path)
+                             if e.endswith(_METADATA_SUFFIXES))
+        except OSError:
+            continue
+        fingerprint.update(path.encode())
+        fingerprint.update("\n".join(entries).encode())
+    return fingerprint.hexdigest()
+
+
+def scan_tts_plugins() -> Dict[str, str]:
+    """
+    Find installed TTS plugins without importing them.
+    :returns: dict of plugin name to entry point value (`module:attr`)
+    """
+    return {ep.name: ep.value
+            for ep in entry_points(group=PluginTypes.TTS.value)}
+
+
+def get_tts_plugin_index(cache_dir: str = None,
+                         refresh: bool = False) -> Dict[str, str]:
+    """
+    Get installed TTS plugins, scanning entry points only if the environment
+    has changed since the index was last saved.
+    :param cache_dir: neon cache directory, default `get_cache_dir()`
+    :param refresh: if True, scan entry points even if the index is current
+    :returns: dict of plugin name to entry point value (`module:attr`)
+    """
+    from neon_audio.tts.cache import get_cache_dir
+    cache_dir = cache_dir or get_cache_dir()
+    path = join(cache_dir, _PLUGIN_CACHE_FILE)
+    fingerprint = get_environment_fingerprint()
+    if not refresh:
+        try:
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("fingerprint") == fingerprint:
+                return index["plugins"]
+            LOG.info("Installed packages changed; scanning TTS plugins")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError) as e:
+            LOG.warning(f"Invalid TTS plugin index {path}: {e}")
+    plugins = scan_tts_plugins()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "plugins": plugins}, f)
+    except OSError as e:
+        LOG.warning(f"Failed to save TTS plugin index: {e}")
+    return plugins
+
+
+def load_tts_class(module_name: str, cache_dir: str = None) -> Optional[type]:
+    """
+    Get an uninstantiated TTS class, importing only the requested plugin.
+    Falls back to a full plugin scan if the plugin cannot be loaded from the
+    plugin index.
+    :param module_name: plugin entrypoint name to load
+    :param cache_dir: neon cache directory, default `get_cache_dir()`
+    :returns: uninstantiated class, or None if the plugin is not installed
+    """
+    for refresh in (False, True):
+        value = get_tts_plugin_index(cache_dir, refresh).get(module_name)
+        if not value:
+            continue
+        try:
+            return EntryPoint(module_name, value,
+                              PluginTypes.TTS.value).load()
+        except Exception as e:
+            LOG.warning(f"Failed to load {module_name} from {value}: {e}")
+    from ovos_plugin_manager.tts import load_tts_plugin
+    return load_tts_plugin(module_name)
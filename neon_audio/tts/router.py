@@ -0,0 +1,226 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from time import monotonic
+from typing import Callable, List, Optional
+
+from ovos_utils.log import LOG
+
+
+def get_rss_bytes() -> int:
+    """
+    Get the resident memory of this process, or 0 if it cannot be read.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class ResidentEngine:
+    __slots__ = ("module", "engine", "size", "in_use")
+
+    def __init__(self, module: str, engine, size: int):
+        self.module = module
+        self.engine = engine
+        self.size = size
+        self.in_use = 0
+
+
+class EngineRouter:
+    def __init__(self, config: dict, load_engine: Callable[[str], object],
+                 release_engine: Callable[[object], None] = None):
+        """
+        Routes TTS requests to engines by language and voice. Routed engines
+        are loaded on first use and the least recently used are released
+        when `max_engines` or `memory_budget_mb` is exceeded.
+        :param config: `tts.routing` configuration
+        :param load_engine: callback to load an engine for a module name
+        :param release_engine: callback to release an evicted engine
+        """
+        self.routes: List[dict] = config.get("routes") or list()
+        self.max_engines = config.get("max_engines", 2)
+        self.memory_budget = config.get("memory_budget_mb", 0) * 1048576
+        self._load_engine = load_engine
+        self._release_engine = release_engine or (lambda _: None)
+        self._engines = OrderedDict()
+        self._lock = Lock()
+        self._load_locks = dict()
+        self._closed = False
+
+    @property
+    def resident(self) -> List[str]:
+        """
+        Loaded modules, least recently used first.
+        """
+        with self._lock:
+            return list(self._engines.keys())
+
+    @property
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._engines.values())
+
+    def get_module(self, lang: str, voice: str = None) -> Optional[str]:
+        """
+        Get the module routed for a request. A route matching the voice is
+        preferred to a language-only route, and a full language code is
+        preferred to a primary language (i.e. `en-us` over `en`).
+        :param lang: requested language code
+        :param voice: requested voice
+        :returns: module name, or None to use the default engine
+        """
+        lang = (lang or "").lower()
+        best_module, best_score = None, -1
+        for route in self.routes:
+            route_lang = (route.get("lang") or "").lower()
+            if route_lang == lang:
+                score = 2
+            elif route_lang == lang.split("-")[0]:
+                score = 1
+            elif not route_lang:
+                score = 0
+            else:
+                continue
+            if route.get("voice"):
+                if route["voice"] != voice:
+                    continue
+                score += 3
+            if score > best_score:
+                best_module, best_score = route.get("module"), score
+        return best_module
+
+    @contextmanager
+    def engine(self, lang: str, voice: str = None):
+        """
+        Context manager yielding the engine routed for a request, or None if
+        the default engine should be used. The engine is not evicted while
+        in use.
+        :param lang: requested language code
+        :param voice: requested voice
+        """
+        module = self.get_module(lang, voice)
+        entry = self._acquire(module) if module else None
+        try:
+            yield entry.engine if entry else None
+        finally:
+            if entry:
+                with self._lock:
+                    entry.in_use -= 1
+                    if self._closed:
+                        # Engines in use at shutdown are released after
+                        # their last request
+                        evicted = [] if entry.in_use else \
+                            [self._engines.pop(entry.module)]
+                    else:
+                        # Engines kept past the limit while in use
+                        evicted = self._evict()
+                self._release(evicted)
+
+    def _acquire(self, module: str) -> Optional[ResidentEngine]:
+        with self._lock:
+            entry = self._engines.get(module)
+            if entry:
+                self._engines.move_to_end(module)
+                entry.in_use += 1
+                return entry
+            load_lock = self._load_locks.setdefault(module, Lock())
+        with load_lock:
+            with self._lock:
+                entry = self._engines.get(module)
+                if entry:
+                    self._engines.move_to_end(module)
+                    entry.in_use += 1
+                    return entry
+            LOG.info(f"Loading routed TTS engine: {module}")
+            start = monotonic()
+            rss = get_rss_bytes()
+            try:
+                engine = self._load_engine(module)
+            except Exception as e:
+                LOG.exception(f"Failed to load {module}: {e}")
+                return None
+            size = self._get_route_memory(module) or \
+                max(get_rss_bytes() - rss, 0)
+            LOG.info(f"Loaded {module} ({size / 1048576:.1f}MiB) in "
+                     f"{monotonic() - start:.2f}s")
+            entry = ResidentEngine(module, engine, size)
+            entry.in_use += 1
+            with self._lock:
+                self._engines[module] = entry
+                evicted = self._evict()
+        self._release(evicted)
+        return entry
+
+    def _release(self, entries: List[ResidentEngine]):
+        for entry in entries:
+            LOG.info(f"Releasing routed TTS engine: {entry.module}")
+            try:
+                self._release_engine(entry.engine)
+            except Exception as e:
+                LOG.error(f"Error releasing {entry.module}: {e}")
+
+    def _get_route_memory(self, module: str) -> int:
+        for route in self.routes:
+            if route.get("module") == module and route.get("memory_mb"):
+                return int(route["memory_mb"] * 1048576)
+        return 0
+
+    def _evict(self) -> List[ResidentEngine]:
+        """
+        Remove least recently used engines not in use until within limits.
+        Must be called with `_lock` held.
+        """
+        evicted = list()
+        for module in list(self._engines.keys()):
+            total = sum(e.size for e in self._engines.values())
+            if len(self._engines) <= self.max_engines and \
+                    (not self.memory_budget or total <= self.memory_budget):
+                break
+            if self._engines[module].in_use:
+                continue
+            evicted.append(self._engines.pop(module))
+        return evicted
+
+    def shutdown(self):
+        """
+        Release all resident engines. Engines in use are released when their
+        requests finish.
+        """
+        with self._lock:
+            self._closed = True
+            engines = [self._engines.pop(module)
+                       for module, entry in list(self._engines.items())
+                       if not entry.in_use]
+        self._release(engines)
@@ -0,0 +1,111 @@
+# NEON AI (TM) SOFTWARE, Software Development Kit & Application Framework
+# All trademark and other rights reserved by their respective owners
+# Copyright 2008-2025 Neongecko.com Inc.
+# Contributors: Daniel McKnight, Guy Daniels, Elon Gasper, Richard Leeds,
+# Regina Bloomstine, Casimiro Ferreira, Andrii Pernatii, Kirill Hrymailo
+# BSD-3 License
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions and the following disclaimer.
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from this
+#    software without specific prior written permission.
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR
+# CONTRIBUTORS  BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA,
+# OR PROFITS;  OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE,  EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import re
+import unicodedata
+
+from functools import lru_cache
+from typing import List, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_SEGMENT_BOUNDARY = re.compile(r"(?<=[.!?;:\u2026\u3002\uff01\uff1f])\s+")
+_TAG = re.compile(r"<\s*(/?)\s*([a-zA-Z][\w:-]*)([^>]*?)\s*(/?)\s*>")
+_ATTRIBUTE = re.compile(r"""([\w:-]+)\s*=\s*"""
+                        r"""(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+
+
+def _canonical_tag(match) -> str:
+    closing, name, attrs, self_closing = match.groups()
+    canonical_attrs = list()
+    for attr in _ATTRIBUTE.finditer(attrs):
+        key, *values = attr.groups()
+        value = next(v for v in values if v is not None)
+        canonical_attrs.append(f' {key.lower()}="{value}"')
+    attrs = "".join(canonical_attrs)
+    return f"<{closing}{name.lower()}{attrs}{self_closing}>"
+
+
+@lru_cache(maxsize=64)
+def _get_tag_pattern(ssml_tags: Tuple[str, ...]) -> re.Pattern:
+    names = "|".join(re.escape(tag) for tag in
+                     sorted(ssml_tags, key=len, reverse=True))
+    return re.compile(rf"<\s*(/?)\s*({names})(?![\w:-])([^>]*?)\s*(/?)\s*>",
+                      re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_text(text: str, ssml_tags: Tuple[str, ...] = ()) -> str:
+    """
+    Get the canonical form of text to synthesize so equivalent requests
+    resolve the same audio and translation cache entries. Unicode is NFC
+    normalized, whitespace is collapsed, and SSML tags are lower-cased with
+    consistently quoted attributes.
+    :param text: raw text, optionally including SSML
+    :param ssml_tags: names of SSML tags to canonicalize; other text in angle
+        brackets (i.e. comparisons) is left unchanged
+    :returns: canonical text
+    """
+    text = unicodedata.normalize("NFC", text)
+    if ssml_tags:
+        text = _get_tag_pattern(ssml_tags).sub(_canonical_tag, text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def strip_ssml(text: str) -> str:
+    """
+    Remove SSML tags from text.
+    :param text: text, optionally including SSML
+    :returns: text with tags removed and whitespace collapsed
+    """
+    return _WHITESPACE.sub(" ", _TAG.sub(" ", text)).strip()
+
+
+def split_segments(text: str, min_chars: int = 10) -> List[str]:
+    """
+    Split canonical text into sentences and clauses that can be synthesized
+    independently. Text containing SSML is not split.
+    :param text: canonical text to split
+    :param min_chars: minimum segment length; shorter segments are joined
+        with the following segment
+    :returns: list of segments, which joined with spaces equal `text`
+    """
+    if _TAG.search(text):
+        return [text]
+    segments = list()
+    pending = ""
+    for segment in _SEGMENT_BOUNDARY.split(text):
+        pending = f"{pending} {segment}" if pending else segment
+        if len(pending) >= min_chars:
+            segments.append(pending)
+            pending = ""
+    if pending:
+        if segments:
+            segments[-1] = f"{segments[-1]} {pending}"
+        else:
+            segments.append(pending)
+    return segments
@@ -106,8 +106,8 @@ def init_tts_plugin(plugin: str):
     Initialize a specified plugin. Useful for doing one-time initialization
     before deployment
     """
-    from ovos_plugin_manager.tts import load_tts_plugin
-    plug = load_tts_plugin(plugin)
+    from neon_audio.tts.plugins import load_tts_class
+    plug = load_tts_class(plugin)
     if plug:
         LOG.info(f"Initializing plugin: {plugin}")
         plug()
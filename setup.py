@@ -75,7 +75,8 @@ setup(
     packages=find_packages(),
     install_requires=get_requirements("requirements.txt"),
     extras_require={
-        "docker": get_requirements("docker.txt")
+        "docker": get_requirements("docker.txt"),
+        "server": get_requirements("server.txt")
     },
     zip_safe=True,
     classifiers=[
@@ -132,6 +132,25 @@ class TestAPIMethods(unittest.TestCase):
         self.assertIsInstance(resp, dict)
         self.assertEqual(resp.get("sentence"), text)
 
+    def test_get_tts_batch(self):
+        context = {"client": "tester",
+                   "ident": str(time()),
+                   "user": "TestRunner"}
+        items = list()
+        self.bus.on("neon.get_tts.batch.item",
+                    lambda m: items.append(m.data))
+        resp = self.bus.wait_for_response(
+            Message("neon.get_tts.batch",
+                    {"items": ["One", {"text": "Two", "id": "two"}, "One"]},
+                    dict(context)), context["ident"], timeout=60)
+        self.assertEqual(resp.data, {"total": 3, "unique": 2,
+                                     "succeeded": 3, "failed": 0})
+        self.assertEqual(sorted(i["index"] for i in items), [0, 1, 2])
+        item = [i for i in items if i["index"] == 1][0]
+        self.assertEqual(item["id"], "two")
+        self.assertEqual(list(item["responses"].values())[0]["sentence"],
+                         "Two")
+
     # TODO: Test with multiple languages
     def test_get_tts_valid_speaker(self):
         pass
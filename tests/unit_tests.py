@@ -31,9 +31,9 @@ import shutil
 import sys
 import unittest
 
-from time import time
+from time import sleep, time
 from os.path import join, dirname
-from threading import Event
+from threading import Event, Thread
 from unittest import skip
 from unittest.mock import Mock, patch
 from click.testing import CliRunner
@@ -48,6 +48,37 @@ sys.path.append(os.path.dirname(os.path.realpath(__file__)))
 from test_objects import DummyTTS, DummyTTSValidator
 
 
+def _get_test_service(**attrs):
+    """
+    Get a NeonPlaybackService with the state its handlers use, without
+    connecting to a bus or loading any plugins
+    :param attrs: service attributes to override
+    """
+    from threading import Condition, Lock
+    from neon_audio.service import NeonPlaybackService
+    service = NeonPlaybackService.__new__(NeonPlaybackService)
+    service.lock = Lock()
+    service._reload_lock = Lock()
+    service._idle_lock = Lock()
+    service._tts_released = Condition(service._idle_lock)
+    service._tts_users = dict()
+    service._tts_unloaded = False
+    service._tts_active = 0
+    service._tts_last_used = 0
+    service._tts_hash = "hash"
+    service._encoded_cache = None
+    service._playback_timeout = 120
+    service.queue_config = dict()
+    service.bus = Mock()
+    service.tts = Mock()
+    service.playback_thread = Mock(play_started=None, paused=False,
+                                   play_duration=None)
+    service.playback_thread.is_alive.return_value = True
+    for name, value in attrs.items():
+        setattr(service, name, value)
+    return service
+
+
 class TTSBaseClassTests(unittest.TestCase):
     lang = "en-us"
     config = {"key": "val"}
@@ -119,6 +150,8 @@ class TTSBaseClassTests(unittest.TestCase):
 
         self.assertEqual(valid_tag_string, self.tts.validate_ssml(valid_tag_string))
         self.assertEqual(valid_tag_string, self.tts.validate_ssml(extra_tags_string))
+        self.assertEqual(valid_tag_string,
+                         self.tts.canonical_sentence(" <SPEAK>hello</SPEAK>"))
 
     @skip("Method deprecated in ovos-audio")
     def test_preprocess_sentence(self):
@@ -160,8 +193,64 @@ class TTSBaseClassTests(unittest.TestCase):
         self.tts.get_multiple_tts = default_get_multiple_tts
 
     def test_get_multiple_tts(self):
-        # TODO
-        pass
+        def _get_tts(sentence, wav_file, **kwargs):
+            with open(wav_file, 'wb') as f:
+                f.write(b"ID3" + sentence.encode())
+            return wav_file, None
+
+        default_get_tts = self.tts.get_tts
+        self.tts.get_tts = _get_tts
+        memory_requests = self.tts.cache_stats.memory_requests
+        memory_hits = self.tts.cache_stats.memory_hits
+        message = Message("neon.get_tts", {"text": "memory tier test",
+                                           "speaker": {"name": "Neon",
+                                                       "language": "en-us",
+                                                       "gender": "female",
+                                                       "voice": None}})
+        responses = self.tts.get_multiple_tts(message)
+        self.assertEqual(responses["en-us"]["genders"], ["female"])
+        self.assertTrue(os.path.isfile(responses["en-us"]["female"]))
+        self.assertEqual(responses["en-us"]["audio"]["female"],
+                         "SUQzbWVtb3J5IHRpZXIgdGVzdA==")
+        # Repeated remote request is served from memory
+        self.tts.get_tts = Mock()
+        self.assertEqual(self.tts.get_multiple_tts(message), responses)
+        self.tts.get_tts.assert_not_called()
+        self.assertEqual(self.tts.cache_stats.memory_requests,
+                         memory_requests + 2)
+        self.assertEqual(self.tts.cache_stats.memory_hits, memory_hits + 1)
+        self.tts.get_tts = default_get_tts
+
+    def test_get_multiple_tts_routed(self):
+        from contextlib import nullcontext
+        routed = Mock(tts_name="routed")
+        routed.canonical_sentence.return_value = "validated by routed"
+        routed._synth_in_memory.return_value = ("SUQz", None, "routed.wav")
+        self.tts.router = Mock()
+        self.tts.router.engine.return_value = nullcontext(routed)
+        message = Message("neon.get_tts", {"text": " <b>routed</b> test",
+                                           "speaker": {"name": "Neon",
+                                                       "language": "en-us",
+                                                       "gender": "female",
+                                                       "voice": None}})
+        try:
+            responses = self.tts.get_multiple_tts(message)
+        finally:
+            self.tts.router = None
+        # SSML is validated by the routed engine, not the primary engine
+        routed.canonical_sentence.assert_called_once_with(
+            "<b>routed</b> test")
+        self.assertEqual(routed._synth_in_memory.call_args[0][0],
+                         "validated by routed")
+        self.assertEqual(responses["en-us"]["sentence"], "validated by routed")
+        self.assertFalse(responses["en-us"]["translated"])
+        # Memory cache entries are specific to the engine
+        self.assertIsNotNone(self.tts.memory_cache.get(
+            (routed.engine_id, "en-us", "female", None,
+             "validated by routed")))
+        self.assertIsNone(self.tts.memory_cache.get(
+            (self.tts.engine_id, "en-us", "female", None,
+             "validated by routed")))
 
     def test_viseme(self):
         # TODO: Legacy
@@ -190,6 +279,2141 @@ class TTSBaseClassTests(unittest.TestCase):
         self.assertIsNone(phonemes)
 
 
+class RequestedLanguagesTests(unittest.TestCase):
+    def test_tts_request(self):
+        from neon_audio.tts.neon import TTSRequest
+        request = TTSRequest("Neon", "en-us", "female", None)
+        self.assertEqual(request["language"], "en-us")
+        self.assertEqual(request.get("gender"), "female")
+        self.assertIsNone(request.get("invalid"))
+        with self.assertRaises(KeyError):
+            request["invalid"]
+        self.assertEqual(dict(request), {"speaker": "Neon",
+                                         "language": "en-us",
+                                         "gender": "female",
+                                         "voice": None})
+
+    def test_requested_languages_speaker(self):
+        from neon_audio.tts.neon import get_requested_tts_languages
+        message = Message("test", {"lang": "en-us",
+                                   "speaker": {"name": "Test",
+                                               "gender": "male"}})
+        requests = get_requested_tts_languages(message)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0]["speaker"], "Test")
+        self.assertEqual(requests[0]["language"], "en-us")
+        self.assertEqual(requests[0]["gender"], "male")
+        self.assertIsNone(requests[0]["voice"])
+
+    def test_requested_languages_profiles(self):
+        from neon_audio.tts.neon import get_requested_tts_languages
+        profiles = [{"user": {"username": "user1"},
+                     "speech": {"tts_language": "en-us",
+                                "secondary_tts_language": "uk-ua",
+                                "tts_gender": "male"}},
+                    {"user": {"username": "user2"},
+                     "speech": {"tts_language": "en-us",
+                                "tts_gender": "male"}}]
+        message = Message("test", {}, {"user_profiles": profiles})
+        requests = get_requested_tts_languages(message)
+        self.assertEqual([(r.language, r.gender) for r in requests],
+                         [("en-us", "male"), ("uk-ua", "male")])
+        # Equivalent profiles resolve to the same cached requests
+        cached = get_requested_tts_languages(Message("test", {}, {
+            "nick_profiles": [dict(p) for p in profiles]}))
+        self.assertEqual(requests, cached)
+        for request, cached_request in zip(requests, cached):
+            self.assertIs(request, cached_request)
+
+    @patch("neon_utils.configuration_utils.get_neon_user_config")
+    def test_requested_languages_user_config(self, get_config):
+        from neon_audio.tts.neon import get_requested_tts_languages
+        from tempfile import mkstemp
+        _, config_file = mkstemp()
+        user_config = Mock()
+        user_config.file_path = config_file
+        user_config.__getitem__ = Mock(return_value={
+            "tts_language": "en-us", "tts_gender": "female",
+            "neon_voice": None, "secondary_tts_language": "fr-fr",
+            "secondary_tts_gender": "", "secondary_neon_voice": None})
+        get_config.return_value = user_config
+        requests = get_requested_tts_languages(Message("test"))
+        self.assertEqual([(r.language, r.gender) for r in requests],
+                         [("en-us", "female"), ("fr-fr", "female")])
+        get_config.assert_called_once()
+
+        # Config is not re-read until the file changes
+        self.assertEqual(get_requested_tts_languages(Message("test")),
+                         requests)
+        get_config.assert_called_once()
+        os.utime(config_file, (time() + 10, time() + 10))
+        get_requested_tts_languages(Message("test"))
+        self.assertEqual(get_config.call_count, 2)
+        os.remove(config_file)
+
+
+class HedgedSynthesisTests(unittest.TestCase):
+    def _get_mock_tts(self, primary_delay, fallback_delay):
+        from concurrent.futures import ThreadPoolExecutor
+        from time import sleep
+
+        def _synth(result, delay):
+            def synth(sentence, **kwargs):
+                sleep(delay)
+                if isinstance(result, Exception):
+                    raise result
+                return result, None
+            return synth
+
+        tts = Mock()
+        tts.hedge_config = {"enabled": True, "budget_seconds": 0.1}
+        tts._hedge_executor = ThreadPoolExecutor(2)
+        tts.synth = _synth("primary.wav", primary_delay)
+        tts.fallback_engine.synth = _synth("fallback.wav", fallback_delay)
+        return tts, _synth
+
+    def test_primary_within_budget(self):
+        from neon_audio.tts.neon import WrappedTTS
+        tts, _ = self._get_mock_tts(0, 0)
+        message = Message("test")
+        audio, _ = WrappedTTS._hedged_synth(tts, "test", message)
+        self.assertEqual(audio, "primary.wav")
+        tts._report_hedge.assert_called_once_with("primary", False, message)
+
+    def test_fallback_wins(self):
+        from neon_audio.tts.neon import WrappedTTS
+        tts, _ = self._get_mock_tts(2, 0)
+        message = Message("test")
+        start = time()
+        audio, _ = WrappedTTS._hedged_synth(tts, "test", message)
+        self.assertEqual(audio, "fallback.wav")
+        self.assertLess(time() - start, 1)
+        tts._report_hedge.assert_called_once_with("fallback", True, message)
+
+    def test_primary_wins_after_hedge(self):
+        from neon_audio.tts.neon import WrappedTTS
+        tts, _ = self._get_mock_tts(0.2, 2)
+        message = Message("test")
+        audio, _ = WrappedTTS._hedged_synth(tts, "test", message)
+        self.assertEqual(audio, "primary.wav")
+        tts._report_hedge.assert_called_once_with("primary", True, message)
+
+    def test_fallback_error(self):
+        from neon_audio.tts.neon import WrappedTTS
+        tts, synth = self._get_mock_tts(0.2, 0)
+        tts.fallback_engine.synth = synth(RuntimeError("test"), 0)
+        audio, _ = WrappedTTS._hedged_synth(tts, "test", Message("test"))
+        self.assertEqual(audio, "primary.wav")
+
+        tts.synth = synth(RuntimeError("test"), 0.2)
+        with self.assertRaises(RuntimeError):
+            WrappedTTS._hedged_synth(tts, "test", Message("test"))
+
+    def test_report_hedge(self):
+        from threading import Lock
+        from neon_audio.tts.neon import WrappedTTS
+        tts = Mock()
+        tts._hedge_lock = Lock()
+        tts.hedge_stats = {"requests": 0, "hedged": 0,
+                           "primary_wins": 0, "fallback_wins": 0}
+        WrappedTTS._report_hedge(tts, "primary", False, Message("test"))
+        tts.bus.emit.assert_not_called()
+        WrappedTTS._report_hedge(tts, "fallback", True, Message("test"))
+        self.assertEqual(tts.hedge_stats, {"requests": 2, "hedged": 1,
+                                           "primary_wins": 1,
+                                           "fallback_wins": 1})
+        metric = tts.bus.emit.call_args[0][0]
+        self.assertEqual(metric.msg_type, "neon.metric")
+        self.assertEqual(metric.data["hedge_rate"], 0.5)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def test_circuit_breaker_disabled(self):
+        from neon_audio.tts.circuit_breaker import CircuitBreaker
+        breaker = CircuitBreaker("test")
+        for _ in range(10):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, breaker.CLOSED)
+
+    def test_circuit_breaker_states(self):
+        from time import sleep
+        from neon_audio.tts.circuit_breaker import CircuitBreaker, \
+            CircuitOpenError
+        on_change = Mock()
+        breaker = CircuitBreaker("test", {"enabled": True, "min_calls": 4,
+                                          "failure_rate": 0.5,
+                                          "reset_seconds": 0.2}, on_change)
+        failing = Mock(side_effect=ConnectionError("test"))
+        breaker.call(lambda: True)
+        breaker.call(lambda: True)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                breaker.call(failing)
+        self.assertEqual(breaker.state, breaker.OPEN)
+        self.assertEqual(breaker.current_failure_rate, 0.5)
+        on_change.assert_called_once_with("test", breaker.OPEN)
+
+        # Calls are rejected without calling the dependency
+        with self.assertRaises(CircuitOpenError):
+            breaker.call(failing)
+        self.assertEqual(failing.call_count, 2)
+
+        # A failed trial call re-opens the breaker
+        sleep(0.2)
+        self.assertEqual(breaker.state, breaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, breaker.OPEN)
+
+        # A successful trial call closes the breaker
+        sleep(0.2)
+        self.assertTrue(breaker.call(lambda: True))
+        self.assertEqual(breaker.state, breaker.CLOSED)
+        self.assertEqual(on_change.call_args[0], ("test", breaker.CLOSED))
+
+    def test_state_change_callback(self):
+        from neon_audio.tts.circuit_breaker import CircuitBreaker
+        states = list()
+
+        def _on_change(name, state):
+            # Callbacks may use the breaker
+            states.append((state, breaker.state, breaker.allow()))
+        breaker = CircuitBreaker("test", {"enabled": True, "min_calls": 1},
+                                 _on_change)
+        thread = Thread(target=breaker.record_failure, daemon=True)
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(states, [(breaker.OPEN, breaker.OPEN, False)])
+
+    def test_translate_fallback(self):
+        from neon_audio.tts.circuit_breaker import CircuitBreaker
+        from neon_audio.tts.neon import WrappedTTS
+        from neon_audio.tracing import Tracer
+        tts = Mock()
+        tts._tracer = Tracer()
+
+        class TranslationCache(dict):
+            store = Mock()
+        tts.cached_translations = TranslationCache()
+        tts._detect_lang.return_value = None
+        tts.translator.translate = Mock(side_effect=ConnectionError("test"))
+        tts.translator_breaker = CircuitBreaker("translator")
+        with self.assertRaises(ConnectionError):
+            WrappedTTS._translate(tts, "hello", "es", "en", Message("test"))
+
+        tts.translator_breaker = CircuitBreaker("translator",
+                                                {"enabled": True})
+        self.assertEqual(WrappedTTS._translate(tts, "hello", "es", "en",
+                                               Message("test")), "hello")
+        self.assertEqual(tts.cached_translations["es"], dict())
+
+        tts.translator.translate = Mock(return_value="hola")
+        self.assertEqual(WrappedTTS._translate(tts, "hello", "es", "en",
+                                               Message("test")), "hola")
+        self.assertEqual(tts.cached_translations["es"]["hello"], "hola")
+        tts.cached_translations.store.assert_called_once()
+
+    def test_translate_skip_detected_lang(self):
+        from neon_audio.tts.neon import WrappedTTS
+        from neon_audio.tracing import Tracer
+        tts = Mock()
+        tts._tracer = Tracer()
+
+        class TranslationCache(dict):
+            store = Mock()
+        tts.cached_translations = TranslationCache(es={"hello": "hola"})
+        tts._detect_lang.return_value = "es-es"
+        self.assertEqual(WrappedTTS._translate(tts, "hello", "es", "en",
+                                               Message("test")), "hola")
+        tts.phrase_stats.record_translation.assert_called_once_with(True)
+        self.assertEqual(WrappedTTS._translate(tts, "buenos días", "es-mx",
+                                               "en", Message("test")),
+                         "buenos días")
+        tts.translator.translate.assert_not_called()
+        tts.phrase_stats.record_skipped_translation.assert_called_once()
+
+        tts._detect_lang.return_value = None
+        tts.translator_breaker.call = lambda f, *args: f(*args)
+        tts.translator.translate.return_value = "hola"
+        WrappedTTS._translate(tts, "hello there", "es", "en", Message("test"))
+        tts.translator.translate.assert_called_once_with("hello there", "es",
+                                                         "en")
+        tts.phrase_stats.record_translation.assert_called_with(False)
+
+    def test_detect_lang(self):
+        from neon_audio.tts.neon import WrappedTTS
+        tts = Mock()
+        tts.skip_translation_config = dict()
+        tts.lang_detector.detect_probs.return_value = {"es": 0.95, "pt": 0.05}
+        self.assertEqual(WrappedTTS._detect_lang(
+            tts, '<speak>buenos <break time="1s"/>días</speak>'), "es")
+        tts.lang_detector.detect_probs.assert_called_once_with(
+            "buenos días")
+
+        # Short or ambiguous text is not detected
+        self.assertIsNone(WrappedTTS._detect_lang(tts, "<speak>si</speak>"))
+        tts.lang_detector.detect_probs.return_value = {"es": 0.6, "pt": 0.4}
+        self.assertIsNone(WrappedTTS._detect_lang(tts, "buenos días"))
+        tts.skip_translation_config = {"min_confidence": 0.5}
+        self.assertEqual(WrappedTTS._detect_lang(tts, "buenos días"), "es")
+
+        tts.lang_detector.detect_probs.side_effect = RuntimeError("test")
+        self.assertIsNone(WrappedTTS._detect_lang(tts, "buenos días"))
+        tts.skip_translation_config = {"enabled": False}
+        tts.lang_detector.detect_probs.reset_mock()
+        self.assertIsNone(WrappedTTS._detect_lang(tts, "buenos días"))
+        tts.lang_detector.detect_probs.assert_not_called()
+        tts.lang_detector = None
+        tts.skip_translation_config = dict()
+        self.assertIsNone(WrappedTTS._detect_lang(tts, "buenos días"))
+
+    def test_synth_circuit_open(self):
+        from neon_audio.tts.circuit_breaker import CircuitOpenError
+        from neon_audio.tts.neon import WrappedTTS
+        tts = Mock()
+        tts.engine_breaker.allow.return_value = False
+        tts.fallback_engine.synth.return_value = ("fallback.wav", None)
+        self.assertEqual(WrappedTTS._hedged_synth(tts, "test",
+                                                  Message("test"))[0],
+                         "fallback.wav")
+        tts.synth.assert_not_called()
+        tts.fallback_engine = None
+        with self.assertRaises(CircuitOpenError):
+            WrappedTTS._hedged_synth(tts, "test", Message("test"))
+
+
+class CacheTests(unittest.TestCase):
+    def setUp(self):
+        from tempfile import mkdtemp
+        self.cache_dir = mkdtemp()
+        self.audio_dir = join(self.cache_dir, "tts", "DummyTTS", "en-us",
+                              "female")
+        os.makedirs(self.audio_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _add_entry(self, name, size, age):
+        path = join(self.audio_dir, name)
+        with open(path, 'wb') as f:
+            f.write(b"ID3" + b"\0" * (size - 3) if size else b"")
+        os.utime(path, (time() - age, time() - age))
+        return path
+
+    def test_prune_cache(self):
+        from neon_audio.tts.cache import prune_cache, scan_cache, \
+            touch_cache_entry
+        old = self._add_entry("old.mp3", 100, 86400 * 10)
+        lru = self._add_entry("lru.mp3", 100, 600)
+        recent = self._add_entry("recent.mp3", 100, 300)
+        mtime = os.stat(lru).st_mtime_ns
+        touch_cache_entry(lru)
+        self.assertEqual(os.stat(lru).st_mtime_ns, mtime)
+        self.assertEqual(len(scan_cache(self.cache_dir)), 3)
+
+        self.assertEqual(prune_cache(self.cache_dir, max_age=86400), [old])
+        self.assertEqual(prune_cache(self.cache_dir, max_bytes=100), [recent])
+        self.assertEqual([e.path for e in scan_cache(self.cache_dir)], [lru])
+
+    def test_verify_cache(self):
+        from neon_audio.tts.audio_processing import write_wav
+        from neon_audio.tts.cache import verify_cache
+        import numpy as np
+        self._add_entry("valid.mp3", 100, 0)
+        empty = self._add_entry("empty.mp3", 0, 0)
+        write_wav(join(self.audio_dir, "valid.wav"),
+                  np.zeros((100, 1), dtype=np.float32), 16000)
+        invalid_wav = join(self.audio_dir, "invalid.wav")
+        with open(invalid_wav, 'w') as f:
+            f.write("invalid")
+        self.assertEqual(set(verify_cache(self.cache_dir)),
+                         {empty, invalid_wav})
+        verify_cache(self.cache_dir, remove=True)
+        self.assertEqual(verify_cache(self.cache_dir), [])
+
+    def test_cache_stats(self):
+        from neon_audio.tts.cache import CacheStats, get_cache_stats, \
+            track_cache_misses
+        self._add_entry("test.mp3", 100, 0)
+        stats = CacheStats(self.cache_dir)
+        get_tts = track_cache_misses(lambda sentence, wav_file: (wav_file,
+                                                                 None),
+                                     stats)
+        for _ in range(4):
+            stats.record_request()
+        get_tts("test", "test.mp3")
+        self.assertEqual(stats.hit_rate, 0.75)
+        self.assertIsNone(stats.memory_hit_rate)
+        stats.record_memory_request(True)
+        stats.record_memory_request(False)
+        stats.save()
+        self.assertEqual(get_cache_stats(self.cache_dir),
+                         {"size": 100, "entries": 1, "requests": 4,
+                          "hits": 3, "misses": 1, "hit_rate": 0.75,
+                          "memory": {"requests": 2, "hits": 1,
+                                     "hit_rate": 0.5}})
+
+    def test_audio_memory_cache(self):
+        from neon_audio.tts.cache import AudioMemoryCache, MemoryCacheEntry
+        path = join(self.cache_dir, "tts", "evicted.wav")
+        cache = AudioMemoryCache(max_bytes=100)
+        first = MemoryCacheEntry(path, b"a" * 10, "b" * 30, None)
+        second = MemoryCacheEntry(None, b"c" * 10, "d" * 30, "phonemes")
+        cache.put("first", first)
+        cache.put("second", second)
+        self.assertIsNone(cache.get("third"))
+        # Accessed entries are retained
+        self.assertEqual(cache.get("first"), first)
+        cache.put("third", MemoryCacheEntry(None, b"", "e" * 40, None))
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.size, 80)
+        self.assertFalse(os.path.exists(path))
+        # Evicted entries are written to disk if missing
+        cache.put("fourth", MemoryCacheEntry(None, b"", "f" * 40, None))
+        self.assertIsNone(cache.get("first"))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), first.audio)
+        # Entries larger than the cache are not added
+        cache.put("large", MemoryCacheEntry(None, b"g" * 101, "", None))
+        self.assertEqual(len(cache), 2)
+
+    @patch("neon_audio.tts.cache.b64decode")
+    def test_audio_memory_cache_put_encoded(self, b64decode):
+        from base64 import b64encode
+        from neon_audio.tts.cache import AudioMemoryCache
+        b64decode.return_value = b"audio"
+        encoded = b64encode(b"audio").decode()
+        cache = AudioMemoryCache(on_evict=None)
+        self.assertTrue(cache.put_encoded("key", None, encoded, "phonemes"))
+        self.assertEqual(cache.get("key").audio, b"audio")
+        self.assertEqual(cache.get("key").phonemes, "phonemes")
+        # Audio is not decoded again for a cached key
+        self.assertFalse(cache.put_encoded("key", None, encoded, None))
+        b64decode.assert_called_once_with(encoded)
+        self.assertEqual(cache.get("key").phonemes, "phonemes")
+
+    def test_encode_audio_file(self):
+        from base64 import b64encode
+        from neon_audio.tts.cache import encode_audio_file
+        for size in (0, 1, 2, 3, 1000, 3 * 65536 + 1):
+            path = self._add_entry("test.mp3", size, 0)
+            with open(path, 'rb') as f:
+                expected = b64encode(f.read()).decode('utf-8')
+            self.assertEqual(encode_audio_file(path, chunk_size=300),
+                             expected)
+            self.assertEqual(encode_audio_file(path), expected)
+        with self.assertRaises(ValueError):
+            encode_audio_file(path, chunk_size=100)
+
+    def test_encoded_audio_cache(self):
+        import neon_audio.tts.cache as tts_cache
+        from neon_audio.tts.cache import touch_cache_entry
+        cache = tts_cache.EncodedAudioCache(max_bytes=300)
+        first = self._add_entry("first.mp3", 150, 0)
+        second = self._add_entry("second.mp3", 150, 0)
+        with patch.object(tts_cache, "encode_audio_file",
+                          wraps=tts_cache.encode_audio_file) as encode:
+            encoded = cache.get(first)
+            self.assertEqual(cache.get(first), encoded)
+            encode.assert_called_once_with(first)
+            self.assertEqual(cache.size, 200)
+
+            # Least-recently used entries are evicted
+            cache.get(second)
+            self.assertEqual(len(cache), 1)
+            cache.get(first)
+            self.assertEqual(encode.call_count, 3)
+
+            # Touched files are still cached
+            touch_cache_entry(first)
+            self.assertEqual(cache.get(first), encoded)
+            self.assertEqual(encode.call_count, 3)
+
+            # Modified files are re-encoded, replacing the stale encoding
+            self._add_entry("first.mp3", 90, 0)
+            self.assertNotEqual(cache.get(first), encoded)
+            self.assertEqual(encode.call_count, 4)
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.size, 120)
+
+    def test_cache_janitor(self):
+        from time import sleep
+        from neon_audio.tts.cache import start_cache_janitor, scan_cache
+        self.assertIsNone(start_cache_janitor(self.cache_dir, {}))
+        self._add_entry("old.mp3", 100, 86400 * 10)
+        janitor = start_cache_janitor(self.cache_dir, {"max_age_days": 1})
+        self.assertIs(start_cache_janitor(self.cache_dir,
+                                          {"max_age_days": 1}), janitor)
+        timeout = time() + 5
+        while scan_cache(self.cache_dir) and time() < timeout:
+            sleep(0.1)
+        self.assertEqual(scan_cache(self.cache_dir), [])
+        janitor.stop()
+        janitor.join(5)
+        self.assertFalse(janitor.is_alive())
+
+
+class PhraseStatsTests(unittest.TestCase):
+    def test_phrase_stats(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import PhraseStats
+        cache_dir = mkdtemp()
+        stats = PhraseStats(cache_dir, capacity=2)
+        stats.record("Hello", "en-us", "female", None, 1.0, False)
+        stats.record("Hello", "en-us", "female", None, 0.5, True)
+        stats.record("Hello", "de-de", "female", None, 1.0, False)
+        top = stats.top()
+        self.assertEqual(len(top), 2)
+        self.assertEqual(top[0], {"text": "Hello", "lang": "en-us",
+                                  "gender": "female", "voice": None,
+                                  "count": 2, "error": 0,
+                                  "synth_seconds": 1.5,
+                                  "hits": 1, "misses": 1})
+
+        # Least frequent phrase is replaced and its count carried over
+        stats.record("Goodbye", "en-us", "male", None, 1.0, False)
+        top = stats.top()
+        self.assertEqual([p["text"] for p in top], ["Hello", "Goodbye"])
+        self.assertEqual(top[1]["count"], 2)
+        self.assertEqual(top[1]["error"], 1)
+        self.assertEqual(stats.top(1), top[:1])
+
+        stats.record_translation(True)
+        stats.record_translation(False)
+        stats.record_skipped_translation()
+        stats.save()
+        loaded = PhraseStats(cache_dir)
+        self.assertEqual(loaded.top(), top)
+        self.assertEqual(loaded.translations, {"hits": 1, "misses": 1,
+                                               "skipped": 1})
+        shutil.rmtree(cache_dir)
+
+    def test_phrase_stats_eviction(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import PhraseStats
+        cache_dir = mkdtemp()
+        stats = PhraseStats(cache_dir, capacity=3)
+        for text, repeat in (("a", 3), ("b", 2), ("c", 1)):
+            for _ in range(repeat):
+                stats.record(text, "en-us", "female", None, 0.1, False)
+        # The least frequent phrase is evicted, not the least recent
+        stats.record("d", "en-us", "female", None, 0.1, False)
+        self.assertEqual({p["text"]: p["count"] for p in stats.top()},
+                         {"a": 3, "b": 2, "d": 2})
+        stats.record("a", "en-us", "female", None, 0.1, False)
+        stats.record("b", "en-us", "female", None, 0.1, False)
+        stats.record("e", "en-us", "female", None, 0.1, False)
+        self.assertEqual({p["text"]: p["count"] for p in stats.top()},
+                         {"a": 4, "b": 3, "e": 3})
+
+        # Out of date heap entries are bounded
+        for _ in range(100):
+            stats.record("a", "en-us", "female", None, 0.1, False)
+        self.assertLessEqual(len(stats._heap), 6)
+
+        # Loaded phrases can be evicted
+        stats.record("e", "en-us", "female", None, 0.1, False)
+        stats.save()
+        loaded = PhraseStats(cache_dir, capacity=3)
+        loaded.record("f", "en-us", "female", None, 0.1, False)
+        self.assertEqual({p["text"]: p["count"] for p in loaded.top()},
+                         {"a": 104, "e": 4, "f": 4})
+        shutil.rmtree(cache_dir)
+
+    def test_track_synthesis(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import track_synthesis
+        from neon_audio.tts.cache import CacheStats, track_cache_misses
+        cache_dir = mkdtemp()
+        get_tts = track_cache_misses(Mock(), CacheStats(cache_dir))
+        with track_synthesis() as record:
+            pass
+        self.assertFalse(record["miss"])
+        with track_synthesis() as record:
+            get_tts("test")
+        self.assertTrue(record["miss"])
+        # Untracked calls are ignored
+        get_tts("test")
+        shutil.rmtree(cache_dir)
+
+    @patch("ovos_plugin_manager.templates.tts.Configuration")
+    def test_shared_stats(self, config):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import PhraseStats, \
+            get_shared_phrase_stats
+        from neon_audio.tts.cache import CacheStats, get_shared_cache_stats
+        config.return_value = {}
+        cache_dir = mkdtemp()
+        with patch("neon_audio.tts.neon.JsonStorageXDG") as storage:
+            storage.return_value.path = join(cache_dir, "tx_cache.json")
+            primary = WrappedTTS(DummyTTS, "en-us", {})
+            routed = WrappedTTS(DummyTTS, "de-de", {})
+        self.assertEqual(primary.cache_dir, cache_dir)
+        # Engines share statistics so saves do not overwrite each other
+        self.assertIs(primary.cache_stats, routed.cache_stats)
+        self.assertIs(primary.phrase_stats, routed.phrase_stats)
+        self.assertIs(primary.cache_stats, get_shared_cache_stats(cache_dir))
+        self.assertIs(primary.phrase_stats,
+                      get_shared_phrase_stats(cache_dir))
+        primary.phrase_stats.record("Hello", "en-us", "female", None, 1.0,
+                                    False)
+        routed.phrase_stats.record("Hallo", "de-de", "female", None, 1.0,
+                                   False)
+        routed.cache_stats.record_request()
+        primary.cache_stats.record_request()
+        routed.save_stats()
+        primary.save_stats()
+        self.assertEqual(len(PhraseStats(cache_dir).top()), 2)
+        self.assertEqual(CacheStats(cache_dir).requests, 2)
+        primary.shutdown()
+        routed.shutdown()
+        shutil.rmtree(cache_dir)
+
+    def test_get_warmup_phrases(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import PhraseStats, get_warmup_phrases
+        cache_dir = mkdtemp()
+        stats = PhraseStats(cache_dir)
+        for _ in range(3):
+            stats.record("Hello", "en-us", "female", "v1", 1.0, False)
+        stats.record("Once", "en-us", "female", None, 1.0, False)
+        stats.save()
+        self.assertEqual(get_warmup_phrases(cache_dir),
+                         [{"text": "Hello", "lang": "en-us",
+                           "gender": "female", "voice": "v1"}])
+        self.assertEqual(len(get_warmup_phrases(cache_dir, min_count=1)), 2)
+        shutil.rmtree(cache_dir)
+
+
+class TracingTests(unittest.TestCase):
+    def test_tracer_disabled(self):
+        from neon_audio.tracing import Tracer
+        tracer = Tracer()
+        message = Message("test")
+        with tracer.span("test", message) as span:
+            self.assertIsNone(span)
+        tracer.inject(message)
+        self.assertNotIn("trace", message.context)
+
+    def test_tracer_spans(self):
+        import json
+        from tempfile import mkdtemp
+        from neon_audio.tracing import Tracer
+        trace_dir = mkdtemp()
+        tracer = Tracer({"enabled": True, "path": trace_dir,
+                         "max_events_per_file": 3, "max_files": 2})
+        message = Message("test", context={"speak_ident": "ident"})
+        with tracer.span("parent", message) as parent:
+            with tracer.span("child", message) as child:
+                self.assertEqual(child.parent_id, parent.span_id)
+                self.assertEqual(child.trace_id, "ident")
+            tracer.inject(message)
+        self.assertEqual(message.context["trace"]["parent_id"],
+                         parent.span_id)
+        self.assertGreater(parent.duration, child.duration)
+
+        # Queue wait is linked to the span that queued the message
+        tracer.record_queue_wait(message)
+        trace_files = os.listdir(trace_dir)
+        self.assertEqual(len(trace_files), 1)
+        with open(join(trace_dir, trace_files[0])) as f:
+            events = json.load(f)["traceEvents"]
+        self.assertEqual([e["name"] for e in events],
+                         ["child", "parent", "queue_wait"])
+        self.assertEqual(events[2]["args"]["parent_id"], parent.span_id)
+        self.assertEqual({e["ph"] for e in events}, {"X"})
+
+        # Each item queued for a message gets its own queue wait
+        tracer.max_events = 100
+        tracer.inject(message)
+        sleep(0.01)
+        tracer.inject(message)
+        tracer.record_queue_wait(message)
+        tracer.record_queue_wait(message)
+        tracer.record_queue_wait(message)
+        waits = [e for e in tracer._events if e["name"] == "queue_wait"]
+        self.assertEqual(len(waits), 2)
+        self.assertGreater(waits[0]["dur"], waits[1]["dur"])
+        tracer._events.clear()
+        tracer.max_events = 3
+
+        # Old trace files are rotated out
+        for _ in range(9):
+            with tracer.span("test"):
+                pass
+        tracer.flush()
+        self.assertEqual(len(os.listdir(trace_dir)), 2)
+        shutil.rmtree(trace_dir)
+
+
+class BatchTTSTests(unittest.TestCase):
+    def test_handle_get_tts_batch(self):
+        from neon_audio.service import NeonPlaybackService
+        from contextlib import contextmanager
+        service = Mock()
+        service.bus = FakeBus()
+        service.use_tts = contextmanager(lambda *_: (yield service.tts))
+        service.tts.get_multiple_tts.side_effect = \
+            lambda msg: {"en-us": {"sentence": msg.data["text"]}}
+        items = list()
+        summary = list()
+        service.bus.on("neon.get_tts.batch.item",
+                       lambda m: items.append(m.data))
+        service.bus.on("test_batch", lambda m: summary.append(m.data))
+        message = Message("neon.get_tts.batch",
+                          {"items": ["One", {"text": "Two", "id": "two"},
+                                     "One", {"id": "bad"}],
+                           "lang": "en-us"}, {"ident": "test_batch"})
+        NeonPlaybackService.handle_get_tts_batch(service, message)
+
+        # Repeated text is only synthesized once
+        self.assertEqual(service.tts.get_multiple_tts.call_count, 2)
+        request = service.tts.get_multiple_tts.call_args[0][0]
+        self.assertEqual(request.msg_type, "neon.get_tts")
+        self.assertEqual(request.data["lang"], "en-us")
+        self.assertEqual(request.context["ident"], "test_batch")
+
+        self.assertEqual(sorted(i["index"] for i in items), [0, 1, 2, 3])
+        by_index = {i["index"]: i for i in items}
+        self.assertEqual(by_index[1]["id"], "two")
+        self.assertEqual(by_index[2]["responses"],
+                         {"en-us": {"sentence": "One"}})
+        self.assertEqual(by_index[3]["id"], "bad")
+        self.assertIn("error", by_index[3])
+        self.assertEqual(summary, [{"total": 4, "unique": 2,
+                                    "succeeded": 3, "failed": 1}])
+
+        # Invalid request
+        NeonPlaybackService.handle_get_tts_batch(
+            service, Message("neon.get_tts.batch", {},
+                             {"ident": "test_batch"}))
+        self.assertEqual(summary[-1], {"error": "No items provided."})
+
+
+class BulkSynthesisTests(unittest.TestCase):
+    def test_run_bulk_synthesis(self):
+        import json
+        from tempfile import mkdtemp
+        from neon_audio.synth import run_bulk_synthesis, MANIFEST_FILENAME
+        test_dir = mkdtemp()
+        input_file = join(test_dir, "input.jsonl")
+        output_dir = join(test_dir, "output")
+        with open(input_file, 'w') as f:
+            f.write('"One"\n')
+            f.write(json.dumps({"id": "two", "text": "Two",
+                                "lang": "de-de", "gender": "male"}) + "\n")
+            f.write('"One"\n')
+            f.write(json.dumps({"id": "fail", "text": "Fail"}) + "\n")
+
+        def _get_tts(message):
+            if message.data["text"] == "Fail":
+                raise RuntimeError("Synthesis failed")
+            speaker = message.data["speaker"]
+            wav_file = join(test_dir, f"{message.data['text']}.wav")
+            with open(wav_file, 'w') as f:
+                f.write(message.data["text"])
+            return {speaker["language"]: {
+                "sentence": message.data["text"],
+                "genders": [speaker["gender"]],
+                speaker["gender"]: wav_file}}
+
+        engine = Mock(lang="en-us")
+        engine.get_multiple_tts.side_effect = _get_tts
+        progress = Mock()
+        summary = run_bulk_synthesis(input_file, output_dir,
+                                     on_progress=progress, engine=engine)
+        self.assertEqual(summary["total"], 4)
+        self.assertEqual(summary["cached"], 0)
+        self.assertEqual(summary["duplicates"], 1)
+        self.assertEqual(summary["completed"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertIn("fail", summary["errors"])
+        self.assertEqual(progress.call_count, 3)
+        self.assertEqual(progress.call_args[0][:2], (3, 3))
+        self.assertTrue(os.path.isfile(join(output_dir, "two.wav")))
+
+        with open(join(output_dir, MANIFEST_FILENAME)) as f:
+            manifest = [json.loads(line) for line in f]
+        self.assertEqual(len(manifest), 2)
+        entry = [e for e in manifest if e["id"] == "two"][0]
+        self.assertEqual(entry["lang"], "de-de")
+        self.assertEqual(entry["gender"], "male")
+        self.assertEqual(entry["file"], "two.wav")
+
+        # Completed items are skipped on resume
+        engine.get_multiple_tts.reset_mock()
+        summary = run_bulk_synthesis(input_file, output_dir, engine=engine)
+        self.assertEqual(summary["cached"], 2)
+        self.assertEqual(summary["duplicates"], 1)
+        engine.get_multiple_tts.assert_called_once()
+        self.assertEqual(
+            engine.get_multiple_tts.call_args[0][0].data["text"], "Fail")
+        shutil.rmtree(test_dir)
+
+
+class HotReloadTests(unittest.TestCase):
+    def _get_service(self):
+        from threading import Condition, Lock
+        from neon_audio.service import NeonPlaybackService
+        service = Mock()
+        service.lock = Lock()
+        service._reload_lock = Lock()
+        service._idle_lock = Lock()
+        service._tts_released = Condition(service._idle_lock)
+        service._tts_users = dict()
+        service._tts_module = "old_module"
+        service._tts_hash = hash("{}")
+        service._tts_config_changed = lambda config: \
+            NeonPlaybackService._tts_config_changed(service, config)
+        return service
+
+    def test_tts_config_changed(self):
+        service = self._get_service()
+        self.assertFalse(service._tts_config_changed(
+            {"module": "old_module"}))
+        self.assertTrue(service._tts_config_changed(
+            {"module": "old_module", "old_module": {"voice": "new"}}))
+        self.assertTrue(service._tts_config_changed({"module": "new_module"}))
+
+    @patch("neon_audio.service.TTSFactory")
+    def test_hot_reload_tts(self, factory):
+        from neon_audio.service import NeonPlaybackService
+        service = self._get_service()
+        old_tts = service.tts
+        new_tts = Mock()
+        factory.create.return_value = new_tts
+        config = {"module": "new_module", "new_module": {"voice": "test"}}
+
+        NeonPlaybackService._hot_reload_tts(service, config)
+        factory.create.assert_called_once_with(config)
+        new_tts.init.assert_called_once_with(service.bus,
+                                             service.playback_thread)
+        self.assertEqual(service.tts, new_tts)
+        self.assertEqual(service._tts_module, "new_module")
+        self.assertEqual(new_tts.encoded_cache, old_tts.encoded_cache)
+        old_tts.save_stats.assert_called_once()
+        service.playback_thread.attach_tts.assert_called_once_with(new_tts)
+        service._retire_tts.assert_called_once_with(old_tts)
+        self.assertEqual(service.bus.emit.call_args[0][0].msg_type,
+                         "neon.audio.tts_reloaded")
+
+        # Config already loaded
+        NeonPlaybackService._hot_reload_tts(service, config)
+        factory.create.assert_called_once()
+
+        # Failed load keeps the current engine
+        factory.create.side_effect = RuntimeError("Load failed")
+        NeonPlaybackService._hot_reload_tts(service, {"module": "broken"})
+        self.assertEqual(service.tts, new_tts)
+
+    @patch("neon_audio.service.TTSFactory")
+    def test_hot_reload_waits_for_requests(self, factory):
+        from neon_audio.service import NeonPlaybackService
+        service = self._get_service()
+        service.use_tts = lambda: NeonPlaybackService.use_tts(service)
+        service._ensure_tts = lambda trigger: service.tts
+        service._tts_active = 0
+        old_tts = service.tts
+        factory.create.return_value = new_tts = Mock()
+        config = {"module": "new_module"}
+        with service.use_tts() as tts:
+            self.assertEqual(tts, old_tts)
+            reload = Thread(target=NeonPlaybackService._hot_reload_tts,
+                            args=(service, config))
+            reload.start()
+            timeout = time() + 5
+            while service.tts is old_tts and time() < timeout:
+                sleep(0.01)
+            # New requests use the new engine while the old one is retiring
+            self.assertEqual(service.tts, new_tts)
+            with service.use_tts() as tts:
+                self.assertEqual(tts, new_tts)
+            sleep(0.1)
+            service._retire_tts.assert_not_called()
+        reload.join(5)
+        service._retire_tts.assert_called_once_with(old_tts)
+        self.assertEqual(service._tts_users, dict())
+
+    def test_retire_tts(self):
+        tts = WrappedTTS(DummyTTS, "en-us", {})
+        tts._plugin_stop = Mock()
+        tts._hedge_executor = Mock()
+        tts.stop()
+        tts._plugin_stop.assert_called_once()
+        tts.retire()
+        self.assertTrue(tts.retired)
+        tts._hedge_executor.shutdown.assert_called_once_with(wait=True)
+        # Retired engine does not stop shared playback
+        tts._plugin_stop.assert_called_once()
+
+
+class EngineRouterTests(unittest.TestCase):
+    routes = [{"lang": "de", "module": "german"},
+              {"lang": "en-gb", "module": "british", "memory_mb": 300},
+              {"lang": "en", "voice": "narrator", "module": "narrator",
+               "memory_mb": 300},
+              {"lang": "fr-fr", "module": "french"}]
+
+    def test_get_module(self):
+        from neon_audio.tts.router import EngineRouter
+        router = EngineRouter({"routes": self.routes}, Mock())
+        self.assertEqual(router.get_module("de-de"), "german")
+        self.assertEqual(router.get_module("en-GB"), "british")
+        self.assertEqual(router.get_module("en-gb", "narrator"), "narrator")
+        self.assertEqual(router.get_module("en-us", "narrator"), "narrator")
+        self.assertIsNone(router.get_module("en-us"))
+        self.assertIsNone(router.get_module("fr-ca"))
+
+    def test_engine_lru(self):
+        from neon_audio.tts.router import EngineRouter
+        release = Mock()
+        router = EngineRouter({"routes": self.routes, "max_engines": 2},
+                              lambda module: Mock(tts_name=module), release)
+        with router.engine("en-us") as engine:
+            self.assertIsNone(engine)
+        with router.engine("de-de") as engine:
+            self.assertEqual(engine.tts_name, "german")
+        with router.engine("de-de") as cached:
+            self.assertEqual(cached, engine)
+        with router.engine("fr-fr"):
+            pass
+        self.assertEqual(router.resident, ["german", "french"])
+
+        # Engines in use are not evicted
+        with router.engine("de-de") as german:
+            with router.engine("fr-fr"):
+                with router.engine("en-gb"):
+                    release.assert_not_called()
+                    self.assertEqual(len(router.resident), 3)
+            with router.engine("en-gb"):
+                pass
+        self.assertEqual(router.resident, ["german", "british"])
+        # `british` is released as soon as it is no longer in use
+        self.assertEqual([c[0][0].tts_name for c in release.call_args_list],
+                         ["british", "french"])
+
+        router.shutdown()
+        self.assertEqual(router.resident, [])
+        self.assertEqual(release.call_count, 4)
+        self.assertIn(german, [c[0][0] for c in release.call_args_list])
+
+    def test_shutdown_in_use(self):
+        from neon_audio.tts.router import EngineRouter
+        release = Mock()
+        router = EngineRouter({"routes": self.routes},
+                              lambda module: Mock(tts_name=module), release)
+        with router.engine("fr-fr"):
+            pass
+        with router.engine("de-de") as german:
+            router.shutdown()
+            self.assertEqual(release.call_args[0][0].tts_name, "french")
+            self.assertEqual(router.resident, ["german"])
+        # Engines in use are released when their requests finish
+        release.assert_called_with(german)
+        self.assertEqual(router.resident, [])
+
+    def test_engine_memory_budget(self):
+        from neon_audio.tts.router import EngineRouter
+        release = Mock()
+        router = EngineRouter({"routes": self.routes, "max_engines": 4,
+                               "memory_budget_mb": 500},
+                              lambda module: Mock(tts_name=module), release)
+        with router.engine("en-gb"):
+            pass
+        with router.engine("en-us", "narrator"):
+            pass
+        self.assertEqual(router.resident, ["narrator"])
+        self.assertEqual(router.resident_bytes, 300 * 1048576)
+
+    def test_engine_load_error(self):
+        from neon_audio.tts.router import EngineRouter
+        router = EngineRouter({"routes": self.routes},
+                              Mock(side_effect=RuntimeError("load failed")))
+        with router.engine("de-de") as engine:
+            self.assertIsNone(engine)
+        self.assertEqual(router.resident, [])
+
+
+class IdleUnloadTests(unittest.TestCase):
+    def _get_service(self):
+        service = _get_test_service()
+
+        def _reload():
+            service.tts = Mock()
+        service._load_tts = Mock(side_effect=_reload)
+        return service
+
+    def test_unload_and_rewarm(self):
+        service = self._get_service()
+        tts = service.tts
+        service._unload_tts()
+        self.assertIsNone(service.tts)
+        self.assertTrue(service.tts_idle)
+        self.assertIsNone(service._tts_hash)
+        tts.retire.assert_called_once()
+        tts.save_stats.assert_called_once()
+
+        with service.use_tts("test") as new_tts:
+            self.assertEqual(service._tts_active, 1)
+            self.assertIsNotNone(new_tts)
+        self.assertEqual(service._tts_active, 0)
+        self.assertFalse(service.tts_idle)
+        service._load_tts.assert_called_once()
+        self.assertEqual(new_tts.encoded_cache, tts.encoded_cache)
+        metric = service.bus.emit.call_args[0][0]
+        self.assertEqual(metric.data["name"], "tts_cold_start")
+        self.assertEqual(metric.data["trigger"], "test")
+        self.assertIsInstance(metric.data["duration"], float)
+
+        # Loaded engine is used directly
+        with service.use_tts() as tts:
+            self.assertEqual(tts, new_tts)
+        service._load_tts.assert_called_once()
+
+    def test_rewarm_concurrent(self):
+        service = self._get_service()
+        service._unload_tts()
+        loading = Event()
+        engines = list()
+
+        def _reload():
+            loading.set()
+            sleep(0.2)
+            service.tts = Mock()
+        service._load_tts.side_effect = _reload
+
+        def _use():
+            with service.use_tts() as tts:
+                engines.append(tts)
+        first = Thread(target=_use)
+        first.start()
+        loading.wait(5)
+        # Requests during a rewarm wait for the engine to be loaded
+        self.assertTrue(service.tts_idle)
+        _use()
+        first.join(5)
+        self.assertEqual(engines, [service.tts, service.tts])
+        self.assertIsNotNone(service.tts)
+        service._load_tts.assert_called_once()
+
+    def test_rewarm_failure(self):
+        service = self._get_service()
+        service._unload_tts()
+        service._load_tts.side_effect = None
+        with self.assertRaises(RuntimeError):
+            with service.use_tts():
+                pass
+        # Loading is retried on the next request
+        self.assertTrue(service.tts_idle)
+        self.assertEqual(service._tts_active, 0)
+        service._load_tts.side_effect = lambda: setattr(service, "tts",
+                                                        Mock())
+        with service.use_tts() as tts:
+            self.assertIsNotNone(tts)
+        self.assertFalse(service.tts_idle)
+        self.assertEqual(service._load_tts.call_count, 2)
+
+    def test_no_unload_in_use(self):
+        service = self._get_service()
+        tts = service.tts
+        with service.use_tts():
+            service._unload_tts()
+        self.assertEqual(service.tts, tts)
+        self.assertFalse(service.tts_idle)
+
+    @patch("neon_audio.service.TTS")
+    def test_handlers_while_unloaded(self, tts_class):
+        from tempfile import mkstemp
+        service = self._get_service()
+        service._unload_tts()
+        self.assertIsNone(service.tts)
+
+        # Playback is handled without loading the engine
+        tts_class.playback._now_playing = None
+        self.assertFalse(service.is_speaking)
+        service.handle_speak_status(Message("mycroft.audio.is_speaking"))
+        self.assertFalse(service.bus.emit.call_args[0][0].data["speaking"])
+        tts_class.playback._now_playing = ("audio.wav",)
+        self.assertTrue(service.is_speaking)
+        service.handle_stop(Message("mycroft.stop"))
+        tts_class.playback.clear.assert_called_once()
+        self.assertEqual(service.bus.emit.call_args[0][0].msg_type,
+                         "mycroft.stop.handled")
+        service._load_tts.assert_not_called()
+        self.assertTrue(service.tts_idle)
+
+        # Synthesis requests load the engine
+        _, wav_file = mkstemp(suffix=".wav")
+
+        def _reload():
+            service.tts = Mock(available_languages={"en-us"})
+            service.tts.synth.return_value = (wav_file, None)
+        service._load_tts.side_effect = _reload
+        service.handle_get_languages_tts(Message("ovos.languages.tts"))
+        self.assertEqual(service.bus.emit.call_args[0][0].data["langs"],
+                         ["en-us"])
+        self.assertFalse(service.tts_idle)
+        service._unload_tts()
+        service.handle_b64_audio(Message("speak:b64_audio",
+                                         {"utterance": "hello"}))
+        self.assertEqual(service.bus.emit.call_args[0][0].data["audio"], "")
+        self.assertEqual(service._load_tts.call_count, 2)
+        os.remove(wav_file)
+
+    def test_handle_rewarm(self):
+        service = self._get_service()
+        service.handle_rewarm(Message("recognizer_loop:wakeword"))
+        service._load_tts.assert_not_called()
+
+        from time import sleep
+        service._unload_tts()
+        service.handle_rewarm(Message("recognizer_loop:wakeword"))
+        timeout = time() + 5
+        while service.tts_idle and time() < timeout:
+            sleep(0.01)
+        self.assertFalse(service.tts_idle)
+        service._load_tts.assert_called_once()
+
+
+class PlaybackQueueTests(unittest.TestCase):
+    def test_instrumented_queue(self):
+        from time import sleep
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        queue = InstrumentedQueue()
+        self.assertEqual(queue.get_stats(), {"depth": 0, "oldest_age": 0.0,
+                                             "last_wait": None,
+                                             "total_enqueued": 0,
+                                             "queued_duration": 0})
+        queue.put(("one",))
+        sleep(0.05)
+        queue.put(("two",))
+        stats = queue.get_stats()
+        self.assertEqual(stats["depth"], 2)
+        self.assertGreaterEqual(stats["oldest_age"], 0.05)
+        self.assertEqual(queue.get(), ("one",))
+        self.assertGreaterEqual(queue.last_wait, 0.05)
+        stats = queue.get_stats()
+        self.assertEqual(stats["depth"], 1)
+        self.assertLess(stats["oldest_age"], 0.05)
+        self.assertEqual(stats["total_enqueued"], 2)
+
+    def test_queue_duration_unlocked(self):
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        queue = InstrumentedQueue()
+
+        def _get_duration(path):
+            # Files are read without blocking other queue users
+            self.assertFalse(queue.mutex.locked())
+            return 2.0 if path == "one" else None
+        with patch("neon_audio.tts.playback_queue.get_audio_duration",
+                   side_effect=_get_duration) as get_duration:
+            queue.put(("one",))
+            self.assertEqual(queue.get_stats()["queued_duration"], 2.0)
+            queue.put_nowait(("two",))
+            self.assertIsNone(queue.get_stats()["queued_duration"])
+        self.assertEqual(get_duration.call_count, 2)
+
+    def _get_service(self):
+        return _get_test_service(queue_config={"stall_seconds": 0.05})
+
+    @patch("neon_audio.service.TTS")
+    def test_playback_status(self, tts):
+        from time import sleep, monotonic
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        tts.queue = InstrumentedQueue()
+        service = self._get_service()
+        status = service.get_playback_status()
+        self.assertEqual(status["depth"], 0)
+        self.assertTrue(status["alive"])
+        self.assertFalse(status["stalled"])
+
+        # Items waiting with nothing playing
+        tts.queue.put("audio")
+        sleep(0.1)
+        self.assertTrue(service.get_playback_status()["stalled"])
+        service.playback_thread.paused = True
+        self.assertFalse(service.get_playback_status()["stalled"])
+
+        # Item playing too long
+        service.playback_thread.paused = False
+        service.playback_thread.play_started = monotonic()
+        self.assertFalse(service.get_playback_status()["stalled"])
+        sleep(0.1)
+        status = service.get_playback_status()
+        self.assertTrue(status["stalled"])
+        self.assertGreaterEqual(status["playing"], 0.1)
+
+        # Thread exited
+        service.playback_thread.play_started = None
+        tts.queue.get()
+        service.playback_thread.is_alive.return_value = False
+        self.assertTrue(service.get_playback_status()["stalled"])
+
+    @patch("neon_audio.tts.neon.NeonPlaybackThread")
+    @patch("neon_audio.service.TTS")
+    def test_recover_playback(self, tts, playback_thread):
+        service = self._get_service()
+        service.bus = Mock()
+        thread = service.playback_thread
+        service._recover_playback({"alive": True})
+        thread.p.terminate.assert_called_once()
+        playback_thread.assert_not_called()
+
+        service._recover_playback({"alive": False})
+        playback_thread.assert_called_once_with(tts.queue, service.bus)
+        playback_thread.return_value.start.assert_called_once()
+        self.assertEqual(service.playback_thread,
+                         playback_thread.return_value)
+        self.assertEqual(tts.playback, playback_thread.return_value)
+
+
+class PlaybackProcessTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import numpy as np
+        from tempfile import mkdtemp
+        from neon_audio.tts.audio_processing import write_wav
+        cls.test_dir = mkdtemp()
+        cls.wav_file = join(cls.test_dir, "test.wav")
+        write_wav(cls.wav_file, np.zeros((1600, 1), dtype=np.float32), 16000)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.test_dir)
+
+    def _get_thread(self, events: list):
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        from neon_audio.tts.playback_process import PlaybackProcessThread
+        bus = FakeBus()
+        for msg_type in ("recognizer_loop:audio_output_start",
+                         "recognizer_loop:audio_output_end", "one", "two"):
+            bus.on(msg_type, lambda m: events.append(m.msg_type))
+        thread = PlaybackProcessThread(InstrumentedQueue(), bus)
+        thread.start()
+        return thread
+
+    def _put(self, thread, ident: str):
+        thread.queue.put((self.wav_file, None, False, ident,
+                          Message("speak", {"utterance": ident},
+                                  {"timing": {}})))
+
+    def _wait_for(self, events: list, ident: str):
+        timeout = time() + 60
+        while ident not in events and time() < timeout:
+            sleep(0.1)
+        self.assertIn(ident, events)
+
+    def test_playback_process(self):
+        events = list()
+        thread = self._get_thread(events)
+        self._put(thread, "one")
+        self._put(thread, "two")
+        self._wait_for(events, "two")
+        self.assertNotEqual(thread.process.pid, os.getpid())
+        # Speech is continuous across queued items
+        self.assertEqual(events, ["recognizer_loop:audio_output_start",
+                                  "one", "recognizer_loop:audio_output_end",
+                                  "two"])
+        self.assertEqual(thread.queue.get_stats()["depth"], 0)
+        self.assertIsNone(thread.play_started)
+        self.assertFalse(thread.paused)
+
+        thread.stop()
+        self.assertFalse(thread.process.is_alive())
+        self.assertEqual(thread.process.exitcode, 0)
+
+    def test_process_restart(self):
+        events = list()
+        thread = self._get_thread(events)
+        self._put(thread, "one")
+        self._wait_for(events, "one")
+        process = thread.process
+        thread.restart_process()
+        # The replacement is started before `restart_process` returns
+        new_process = thread.process
+        self.assertIsNot(new_process, process)
+        self.assertTrue(new_process.is_alive())
+        # A late exit report for the old process does not respawn again
+        thread._handle_process_exit(process)
+        self.assertIs(thread.process, new_process)
+        self._put(thread, "two")
+        self._wait_for(events, "two")
+        self.assertIs(thread.process, new_process)
+        self.assertTrue(thread.process.is_alive())
+        thread.stop()
+
+    def test_pause_resume(self):
+        from queue import Empty
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        from neon_audio.tts.playback_process import PlaybackProcessThread
+        thread = PlaybackProcessThread(InstrumentedQueue(), FakeBus())
+        thread.process = Mock()
+        thread._control = Mock()
+        thread._conn = Mock()
+        thread._record_queue_wait = Mock()
+        thread._do_playback.set()
+        self._put(thread, "one")
+        one = thread.queue.get()
+        self._put(thread, "two")
+        self._put(thread, "three")
+
+        def _recv():
+            # Pause while `one` is playing
+            thread.pause()
+            return ("played",)
+        thread._conn.recv.side_effect = _recv
+        thread._hand_off(one)
+        thread._control.send.assert_called_with("terminate")
+        self.assertEqual(thread._conn.send.call_args[0][0], ("hold",))
+        self.assertEqual(thread.queue.qsize(), 2)
+
+        # The interrupted utterance is played first on resume
+        thread.resume()
+        thread._conn.reset_mock()
+        thread._conn.recv.side_effect = None
+        thread._conn.recv.return_value = ("played",)
+        thread._hand_off(thread._next_item())
+        self.assertEqual([c[0][0][1][3] for c in
+                          thread._conn.send.call_args_list[:-1]],
+                         ["one", "two", "three"])
+        self.assertEqual(thread._conn.send.call_args[0][0], ("idle",))
+        # Queue wait is recorded once per dequeued item, not on replay
+        self.assertEqual(thread._record_queue_wait.call_count, 2)
+        thread._interrupted = one
+        self._put(thread, "four")
+        thread.clear_queue()
+        with self.assertRaises(Empty):
+            thread._next_item()
+
+
+class PlaybackDeadlineTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        import numpy as np
+        from tempfile import mkdtemp
+        from neon_audio.tts.audio_processing import write_wav
+        cls.test_dir = mkdtemp()
+        cls.wav_file = join(cls.test_dir, "test.wav")
+        write_wav(cls.wav_file, np.zeros((32000, 1), dtype=np.float32),
+                  16000)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.test_dir)
+
+    def test_get_audio_duration(self):
+        from neon_audio.tts.audio_processing import get_audio_duration
+        self.assertEqual(get_audio_duration(self.wav_file), 2.0)
+        self.assertIsNone(get_audio_duration(__file__))
+        self.assertIsNone(get_audio_duration(join(self.test_dir, "none")))
+
+    def test_queued_duration(self):
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        queue = InstrumentedQueue()
+        queue.put((self.wav_file, None, False, "1", None))
+        queue.put((self.wav_file, None, False, "2", None))
+        self.assertEqual(queue.get_stats()["queued_duration"], 4.0)
+        queue.put((__file__, None, False, "3", None))
+        self.assertIsNone(queue.get_stats()["queued_duration"])
+
+    @patch("neon_audio.service.TTS")
+    def test_playback_deadline(self, tts):
+        from time import monotonic
+        from neon_audio.tts.playback_queue import InstrumentedQueue
+        tts.queue = InstrumentedQueue()
+        service = _get_test_service(
+            queue_config={"deadline_margin_seconds": 5})
+        self.assertEqual(service.get_playback_eta(), 0)
+
+        tts.queue.put((self.wav_file, None, False, "1", None))
+        service.playback_thread.play_started = monotonic() - 1.0
+        service.playback_thread.play_duration = 2.0
+        eta = service.get_playback_eta()
+        self.assertGreater(eta, 2.5)
+        self.assertLessEqual(eta, 3.0)
+
+        message = Message("speak", {"utterance": "test"})
+        deadline = service._get_playback_deadline(message, "speak_id")
+        self.assertAlmostEqual(deadline, eta + 5, 1)
+        eta_message = service.bus.emit.call_args[0][0]
+        self.assertEqual(eta_message.msg_type, "neon.audio.playback_eta")
+        self.assertEqual(eta_message.data["speak_ident"], "speak_id")
+        self.assertAlmostEqual(eta_message.data["eta"], eta, 1)
+
+        # Unknown duration uses the default timeout
+        service.playback_thread.play_duration = None
+        self.assertIsNone(service.get_playback_eta())
+        self.assertEqual(service._get_playback_deadline(message, "speak_id"),
+                         120)
+
+
+class ReplayTests(unittest.TestCase):
+    def test_record_traffic(self):
+        from tempfile import mkdtemp
+        from neon_audio.replay import TrafficRecorder, load_traffic
+        test_dir = mkdtemp()
+        log_file = join(test_dir, "traffic.jsonl.gz")
+        bus = FakeBus()
+        recorder = TrafficRecorder(bus, log_file)
+        recorder.start()
+        bus.emit(Message("speak", {"utterance": "one"},
+                         {"klat_data": {"cid": "test"}}))
+        bus.emit(Message("recognizer_loop:utterance", {}))
+        bus.emit(Message("neon.get_tts", {"text": "two"}))
+        recorder.stop()
+        bus.emit(Message("speak", {"utterance": "not recorded"}))
+
+        self.assertEqual(recorder.count, 2)
+        records = load_traffic(log_file)
+        self.assertEqual([r["type"] for r in records],
+                         ["speak", "neon.get_tts"])
+        self.assertEqual(records[0]["data"], {"utterance": "one"})
+        self.assertEqual(records[0]["context"]["klat_data"], {"cid": "test"})
+        self.assertLessEqual(records[0]["t"], records[1]["t"])
+        shutil.rmtree(test_dir)
+
+    def test_replay_traffic(self):
+        from time import sleep
+        from neon_audio.replay import replay_traffic
+        service = Mock()
+        service.bus = FakeBus()
+        speak_idents = list()
+
+        def _handle_get_tts(message):
+            sleep(0.02)
+            data = {"error": "No text provided."} \
+                if not message.data.get("text") else {"en-us": {}}
+            service.bus.emit(message.reply(message.context["ident"], data))
+
+        service.bus.on("neon.get_tts", _handle_get_tts)
+        service.bus.on("speak", lambda m: speak_idents.append(
+            m.data["speak_ident"]))
+        records = [{"t": 0.0, "type": "neon.get_tts",
+                    "data": {"text": "hello"}, "context": {}},
+                   {"t": 0.1, "type": "speak",
+                    "data": {"utterance": "hello"}, "context": {}},
+                   {"t": 0.2, "type": "neon.get_tts", "data": {},
+                    "context": {}}]
+        summary = replay_traffic(records, service, speed=2)
+        self.assertEqual(summary["messages"], 3)
+        self.assertGreaterEqual(summary["seconds"], 0.1)
+        self.assertEqual(summary["latency"]["neon.get_tts"]["count"], 2)
+        self.assertGreaterEqual(summary["latency"]["neon.get_tts"]["p50"],
+                                0.02)
+        self.assertEqual(summary["latency"]["speak"]["count"], 1)
+        self.assertEqual(speak_idents, ["replay.1"])
+        self.assertEqual(summary["errors"], [{"index": 2,
+                                              "type": "neon.get_tts",
+                                              "error": "No text provided."}])
+        self.assertGreater(summary["rss_mb"], 0)
+        self.assertIsInstance(summary["rss_growth_mb"], float)
+        # Response handlers are removed after each request
+        self.assertFalse(service.bus.ee.listeners("replay.0"))
+
+        # A request without a response times out and its handler is removed
+        service.bus.remove("neon.get_tts", _handle_get_tts)
+        summary = replay_traffic(records[:1], service, response_timeout=0.1)
+        self.assertEqual(summary["errors"], [{"index": 0,
+                                              "type": "neon.get_tts",
+                                              "error": "No response in 0.1s"}])
+        self.assertFalse(service.bus.ee.listeners("replay.0"))
+
+    def test_simulated_playback(self):
+        import numpy as np
+        from tempfile import mkdtemp
+        import ovos_audio.playback
+        from neon_audio.replay import simulated_playback
+        from neon_audio.tts.audio_processing import write_wav
+        test_dir = mkdtemp()
+        wav_file = join(test_dir, "test.wav")
+        write_wav(wav_file, np.zeros((1600, 1), dtype=np.float32), 16000)
+        play_audio = ovos_audio.playback.play_audio
+        with simulated_playback(speed=2):
+            player = ovos_audio.playback.play_audio(wav_file)
+            self.assertEqual(player._duration, 0.05)
+            start = time()
+            player.communicate()
+            self.assertGreaterEqual(time() - start, 0.05)
+        self.assertEqual(ovos_audio.playback.play_audio, play_audio)
+        shutil.rmtree(test_dir)
+
+
+class TTSServerTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        try:
+            import aiohttp
+        except ImportError:
+            raise unittest.SkipTest("aiohttp not installed")
+        from neon_audio.server import TTSServer
+        from contextlib import contextmanager
+        cls.service = Mock()
+        cls.service.use_tts = contextmanager(
+            lambda *_: (yield cls.service.tts))
+        cls.service.tts.tts_name = "Test"
+        cls.service.tts.engine_breaker.state = "closed"
+        cls.service.tts.preprocess_sentence.side_effect = \
+            lambda text: text.split('. ')
+        cls.service.tts.get_multiple_tts.side_effect = \
+            lambda msg: {"en-us": {"sentence": msg.data["text"]}}
+        cls.server = TTSServer(cls.service, {"port": 0})
+        cls.server.start()
+        cls.server.ready.wait(10)
+        port = cls.server._runner.addresses[0][1]
+        cls.url = f"http://127.0.0.1:{port}"
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.shutdown()
+
+    def _post(self, path, data):
+        import json
+        from urllib.request import urlopen, Request
+        request = Request(f"{self.url}{path}", json.dumps(data).encode(),
+                          {"Content-Type": "application/json"})
+        with urlopen(request) as resp:
+            return resp.read().decode()
+
+    def test_health(self):
+        import json
+        from urllib.request import urlopen
+        with urlopen(f"{self.url}/health") as resp:
+            status = json.loads(resp.read())
+        self.assertEqual(status, {"status": "ok", "tts": "Test",
+                                  "circuit": "closed"})
+
+    def test_synthesize(self):
+        import json
+        from urllib.error import HTTPError
+        resp = json.loads(self._post("/synthesize",
+                                     {"text": "hello", "lang": "en-us"}))
+        self.assertEqual(resp, {"en-us": {"sentence": "hello"}})
+        message = self.service.tts.get_multiple_tts.call_args[0][0]
+        self.assertEqual(message.msg_type, "neon.get_tts")
+        self.assertEqual(message.data["lang"], "en-us")
+
+        with self.assertRaises(HTTPError) as e:
+            self._post("/synthesize", {"lang": "en-us"})
+        self.assertEqual(e.exception.code, 400)
+
+    def test_synthesize_stream(self):
+        import json
+        from threading import current_thread
+        split_threads = list()
+
+        def _split(text):
+            split_threads.append(current_thread())
+            return text.split('. ')
+        self.service.tts.preprocess_sentence.side_effect = _split
+        lines = self._post("/synthesize/stream",
+                           {"text": "one. two"}).splitlines()
+        results = [json.loads(line) for line in lines]
+        self.assertEqual([r["index"] for r in results], [0, 1])
+        self.assertEqual(results[1]["responses"]["en-us"]["sentence"], "two")
+        # Engine is not used on the event loop thread
+        self.assertEqual(len(split_threads), 1)
+        self.assertIsNot(split_threads[0], self.server)
+
+    def test_websocket(self):
+        import asyncio
+        import aiohttp
+
+        async def _request():
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(f"{self.url}/ws") as ws:
+                    await ws.send_json({"text": "one. two", "id": "a"})
+                    received = []
+                    while not received or not received[-1].get("done"):
+                        received.append(await ws.receive_json())
+                    return received
+        results = asyncio.run(_request())
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(r["id"] == "a" for r in results))
+        self.assertEqual(results[0]["responses"]["en-us"]["sentence"], "one")
+
+
+class ConfigSnapshotTests(unittest.TestCase):
+    def test_frozen_config(self):
+        import json
+        from copy import deepcopy
+        from neon_audio.config import get_config, FrozenDict
+        config = get_config()
+        self.assertIsInstance(config, FrozenDict)
+        self.assertIs(config, get_config())
+        with self.assertRaises(TypeError):
+            config["tts"] = dict()
+        with self.assertRaises(TypeError):
+            config["tts"].update({"module": "test"})
+        self.assertIsInstance(json.dumps(config), str)
+        config_copy = deepcopy(config)
+        config_copy["tts"]["module"] = "test"
+        self.assertNotEqual(config["tts"].get("module"), "test")
+
+    def test_frozen_list(self):
+        import pickle
+        from copy import deepcopy
+        from neon_audio.config import FrozenList, _freeze
+        config = _freeze({"voices": ["a", {"b": ["c"]}]})
+        self.assertIsInstance(config["voices"], list)
+        self.assertIsInstance(config["voices"], FrozenList)
+        self.assertEqual(config["voices"], ["a", {"b": ["c"]}])
+        for mutate in (lambda v: v.append("d"), lambda v: v.pop(),
+                       lambda v: v.__setitem__(0, "d"), lambda v: v.sort()):
+            with self.assertRaises(TypeError):
+                mutate(config["voices"])
+        config_copy = deepcopy(config)
+        self.assertIs(type(config_copy["voices"]), list)
+        self.assertIs(type(config_copy["voices"][1]["b"]), list)
+        config_copy["voices"].append("d")
+        self.assertEqual(len(config["voices"]), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(config)), config)
+
+    @patch("neon_audio.config._subscribers", list())
+    @patch("neon_audio.config._snapshot", None)
+    @patch("neon_audio.config.Configuration")
+    def test_refresh_config(self, configuration):
+        from neon_audio.config import get_config, refresh_config, \
+            subscribe, unsubscribe
+        configuration.load_all_configs.return_value = \
+            {"tts": {"module": "one", "voices": ["a"]}}
+        callback = Mock()
+        failing_callback = Mock(side_effect=RuntimeError)
+        subscribe(failing_callback)
+        subscribe(callback)
+        subscribe(callback)
+        config = get_config()
+        self.assertEqual(config["tts"]["voices"], ["a"])
+        callback.assert_not_called()
+
+        # Unchanged configuration keeps the snapshot
+        self.assertFalse(refresh_config())
+        self.assertIs(get_config(), config)
+
+        configuration.load_all_configs.return_value = \
+            {"tts": {"module": "two", "voices": ["a"]}}
+        self.assertTrue(refresh_config())
+        callback.assert_called_once_with(config, get_config())
+        self.assertEqual(get_config()["tts"]["module"], "two")
+
+        unsubscribe(callback)
+        configuration.load_all_configs.return_value = dict()
+        self.assertTrue(refresh_config())
+        callback.assert_called_once()
+        self.assertEqual(failing_callback.call_count, 2)
+
+    @patch("neon_audio.config._watched_bus", None)
+    @patch("neon_audio.config.refresh_config")
+    @patch("neon_audio.config.Configuration")
+    def test_watch_config(self, configuration, refresh_config):
+        from neon_audio.config import watch_config
+        bus = FakeBus()
+        # Updates are applied once, by the ovos-config handlers
+        configuration.bus = bus
+        handlers = {"configuration.patch": Mock(),
+                    "configuration.updated": Mock()}
+        for msg_type, handler in handlers.items():
+            bus.on(msg_type, handler)
+        watch_config(bus)
+        watch_config(bus)
+        configuration.set_config_watcher.assert_called_with(refresh_config)
+        message = Message("configuration.patch",
+                          {"config": {"tts": {"module": "test"}}})
+        bus.emit(message)
+        handlers["configuration.patch"].assert_called_once()
+        configuration.patch.assert_not_called()
+        refresh_config.assert_called_once()
+
+        # Updates are applied from a bus not handled by ovos-config
+        configuration.bus = FakeBus()
+        bus.emit(Message("configuration.updated"))
+        configuration.updated.assert_called_once()
+        handlers["configuration.updated"].assert_called_once()
+        self.assertEqual(refresh_config.call_count, 2)
+
+    @patch("neon_audio.config.Configuration")
+    def test_remove_config_watcher(self, configuration):
+        from neon_audio.config import remove_config_watcher
+        callback = Mock()
+        configuration._callbacks = [callback]
+        remove_config_watcher(callback)
+        remove_config_watcher(callback)
+        self.assertEqual(configuration._callbacks, [])
+
+    def test_service_config_changed(self):
+        from neon_audio.service import NeonPlaybackService
+        service = Mock()
+        old_config = {"tts": {"module": "test"}}
+        NeonPlaybackService._on_config_changed(service, old_config,
+                                               {**old_config, "lang": "uk"})
+        service._maybe_reload_tts.assert_not_called()
+
+        NeonPlaybackService._on_config_changed(
+            service, old_config, {"tts": {"module": "test",
+                                          "idle": {"unload_seconds": 60}}})
+        self.assertEqual(service.idle_config, {"unload_seconds": 60})
+        self.assertEqual(service.queue_config, dict())
+        service._maybe_reload_tts.assert_called_once()
+        service._rebuild_router.assert_not_called()
+
+        routing = {"routes": [{"lang": "de", "module": "german"}]}
+        NeonPlaybackService._on_config_changed(
+            service, old_config, {"tts": {"module": "test",
+                                          "routing": routing}})
+        service._rebuild_router.assert_called_once()
+
+    def test_rebuild_router(self):
+        from neon_audio.service import NeonPlaybackService
+        service = Mock()
+        old_router = service._router
+
+        def _attach():
+            self.assertIsNone(service._router)
+            service._router = Mock()
+        service._attach_engines.side_effect = _attach
+        NeonPlaybackService._rebuild_router(service)
+        service._attach_engines.assert_called_once()
+        old_router.shutdown.assert_called_once()
+        self.assertIsNot(service._router, old_router)
+
+
+class PluginIndexTests(unittest.TestCase):
+    def setUp(self):
+        from tempfile import mkdtemp
+        self.test_dir = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_environment_fingerprint(self):
+        from neon_audio.tts.plugins import get_environment_fingerprint
+        site_dir = join(self.test_dir, "site-packages")
+        os.makedirs(site_dir)
+        with patch("sys.path", [site_dir]):
+            fingerprint = get_environment_fingerprint()
+            self.assertEqual(fingerprint, get_environment_fingerprint())
+            os.makedirs(join(site_dir, "test_package"))
+            self.assertEqual(fingerprint, get_environment_fingerprint())
+            os.makedirs(join(site_dir, "test_package-1.0.0.dist-info"))
+            self.assertNotEqual(fingerprint, get_environment_fingerprint())
+
+    @patch("neon_audio.tts.plugins.get_environment_fingerprint")
+    @patch("neon_audio.tts.plugins.scan_tts_plugins")
+    def test_get_tts_plugin_index(self, scan, fingerprint):
+        from neon_audio.tts.plugins import get_tts_plugin_index
+        scan.return_value = {"test_plugin": "test_objects:DummyTTS"}
+        fingerprint.return_value = "env_1"
+        self.assertEqual(get_tts_plugin_index(self.test_dir),
+                         scan.return_value)
+        scan.assert_called_once()
+
+        # Index is read while the environment is unchanged
+        self.assertEqual(get_tts_plugin_index(self.test_dir),
+                         scan.return_value)
+        scan.assert_called_once()
+        get_tts_plugin_index(self.test_dir, refresh=True)
+        self.assertEqual(scan.call_count, 2)
+
+        fingerprint.return_value = "env_2"
+        get_tts_plugin_index(self.test_dir)
+        self.assertEqual(scan.call_count, 3)
+
+    @patch("ovos_plugin_manager.tts.load_tts_plugin")
+    @patch("neon_audio.tts.plugins.scan_tts_plugins")
+    def test_load_tts_class(self, scan, load_tts_plugin):
+        from neon_audio.tts.plugins import get_tts_plugin_index, \
+            load_tts_class
+        scan.return_value = {"test_plugin": "test_objects:DummyTTS"}
+        self.assertEqual(load_tts_class("test_plugin", self.test_dir),
+                         DummyTTS)
+        scan.assert_called_once()
+        self.assertEqual(load_tts_class("test_plugin", self.test_dir),
+                         DummyTTS)
+        scan.assert_called_once()
+
+        # Stale index entry is rescanned
+        scan.return_value = {"test_plugin": "test_objects:MissingTTS"}
+        get_tts_plugin_index(self.test_dir, refresh=True)
+        scan.return_value = {"test_plugin": "test_objects:DummyTTS"}
+        self.assertEqual(load_tts_class("test_plugin", self.test_dir),
+                         DummyTTS)
+        self.assertEqual(scan.call_count, 3)
+        load_tts_plugin.assert_not_called()
+
+        # Unknown plugins fall back to a full plugin scan
+        self.assertEqual(load_tts_class("other_plugin", self.test_dir),
+                         load_tts_plugin.return_value)
+        load_tts_plugin.assert_called_once_with("other_plugin")
+
+
+class MemoryAudioTests(unittest.TestCase):
+    def test_buffer_pool(self):
+        import wave
+        import numpy as np
+        from neon_audio.tts.audio_processing import write_wav
+        from neon_audio.tts.buffers import AudioBufferPool, \
+            BufferPoolExhausted
+        pool = AudioBufferPool(max_bytes=4096, min_size=1024)
+        with pool.acquire() as buffer:
+            write_wav(buffer, np.zeros((1000, 1), dtype=np.float32), 16000)
+            self.assertEqual(buffer.size, 2044)
+            self.assertEqual(pool.in_use, 2048)
+            with buffer.getbuffer() as view:
+                raw = bytes(view)
+        self.assertEqual(pool.in_use, 0)
+        self.assertEqual(pool.allocated, 2048)
+        from io import BytesIO
+        with wave.open(BytesIO(raw), 'rb') as f:
+            self.assertEqual(f.getnframes(), 1000)
+
+        # Released buffer is reused
+        first = pool.acquire()
+        self.assertEqual(pool.allocated, 2048)
+        second = pool.acquire()
+        self.assertEqual(pool.allocated, 3072)
+        second.release()
+        # Idle buffers are discarded to make room for growth
+        first.write(b"\0" * 4000)
+        self.assertEqual(pool.allocated, 4096)
+        self.assertEqual(pool.in_use, 4096)
+        with self.assertRaises(BufferPoolExhausted):
+            first.write(b"\0" * 200)
+        with self.assertRaises(BufferPoolExhausted):
+            pool.acquire()
+        first.release()
+
+    def _get_tts(self, cache_dir, max_bytes=1048576):
+        from concurrent.futures import ThreadPoolExecutor
+        from pathlib import Path
+        from unittest.mock import MagicMock
+        import numpy as np
+        from neon_audio.tts.buffers import AudioBufferPool
+        from neon_audio.tts.circuit_breaker import CircuitBreaker
+
+        def get_tts_audio(sentence, lang=None):
+            return np.zeros(1600, dtype=np.float32), "HH AH L OW"
+
+        tts = Mock()
+        tts.buffer_pool = AudioBufferPool(max_bytes, min_size=1024)
+        # Half-open breaker allows a single trial call
+        tts.engine_breaker = CircuitBreaker("test", {"enabled": True,
+                                                     "min_calls": 1,
+                                                     "reset_seconds": 0})
+        tts.engine_breaker.record_failure()
+        self.assertEqual(tts.engine_breaker.state, "half_open")
+        tts.enable_cache = True
+        tts.sample_rate = 16000
+        tts.get_tts_audio = get_tts_audio
+        tts._persist_executor = ThreadPoolExecutor(1)
+        tts._write_audio.side_effect = \
+            lambda *args: WrappedTTS._write_audio(tts, *args)
+        tts._persist_audio.side_effect = \
+            lambda *args: WrappedTTS._persist_audio(tts, *args)
+        cache = MagicMock()
+        cache.__contains__.return_value = False
+        cache.define_audio_file.return_value = Path(cache_dir, "hello.wav")
+        tts._get_ctxt.return_value.get_cache.return_value = cache
+        return tts, cache
+
+    def test_synth_in_memory(self):
+        from base64 import b64decode
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import track_synthesis
+        from neon_audio.tts.audio_processing import read_wav
+        cache_dir = mkdtemp()
+        tts, cache = self._get_tts(cache_dir)
+        message = Message("neon.get_tts")
+        with track_synthesis() as record:
+            encoded, phonemes, wav_file = WrappedTTS._synth_in_memory(
+                tts, "hello", message, lang="en-us")
+        self.assertTrue(record["miss"])
+        self.assertEqual(phonemes, "HH AH L OW")
+        self.assertEqual(wav_file, join(cache_dir, "hello.wav"))
+        tts._persist_executor.shutdown(wait=True)
+        with open(wav_file, 'rb') as f:
+            self.assertEqual(b64decode(encoded), f.read())
+        self.assertEqual(len(read_wav(wav_file)[0]), 1600)
+        tts._cache_sentence.assert_called_once()
+        self.assertEqual(tts.buffer_pool.in_use, 0)
+        self.assertEqual(tts.engine_breaker.state, "closed")
+
+        # Cached sentences are read from disk
+        cache.__contains__.return_value = True
+        self.assertIsNone(WrappedTTS._synth_in_memory(tts, "hello", message))
+        shutil.rmtree(cache_dir)
+
+    def test_synth_in_memory_fallback(self):
+        from tempfile import mkdtemp
+        cache_dir = mkdtemp()
+        tts, cache = self._get_tts(cache_dir, max_bytes=1024)
+        message = Message("neon.get_tts")
+        # Audio larger than the pool is synthesized to disk
+        self.assertIsNone(WrappedTTS._synth_in_memory(tts, "hello", message))
+        self.assertEqual(tts.buffer_pool.in_use, 0)
+        tts.cache_stats.record_miss.assert_not_called()
+        # Cached sentences are read from disk
+        cache.__contains__.return_value = True
+        self.assertIsNone(WrappedTTS._synth_in_memory(tts, "hello", message))
+        cache.__contains__.return_value = False
+        # Engines without in-memory synthesis are not supported
+        del tts.get_tts_audio
+        self.assertIsNone(WrappedTTS._synth_in_memory(tts, "hello", message))
+        tts.buffer_pool = None
+        self.assertIsNone(WrappedTTS._synth_in_memory(tts, "hello", message))
+        # Trial call is still available to the disk synthesis path
+        self.assertEqual(tts.engine_breaker.state, "half_open")
+        self.assertTrue(tts.engine_breaker.allow())
+        tts.engine_breaker.record_success()
+        self.assertEqual(tts.engine_breaker.state, "closed")
+        shutil.rmtree(cache_dir)
+
+    def test_write_evicted(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from tempfile import mkdtemp
+        from neon_audio.tts.cache import AudioMemoryCache, MemoryCacheEntry
+        cache_dir = mkdtemp()
+        path = join(cache_dir, "evicted.wav")
+        tts = Mock()
+        tts._persist_executor = ThreadPoolExecutor(1)
+        cache = AudioMemoryCache(
+            30, lambda e: WrappedTTS._write_evicted(tts, e))
+        cache.put("first", MemoryCacheEntry(path, b"a" * 10, "b" * 10, None))
+        write_thread = Event()
+        # Evicted audio is written by the persist thread
+        with patch("neon_audio.tts.neon.write_cache_entry",
+                   side_effect=lambda _: write_thread.set()) as write:
+            tts._persist_executor.submit(write_thread.wait, 5)
+            cache.put("second", MemoryCacheEntry(None, b"c" * 10, "d" * 10,
+                                                 None))
+            write.assert_not_called()
+            write_thread.set()
+            tts._persist_executor.shutdown(wait=True)
+            write.assert_called_once()
+            self.assertEqual(write.call_args[0][0].path, path)
+        # Evictions after the engine is retired are not written
+        cache.put("third", MemoryCacheEntry(path, b"e" * 10, "f" * 10, None))
+        self.assertEqual(len(cache), 1)
+        shutil.rmtree(cache_dir)
+
+
+class SegmentCacheTests(unittest.TestCase):
+    def _get_tts(self, cache_dir):
+        from tempfile import mkstemp
+        import numpy as np
+        from neon_audio.tts.analytics import mark_cache_miss
+        from neon_audio.tts.audio_processing import write_wav
+        files = dict()
+        synthesized = list()
+
+        def _synth(sentence, message, **kwargs):
+            if sentence not in files:
+                _, files[sentence] = mkstemp(suffix=".wav", dir=cache_dir)
+                write_wav(files[sentence],
+                          np.full((1600, 1), 0.1, dtype=np.float32), 16000)
+                synthesized.append(sentence)
+                mark_cache_miss()
+            return files[sentence], None
+
+        tts = Mock()
+        tts.cache_dir = cache_dir
+        tts.segment_config = {"crossfade_ms": 0}
+        tts._segment_rtf = None
+        engine = Mock()
+        engine._hedged_synth.side_effect = _synth
+        return tts, engine, synthesized
+
+    def test_synth_segments(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.analytics import track_synthesis
+        from neon_audio.tts.audio_processing import read_wav
+        cache_dir = mkdtemp()
+        tts, engine, synthesized = self._get_tts(cache_dir)
+        message = Message("test")
+        with track_synthesis() as record:
+            wav_file, phonemes = WrappedTTS._synth_segments(
+                tts, engine, ["One.", "Two."], message)
+        self.assertTrue(record["miss"])
+        self.assertIsNone(phonemes)
+        self.assertEqual(synthesized, ["One.", "Two."])
+        samples, _ = read_wav(wav_file)
+        self.assertEqual(len(samples), 3200)
+        self.assertIsNotNone(tts._segment_rtf)
+        metric = tts.bus.emit.call_args[0][0]
+        self.assertEqual(metric.msg_type, "neon.metric")
+        self.assertEqual(metric.data["name"], "tts_segments")
+        self.assertEqual(metric.data["cached"], 0)
+
+        # Shared segment is read from cache; joined audio is reused
+        with track_synthesis() as record:
+            WrappedTTS._synth_segments(tts, engine, ["One.", "Three."],
+                                       message)
+        self.assertEqual(synthesized, ["One.", "Two.", "Three."])
+        metric = tts.bus.emit.call_args[0][0]
+        self.assertEqual(metric.data["cached"], 1)
+        self.assertGreater(metric.data["saved_seconds"], 0)
+        with track_synthesis() as record:
+            self.assertEqual(WrappedTTS._synth_segments(
+                tts, engine, ["One.", "Two."], message)[0], wav_file)
+        self.assertFalse(record["miss"])
+        self.assertEqual(synthesized, ["One.", "Two.", "Three."])
+        shutil.rmtree(cache_dir)
+
+
+class TextNormalizationTests(unittest.TestCase):
+    def test_canonicalize_text(self):
+        from neon_audio.tts.text import canonicalize_text
+        self.assertEqual(canonicalize_text("  Hello\n\tworld  "),
+                         "Hello world")
+        self.assertEqual(canonicalize_text("Café"), "Café")
+        ssml_tags = ("speak", "break", "prosody", "say-as")
+        self.assertEqual(
+            canonicalize_text("<SPEAK>Wait <Break TIME='1s' / >now</Speak>",
+                              ssml_tags),
+            '<speak>Wait <break time="1s"/>now</speak>')
+        self.assertEqual(
+            canonicalize_text('<prosody  rate=slow pitch="+1">a</prosody>',
+                              ssml_tags),
+            '<prosody rate="slow" pitch="+1">a</prosody>')
+        self.assertEqual(
+            canonicalize_text("<Say-As interpret-as=date>1/2</Say-As>",
+                              ssml_tags),
+            '<say-as interpret-as="date">1/2</say-as>')
+        # Only the engine's SSML tags are canonicalized
+        self.assertEqual(canonicalize_text("1 < 2", ssml_tags), "1 < 2")
+        self.assertEqual(canonicalize_text("3 < x and y > 2", ssml_tags),
+                         "3 < x and y > 2")
+        self.assertEqual(canonicalize_text("if a <b and c> d", ssml_tags),
+                         "if a <b and c> d")
+        self.assertEqual(canonicalize_text("<Speaker  Notes>", ssml_tags),
+                         "<Speaker Notes>")
+        self.assertEqual(canonicalize_text("<SPEAK>a</SPEAK>"),
+                         "<SPEAK>a</SPEAK>")
+
+    def test_canonical_sentence(self):
+        tts = Mock(ssml_tags=["speak"])
+        tts.validate_ssml.side_effect = lambda text: text.replace("</br>", "")
+        self.assertEqual(WrappedTTS.canonical_sentence(
+            tts, " <SPEAK>hello </br> world</speak>"),
+            "<speak>hello world</speak>")
+
+    def test_split_segments(self):
+        from neon_audio.tts.text import split_segments
+        text = "Hello there. It is sunny today; expect a high of 20. Ok!"
+        segments = split_segments(text)
+        self.assertEqual(segments, ["Hello there.", "It is sunny today;",
+                                    "expect a high of 20. Ok!"])
+        self.assertEqual(" ".join(segments), text)
+        self.assertEqual(split_segments("Hi. Yes. No.", 20), ["Hi. Yes. No."])
+        ssml = "<speak>One sentence. Another sentence.</speak>"
+        self.assertEqual(split_segments(ssml), [ssml])
+
+
+class AudioProcessingTests(unittest.TestCase):
+    rate = 16000
+
+    def _get_test_audio(self):
+        import numpy as np
+        silence = np.zeros((self.rate // 2, 1), dtype=np.float32)
+        t = np.arange(self.rate, dtype=np.float32) / self.rate
+        tone = (0.1 * np.sin(2 * np.pi * 440 * t)).reshape(-1, 1)
+        return np.concatenate([silence, tone, silence])
+
+    def test_trim_silence(self):
+        from neon_audio.tts.audio_processing import trim_silence
+        audio = self._get_test_audio()
+        trimmed = trim_silence(audio, self.rate, pad_ms=0)
+        self.assertAlmostEqual(len(trimmed), self.rate, delta=self.rate / 100)
+        padded = trim_silence(audio, self.rate, pad_ms=100)
+        self.assertAlmostEqual(len(padded), self.rate * 1.2,
+                               delta=self.rate / 100)
+        # All-silent audio is returned unchanged
+        silent = audio[:self.rate // 2]
+        self.assertEqual(len(trim_silence(silent, self.rate)), len(silent))
+
+    def test_normalize_loudness(self):
+        import numpy as np
+        from neon_audio.tts.audio_processing import normalize_loudness
+        audio = self._get_test_audio()
+        normalized = normalize_loudness(audio, target_db=-20, peak_db=0)
+        rms_db = 20 * np.log10(np.sqrt(np.mean(normalized ** 2)))
+        self.assertAlmostEqual(rms_db, -20, 1)
+        limited = normalize_loudness(audio, target_db=0, peak_db=-6)
+        self.assertAlmostEqual(np.max(np.abs(limited)), 10 ** (-6 / 20), 3)
+
+    def test_resample(self):
+        from neon_audio.tts.audio_processing import resample
+        audio = self._get_test_audio()
+        resampled = resample(audio, self.rate, self.rate * 2)
+        self.assertEqual(resampled.shape, (len(audio) * 2, 1))
+        self.assertIs(resample(audio, self.rate, self.rate), audio)
+
+    def test_resample_anti_aliasing(self):
+        import numpy as np
+        from neon_audio.tts.audio_processing import resample
+        t = np.arange(44100)[:, np.newaxis] / 44100
+        passband = np.sin(2 * np.pi * 1000 * t).astype(np.float32)
+        stopband = np.sin(2 * np.pi * 10000 * t).astype(np.float32)
+        # 1kHz is kept and 10kHz, above the new 8kHz Nyquist, is attenuated
+        # rather than aliased to 6kHz
+        kept = resample(passband, 44100, 16000)
+        self.assertEqual(kept.shape, (16000, 1))
+        self.assertAlmostEqual(np.sqrt(np.mean(kept[100:-100] ** 2)),
+                               np.sqrt(0.5), 2)
+        removed = resample(stopband, 44100, 16000)
+        self.assertLess(np.sqrt(np.mean(removed[100:-100] ** 2)), 0.01)
+
+    def test_postprocess_audio_file(self):
+        from tempfile import mkstemp
+        from neon_audio.tts.audio_processing import postprocess_audio_file, \
+            read_wav, write_wav
+        _, wav_file = mkstemp(suffix=".wav")
+        write_wav(wav_file, self._get_test_audio(), self.rate)
+        inode = os.stat(wav_file).st_ino
+        self.assertTrue(postprocess_audio_file(wav_file,
+                                               {"sample_rate": 8000}))
+        samples, rate = read_wav(wav_file)
+        self.assertEqual(rate, 8000)
+        self.assertLess(len(samples), 8000 * 1.2)
+        # The file is replaced rather than rewritten in place
+        self.assertNotEqual(os.stat(wav_file).st_ino, inode)
+        self.assertEqual([f for f in os.listdir(os.path.dirname(wav_file))
+                          if f.startswith(os.path.basename(wav_file)) and
+                          f.endswith(".tmp")], [])
+
+        # A failed write leaves the original file intact
+        with open(wav_file, 'rb') as f:
+            original = f.read()
+        with patch("neon_audio.tts.audio_processing.write_wav",
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                postprocess_audio_file(wav_file, {})
+        with open(wav_file, 'rb') as f:
+            self.assertEqual(f.read(), original)
+        self.assertFalse(postprocess_audio_file("test.mp3", {}))
+        os.remove(wav_file)
+
+    def test_concatenate_wav_files(self):
+        from tempfile import mkdtemp
+        from neon_audio.tts.audio_processing import concatenate_wav_files, \
+            read_wav, write_wav
+        test_dir = mkdtemp()
+        first = join(test_dir, "first.wav")
+        second = join(test_dir, "second.wav")
+        out_file = join(test_dir, "out.wav")
+        write_wav(first, self._get_test_audio(), self.rate)
+        write_wav(second, self._get_test_audio(), self.rate * 2)
+        concatenate_wav_files([first, second], out_file, crossfade_ms=100)
+        samples, rate = read_wav(out_file)
+        self.assertEqual(rate, self.rate)
+        self.assertAlmostEqual(len(samples), self.rate * 2.9,
+                               delta=self.rate / 100)
+        self.assertEqual(os.listdir(test_dir).count("out.wav"), 1)
+        self.assertEqual(len(os.listdir(test_dir)), 3)
+        shutil.rmtree(test_dir)
+
+
 class TTSUtilTests(unittest.TestCase):
     def test_install_tts_plugin(self):
         from neon_audio.utils import install_tts_plugin
@@ -236,6 +2460,79 @@ class TestCLI(unittest.TestCase):
         from neon_audio.cli import run
         self.runner.invoke(run)
         main.assert_called_once()
+        main.reset_mock()
+        self.runner.invoke(run, ["--serve", "--port", "8000"])
+        main.assert_called_once_with(serve=True, host=None, port=8000)
+
+    @patch("neon_audio.synth.run_bulk_synthesis")
+    def test_synth(self, run_bulk_synthesis):
+        from neon_audio.cli import synth
+        run_bulk_synthesis.return_value = {"total": 3, "cached": 1,
+                                           "duplicates": 1, "completed": 1,
+                                           "failed": 0, "errors": {}}
+        result = self.runner.invoke(synth, ["-w", "2", __file__, "output"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(run_bulk_synthesis.call_args[0][:3],
+                         (__file__, "output", 2))
+        self.assertIn("Synthesized 1 of 3 items (1 already complete, "
+                      "1 duplicates, 0 failed)", result.output)
+
+    def test_cache_phrases(self):
+        import json
+        from tempfile import mkdtemp
+        from neon_audio.cli import cache
+        from neon_audio.tts.analytics import PhraseStats
+        cache_dir = mkdtemp()
+        stats = PhraseStats(cache_dir)
+        stats.record("Hello", "en-us", "female", None, 1.0, False)
+        stats.record("Hello", "en-us", "female", None, 0.1, True)
+        stats.save()
+        warmup = join(cache_dir, "warmup.jsonl")
+        result = self.runner.invoke(cache, ["phrases", "-d", cache_dir,
+                                            "-w", warmup])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Hello", result.output)
+        self.assertIn("Translation cache hit rate: N/A", result.output)
+        with open(warmup) as f:
+            self.assertEqual(json.loads(f.read())["text"], "Hello")
+        shutil.rmtree(cache_dir)
+
+    @patch("neon_audio.replay.replay_traffic")
+    @patch("neon_audio.replay.create_replay_service")
+    @patch("neon_audio.replay.load_traffic")
+    def test_replay(self, load_traffic, create_service, replay_traffic):
+        from neon_audio.cli import replay
+        replay_traffic.return_value = {
+            "messages": 1, "seconds": 1.0, "cpu_seconds": 0.5,
+            "rss_mb": 100.0, "rss_growth_mb": 2.0, "errors": [],
+            "latency": {"speak": {"count": 1, "p50": 0.5, "p90": 0.5,
+                                  "p99": 0.5, "max": 0.5}}}
+        result = self.runner.invoke(replay, ["-s", "4", __file__])
+        self.assertEqual(result.exit_code, 0, result.output)
+        create_service.assert_called_once_with(0.0)
+        replay_traffic.assert_called_once_with(
+            load_traffic.return_value, create_service.return_value, 4.0)
+        create_service.return_value.shutdown.assert_called_once()
+        self.assertIn("speak: 1 | p50 0.500s", result.output)
+        self.assertIn("RSS: 100.0 MiB (+2.0 MiB)", result.output)
+
+    def test_cache(self):
+        from tempfile import mkdtemp
+        from neon_audio.cli import cache
+        cache_dir = mkdtemp()
+        os.makedirs(join(cache_dir, "tts"))
+        with open(join(cache_dir, "tts", "empty.wav"), 'w'):
+            pass
+        result = self.runner.invoke(cache, ["stats", "-d", cache_dir])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Entries: 1", result.output)
+        self.assertIn("Memory hit rate: N/A", result.output)
+        result = self.runner.invoke(cache, ["verify", "-d", cache_dir, "-r"])
+        self.assertIn("Removed 1 corrupt entries", result.output)
+        result = self.runner.invoke(cache, ["prune", "-d", cache_dir,
+                                            "--max-mb", "1"])
+        self.assertIn("Removed 0 entries", result.output)
+        shutil.rmtree(cache_dir)
 
 
 if __name__ == '__main__':